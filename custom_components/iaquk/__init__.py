@@ -5,70 +5,179 @@ For more details about this component, please refer to
 https://github.com/Limych/ha-iaquk
 """
 
+import importlib.util
 import logging
+import math
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from types import MappingProxyType
 from typing import Any, Final
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components.sensor import DOMAIN as SENSOR
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    ATTR_DEVICE_CLASS,
     ATTR_UNIT_OF_MEASUREMENT,
     CONF_NAME,
+    CONF_PATH,
+    CONF_SCAN_INTERVAL,
     CONF_SENSORS,
-    EVENT_HOMEASSISTANT_START,
-    PERCENTAGE,
+    EVENT_HOMEASSISTANT_STOP,
     STATE_UNAVAILABLE,
     STATE_UNKNOWN,
-    TEMPERATURE,
-    UNIT_NOT_RECOGNIZED_TEMPLATE,
-    UnitOfTemperature,
 )
 from homeassistant.core import (
+    CALLBACK_TYPE,
     Event,
     HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
     State,
+    SupportsResponse,
     callback,
 )
+from homeassistant.exceptions import ConfigEntryError, ServiceValidationError
+from homeassistant.helpers import area_registry as ar
 from homeassistant.helpers import discovery
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.start import async_at_start
 from homeassistant.helpers.typing import ConfigType
-from homeassistant.util.unit_conversion import TemperatureConverter
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
 
+from .areas import AreaIndex
 from .const import (
+    ATTR_DAYS,
+    ATTR_INDEX,
+    ATTR_MERGED,
+    ATTR_NEW_LEVEL,
+    ATTR_OLD_LEVEL,
+    ATTR_QUANTILES,
+    ATTR_RESULTS,
+    ATTR_ROOM,
+    ATTR_ROOMS,
+    ATTR_SAMPLES,
+    ATTR_SOURCE,
     ATTR_SOURCE_INDEX_TPL,
     ATTR_SOURCES_SET,
     ATTR_SOURCES_USED,
+    ATTR_UNIT,
+    ATTR_VALUE,
+    CONF_AREA,
+    CONF_AREAS,
     CONF_CO,
     CONF_CO2,
+    CONF_DESPIKE,
+    CONF_EXPORT,
+    CONF_FORMAT,
     CONF_HCHO,
     CONF_HUMIDITY,
+    CONF_HYSTERESIS,
+    CONF_KEEP,
+    CONF_MAX_AGE,
+    CONF_MAX_SIZE,
+    CONF_MIN_WRITE_INTERVAL,
     CONF_NO2,
     CONF_PM,
+    CONF_QUANTILE_DAYS,
     CONF_RADON,
+    CONF_SETTINGS,
+    CONF_SIGNIFICANT_CHANGE,
     CONF_SOURCES,
     CONF_TEMPERATURE,
+    CONF_TICK,
+    CONF_TREND,
     CONF_TVOC,
     CONF_VOC_INDEX,
+    DATA_AREA_INDEX,
+    DATA_EXPORTER,
+    DATA_HISTOGRAM_STORE,
+    DATA_LEVEL_TIME_STORE,
+    DATA_SCHEDULER,
+    DATA_TIMER_WHEEL,
     DOMAIN,
-    LEVEL_EXCELLENT,
-    LEVEL_FAIR,
-    LEVEL_GOOD,
-    LEVEL_INADEQUATE,
-    LEVEL_POOR,
-    MWEIGTH_CO,
-    MWEIGTH_CO2,
-    MWEIGTH_HCHO,
-    MWEIGTH_NO2,
-    MWEIGTH_TVOC,
+    EVENT_LEVEL_CHANGED,
+    FORMAT_ARROW,
+    FORMAT_JSONL,
+    ISSUE_SOURCE_FAILING,
+    LEVEL_TIME_SENSORS,
+    PROFILE_SENSORS,
+    SENSOR_INDEX,
+    SENSOR_LEVEL,
+    SENSOR_PROFILE_INDEX_TPL,
+    SENSOR_PROFILE_LEVEL_TPL,
+    SENSOR_TREND_TPL,
     SENSORS,
+    SERVICE_CALCULATE,
+    SERVICE_QUANTILES,
+    SIGNAL_ROOMS_CHANGED,
+    SOURCE_INDEX_SENSORS,
     STARTUP_MESSAGE,
-    UNIT_MGM3,
-    UNIT_PPM,
-    UNIT_UGM3,
+    STORAGE_HISTOGRAM,
+    STORAGE_LEVEL_TIME,
+    TREND_SENSORS,
+)
+from .core import (
+    BANDS,
+    BOUNDARIES,
+    LEVEL_BANDS,
+    PROFILES,
+    SOURCES,
+    SOURCES_LISTS,
+    SOURCES_UNITS,
+    UNIT_NOT_RECOGNIZED_TEMPLATE,
+    Score,
+    apply_hysteresis,
+    base_unit,
+    convert_source,
+    convert_value,
+    iaq_index,
+    score,
+    temperature_celsius,
 )
+from .export import SnapshotExporter, SnapshotWriter
+from .filters import LinearTrend, SlidingMedian
+from .health import QUARANTINE_THRESHOLD, SourceHealth
+from .scheduler import TimerWheel, UpdateScheduler
+from .stats import (
+    HISTOGRAM_SIZE,
+    IndexHistogram,
+    LevelTimer,
+    StatsStore,
+    quantiles,
+)
+from .views import IaqukRoomsView
+from .websocket import async_register_websocket
 
 _LOGGER: Final = logging.getLogger(__name__)
 
+# Position of each source in compact array of IAQ points
+SOURCES_SLOTS: Final = {src: pos for pos, src in enumerate(SOURCES)}
+NO_INDEX: Final = -1
+# Shared by all rooms until their first update, so it is never changed in place
+NO_INDEXES: Final = array("b", [NO_INDEX] * len(SOURCES))
+# Values of sources are kept only for export and additional profiles
+NO_VALUES: Final = array("d", [math.nan] * len(SOURCES))
+
+NO_OPTIONS: Final = MappingProxyType({})
+
+DEFAULT_QUANTILES: Final = [0.05, 0.5, 0.95]
+
+DEFAULT_TREND_TIME_CONSTANT: Final = timedelta(minutes=15)
+
+DEFAULT_EXPORT_INTERVAL: Final = timedelta(minutes=1)
+DEFAULT_EXPORT_MAX_SIZE: Final = 10  # MiB
+DEFAULT_EXPORT_KEEP: Final = 10
+
 
 def check_voc_keys(conf: ConfigType) -> ConfigType:
     """Ensure CONF_TVOC, CONF_VOC_INDEX or none of them are provided."""
@@ -81,21 +190,6 @@ def check_voc_keys(conf: ConfigType) -> ConfigType:
     return conf
 
 
-SOURCES: Final = [
-    CONF_TEMPERATURE,
-    CONF_HUMIDITY,
-    CONF_CO2,
-    CONF_CO,
-    CONF_NO2,
-    CONF_TVOC,
-    CONF_VOC_INDEX,
-    CONF_HCHO,
-    CONF_RADON,
-    CONF_PM,
-]
-
-SOURCES_LISTS: Final = [CONF_PM]
-
 SOURCES_SCHEMA: Final = vol.All(
     vol.Schema(
         {
@@ -107,18 +201,200 @@ SOURCES_SCHEMA: Final = vol.All(
     check_voc_keys,
 )
 
-IAQ_SCHEMA: Final = vol.Schema(
+DESPIKE_SCHEMA: Final = vol.Schema(
+    {vol.Optional(src): vol.All(vol.Coerce(int), vol.Range(min=3)) for src in SOURCES}
+)
+
+MAX_AGE_SCHEMA: Final = vol.Schema(
+    {vol.Optional(src): cv.positive_time_period for src in SOURCES}
+)
+
+TREND_SCHEMA: Final = vol.Schema(
+    {vol.Optional(src): cv.positive_time_period for src in BOUNDARIES}
+)
+
+HYSTERESIS_SCHEMA: Final = vol.Schema(
+    {
+        vol.Optional(key): vol.All(vol.Coerce(float), vol.Range(min=0))
+        for key in [*SOURCES, SENSOR_LEVEL]
+    }
+)
+
+IAQ_SCHEMA: Final = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(CONF_NAME): cv.string,
+            vol.Optional(CONF_AREA): cv.string,
+            vol.Optional(CONF_SOURCES): SOURCES_SCHEMA,
+            vol.Optional(CONF_SENSORS): vol.All(
+                cv.ensure_list,
+                [
+                    vol.In(
+                        [
+                            *SENSORS,
+                            *SOURCE_INDEX_SENSORS,
+                            *LEVEL_TIME_SENSORS,
+                            *TREND_SENSORS,
+                            *PROFILE_SENSORS,
+                        ]
+                    )
+                ],
+            ),
+            vol.Optional(CONF_DESPIKE): DESPIKE_SCHEMA,
+            vol.Optional(CONF_HYSTERESIS): HYSTERESIS_SCHEMA,
+            vol.Optional(CONF_MAX_AGE): MAX_AGE_SCHEMA,
+            vol.Optional(CONF_TREND): TREND_SCHEMA,
+            vol.Optional(CONF_MIN_WRITE_INTERVAL): cv.positive_time_period,
+            vol.Optional(CONF_SIGNIFICANT_CHANGE): cv.positive_int,
+            vol.Optional(CONF_QUANTILE_DAYS): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=366)
+            ),
+        }
+    ),
+    # Sources of rooms defined by area are found in it
+    cv.has_at_least_one_key(CONF_SOURCES, CONF_AREA),
+)
+
+EXPORT_SCHEMA: Final = vol.Schema(
     {
-        vol.Optional(CONF_NAME): cv.string,
-        vol.Required(CONF_SOURCES): SOURCES_SCHEMA,
-        vol.Optional(CONF_SENSORS): vol.All(cv.ensure_list, [vol.In(SENSORS)]),
+        vol.Required(CONF_PATH): cv.string,
+        vol.Optional(
+            CONF_SCAN_INTERVAL, default=DEFAULT_EXPORT_INTERVAL
+        ): cv.positive_time_period,
+        vol.Optional(CONF_FORMAT, default=FORMAT_JSONL): vol.In(
+            [FORMAT_JSONL, FORMAT_ARROW]
+        ),
+        vol.Optional(CONF_MAX_SIZE, default=DEFAULT_EXPORT_MAX_SIZE): cv.positive_int,
+        vol.Optional(CONF_KEEP, default=DEFAULT_EXPORT_KEEP): cv.positive_int,
+    }
+)
+
+SETTINGS_SCHEMA: Final = vol.Schema(
+    {
+        vol.Optional(CONF_TICK): cv.positive_time_period,
+        vol.Optional(CONF_EXPORT): EXPORT_SCHEMA,
+        vol.Optional(CONF_AREAS): vol.All(cv.ensure_list, [cv.string]),
     }
 )
 
 CONFIG_SCHEMA: Final = vol.Schema(
-    {DOMAIN: cv.schema_with_slug_keys(IAQ_SCHEMA)}, extra=vol.ALLOW_EXTRA
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_SETTINGS): SETTINGS_SCHEMA,
+                cv.slug: IAQ_SCHEMA,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+READING_SCHEMA: Final = vol.Any(
+    vol.Schema(
+        {
+            vol.Required(ATTR_VALUE): vol.Coerce(float),
+            vol.Optional(ATTR_UNIT): cv.string,
+        }
+    ),
+    vol.All(vol.Coerce(float), lambda value: {ATTR_VALUE: value}),
+)
+
+SAMPLE_SCHEMA: Final = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(src): (
+                vol.All(cv.ensure_list, [READING_SCHEMA])
+                if src in SOURCES_LISTS
+                else READING_SCHEMA
+            )
+            for src in SOURCES
+        }
+    ),
+    cv.has_at_least_one_key(*SOURCES),
+    check_voc_keys,
 )
 
+SERVICE_CALCULATE_SCHEMA: Final = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(CONF_SOURCES, ATTR_SAMPLES): SAMPLE_SCHEMA,
+            vol.Exclusive(ATTR_SAMPLES, ATTR_SAMPLES): vol.All(
+                cv.ensure_list, [SAMPLE_SCHEMA]
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_SOURCES, ATTR_SAMPLES),
+)
+
+SERVICE_QUANTILES_SCHEMA: Final = vol.Schema(
+    {
+        vol.Optional(ATTR_ROOMS): vol.All(cv.ensure_list, [cv.slug]),
+        vol.Optional(ATTR_QUANTILES, default=DEFAULT_QUANTILES): vol.All(
+            cv.ensure_list, [vol.All(vol.Coerce(float), vol.Range(min=0, max=1))]
+        ),
+        vol.Optional(ATTR_DAYS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+
+def _calculate(sample: dict[str, Any]) -> dict[str, Any]:
+    """Calculate IAQ index for raw values of sources without any entities."""
+    values = {}
+    for src, readings in sample.items():
+        src_values = []
+        for reading in readings if isinstance(readings, list) else [readings]:
+            unit = reading.get(ATTR_UNIT, base_unit(src))
+            value = convert_source(src, reading[ATTR_VALUE], unit)
+            if value is None:
+                raise ServiceValidationError(
+                    UNIT_NOT_RECOGNIZED_TEMPLATE.format(unit, src)
+                )
+            src_values.append(value)
+        if src_values:
+            values[src] = sum(src_values)
+
+    result = score(values)
+    response = {
+        SENSOR_INDEX: result.index,
+        SENSOR_LEVEL: result.level,
+        ATTR_SOURCES_USED: len(result.indexes),
+    }
+    for src, idx in result.indexes.items():
+        response[ATTR_SOURCE_INDEX_TPL.format(src)] = idx
+    return response
+
+
+def _quantiles(
+    controllers: dict[str, "IaqukController"], data: dict[str, Any]
+) -> dict[str, Any]:
+    """Calculate quantiles of IAQ index of rooms and of all of them together."""
+    rooms = data.get(ATTR_ROOMS) or [
+        room
+        for room, controller in controllers.items()
+        if controller.index_histogram is not None
+    ]
+    now = dt_util.utcnow()
+    qs = data[ATTR_QUANTILES]
+    keys = [f"p{q * 100:g}" for q in qs]
+
+    response: dict[str, Any] = {ATTR_ROOMS: {}}
+    merged = array("d", bytes(8 * HISTOGRAM_SIZE))
+    for room in rooms:
+        controller = controllers.get(room)
+        if controller is None or controller.index_histogram is None:
+            msg = f"Room {room} does not collect quantiles of IAQ index"
+            raise ServiceValidationError(msg)
+
+        histogram = controller.index_histogram.histogram(now, data.get(ATTR_DAYS))
+        room_quantiles = quantiles(histogram, qs)
+        response[ATTR_ROOMS][room] = dict(zip(keys, room_quantiles, strict=True))
+        # Histograms of rooms are merged into the histogram of the whole group
+        for index, seconds in enumerate(histogram):
+            merged[index] += seconds
+
+    response[ATTR_MERGED] = dict(zip(keys, quantiles(merged, qs), strict=True))
+    return response
+
 
 def _deslugify(string: str) -> str:
     """Deslugify string."""
@@ -127,16 +403,97 @@ def _deslugify(string: str) -> str:
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up component."""
-    if DOMAIN not in config:
-        return True
-
     # Print startup message
     _LOGGER.info(STARTUP_MESSAGE)
     hass.data.setdefault(DOMAIN, {})
 
-    for object_id, cfg in config[DOMAIN].items():
+    # Shared parts are needed both for rooms from YAML and from config entries
+    settings = config.get(DOMAIN, {}).get(CONF_SETTINGS, {})
+    scheduler = hass.data[DATA_SCHEDULER] = UpdateScheduler(
+        hass, settings.get(CONF_TICK)
+    )
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, scheduler.async_shutdown)
+    wheel = hass.data[DATA_TIMER_WHEEL] = TimerWheel(hass, scheduler.async_schedule)
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, wheel.async_shutdown)
+
+    store = hass.data[DATA_LEVEL_TIME_STORE] = StatsStore(
+        hass,
+        STORAGE_LEVEL_TIME,
+        lambda: {
+            room: controller.level_time
+            for room, controller in hass.data[DOMAIN].items()
+            if controller.level_time is not None
+        },
+    )
+    await store.async_load()
+    store = hass.data[DATA_HISTOGRAM_STORE] = StatsStore(
+        hass,
+        STORAGE_HISTOGRAM,
+        lambda: {
+            room: controller.index_histogram
+            for room, controller in hass.data[DOMAIN].items()
+            if controller.index_histogram is not None
+        },
+    )
+    await store.async_load()
+
+    async def async_calculate(call: ServiceCall) -> ServiceResponse:
+        """Calculate IAQ index for raw source values."""
+        if CONF_SOURCES in call.data:
+            return _calculate(call.data[CONF_SOURCES])
+        return {ATTR_RESULTS: [_calculate(smp) for smp in call.data[ATTR_SAMPLES]]}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CALCULATE,
+        async_calculate,
+        schema=SERVICE_CALCULATE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_quantiles(call: ServiceCall) -> ServiceResponse:
+        """Calculate quantiles of IAQ index of rooms."""
+        return _quantiles(hass.data[DOMAIN], call.data)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUANTILES,
+        async_quantiles,
+        schema=SERVICE_QUANTILES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    async_register_websocket(hass)
+    if CONF_EXPORT in settings:
+        _async_setup_export(hass, settings[CONF_EXPORT])
+    if hass.http is not None:
+        hass.http.register_view(IaqukRoomsView(hass, hass.data[DOMAIN]))
+
+    if DOMAIN not in config:
+        return True
+
+    rooms = {
+        object_id: cfg
+        for object_id, cfg in config[DOMAIN].items()
+        if object_id != CONF_SETTINGS
+    }
+    # Listed areas without own room settings become rooms with default ones
+    for area_id in settings.get(CONF_AREAS, ()):
+        area = ar.async_get(hass).async_get_area(area_id)
+        rooms.setdefault(
+            slugify(area_id),
+            IAQ_SCHEMA(
+                {CONF_AREA: area_id, CONF_NAME: area.name if area else area_id}
+            ),
+        )
+    areas = None
+    if any(CONF_AREA in cfg for cfg in rooms.values()):
+        areas = hass.data[DATA_AREA_INDEX] = AreaIndex(hass)
+        areas.async_start()
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, areas.async_shutdown)
+
+    for object_id, cfg in rooms.items():
         name = cfg.get(CONF_NAME, _deslugify(object_id))
-        sources = cfg.get(CONF_SOURCES)
+        sources = _room_sources(hass, cfg)
         sensors = cfg.get(CONF_SENSORS)
 
         if not sensors:
@@ -148,70 +505,330 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             ", ".join([f"{key}={value}" for (key, value) in sources.items()]),
         )
 
-        controller = IaqukController(hass, object_id, name, sources)
-        hass.data[DOMAIN][object_id] = controller
+        controller = IaqukController(hass, object_id, name, sources, cfg)
+        _async_add_room(hass, object_id, controller)
+        if areas is not None and CONF_AREA in cfg:
+            areas.async_add_listener(
+                cfg[CONF_AREA], partial(_async_area_changed, hass, controller, cfg)
+            )
 
         discovery.load_platform(
             hass, SENSOR, DOMAIN, {CONF_NAME: object_id, CONF_SENSORS: sensors}, config
         )
 
-    return hass.data.get(DOMAIN) is not None
+    return True
+
+
+def _room_sources(hass: HomeAssistant, cfg: ConfigType) -> dict[str, str | list[str]]:
+    """Return sources of room together with sources found in its area."""
+    sources = cfg.get(CONF_SOURCES, {})
+    if CONF_AREA not in cfg:
+        return sources
+
+    found = hass.data[DATA_AREA_INDEX].sources(cfg[CONF_AREA])
+    # Sources set explicitly take precedence over found ones
+    if CONF_VOC_INDEX in sources:
+        found.pop(CONF_TVOC, None)
+    return {**found, **sources}
+
+
+@callback
+def _async_area_changed(
+    hass: HomeAssistant, controller: "IaqukController", cfg: ConfigType
+) -> None:
+    """Update sources of room after changes of entities in its area."""
+    controller.async_set_sources(_room_sources(hass, cfg))
+
+
+@callback
+def _async_setup_export(hass: HomeAssistant, cfg: ConfigType) -> None:
+    """Start periodic export of snapshots of all rooms."""
+    if cfg[CONF_FORMAT] == FORMAT_ARROW and importlib.util.find_spec("pyarrow") is None:
+        _LOGGER.error("Export to Arrow files requires pyarrow package")
+        return
+
+    writer = SnapshotWriter(
+        Path(hass.config.path(cfg[CONF_PATH])),
+        cfg[CONF_FORMAT],
+        cfg[CONF_MAX_SIZE] * 1024 * 1024,
+        cfg[CONF_KEEP],
+    )
+    exporter = hass.data[DATA_EXPORTER] = SnapshotExporter(
+        hass, writer, cfg[CONF_SCAN_INTERVAL], lambda: hass.data[DOMAIN]
+    )
+    exporter.async_start()
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, exporter.async_shutdown)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up room from config entry."""
+    object_id = entry.unique_id
+    options = entry.options
+    if object_id in hass.data.get(DOMAIN, {}):
+        msg = f"Room {object_id} is already set up from configuration.yaml"
+        raise ConfigEntryError(msg)
+
+    _LOGGER.debug("Initialize controller %s from config entry", object_id)
+
+    controller = IaqukController(
+        hass, object_id, entry.title, options[CONF_SOURCES], options
+    )
+    _async_add_room(hass, object_id, controller)
+    await hass.config_entries.async_forward_entry_setups(entry, [SENSOR])
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload room without touching other rooms."""
+    if not await hass.config_entries.async_unload_platforms(entry, [SENSOR]):
+        return False
+
+    _async_remove_room(hass, entry.unique_id)
+    return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget statistics of removed room."""
+    for key in (DATA_LEVEL_TIME_STORE, DATA_HISTOGRAM_STORE):
+        if (store := hass.data.get(key)) is not None:
+            store.async_forget(entry.unique_id)
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload room when its options are changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+@callback
+def _async_add_room(
+    hass: HomeAssistant, object_id: str, controller: "IaqukController"
+) -> None:
+    """Register controller of room."""
+    hass.data[DOMAIN][object_id] = controller
+    async_dispatcher_send(hass, SIGNAL_ROOMS_CHANGED, object_id)
+
+
+@callback
+def _async_remove_room(hass: HomeAssistant, object_id: str) -> None:
+    """Unregister controller of room and stop its tracking."""
+    controller = hass.data[DOMAIN].pop(object_id)
+    controller.async_shutdown()
+    async_dispatcher_send(hass, SIGNAL_ROOMS_CHANGED, object_id)
 
 
 class IaqukController:
     """IAQ UK controller."""
 
+    __slots__ = (
+        "_added",
+        "_attributes",
+        "_cancel_tracking",
+        "_despike",
+        "_entity_id",
+        "_expires",
+        "_filtered_at",
+        "_filters",
+        "_health",
+        "_hysteresis",
+        "_iaq_index",
+        "_iaq_level",
+        "_iaq_sources",
+        "_index_histogram",
+        "_indexes",
+        "_level_time",
+        "_listeners",
+        "_max_age",
+        "_min_write_interval",
+        "_name",
+        "_pm25",
+        "_profile_scores",
+        "_profiles",
+        "_raw",
+        "_significant_change",
+        "_sources",
+        "_started",
+        "_trends",
+        "_values",
+        "_version",
+        "hass",
+    )
+
     def __init__(
         self,
         hass: HomeAssistant,
         entity_id: str,
         name: str,
         sources: dict[str, str | list[str]],
+        options: ConfigType | None = None,
     ) -> None:
         """Initialize controller."""
         self.hass = hass
         self._entity_id = entity_id
         self._name = name
-        self._sources = sources
+        self._sources = {sys.intern(src): ids for src, ids in sources.items()}
+        options = options or {}
+        self._despike = options.get(CONF_DESPIKE) or NO_OPTIONS
+        self._hysteresis = options.get(CONF_HYSTERESIS) or NO_OPTIONS
+        self._max_age = options.get(CONF_MAX_AGE) or NO_OPTIONS
+        self._min_write_interval = options.get(CONF_MIN_WRITE_INTERVAL)
+        self._significant_change = options.get(CONF_SIGNIFICANT_CHANGE)
 
         self._iaq_index = None
+        self._iaq_level = None
         self._iaq_sources = 0
         self._added = False
-        self._indexes = {}
+        self._started = False
+        self._cancel_tracking = None
+        self._indexes = NO_INDEXES
+        self._attributes = None
+        self._version = 0
+        self._expires = None
+        self._health = None
+        self._level_time = None
+        if not LEVEL_TIME_SENSORS.keys().isdisjoint(options.get(CONF_SENSORS, ())):
+            store = hass.data.get(DATA_LEVEL_TIME_STORE)
+            self._level_time = LevelTimer.from_dict(
+                store.stored(entity_id) if store is not None else None
+            )
+        self._index_histogram = None
+        if days := options.get(CONF_QUANTILE_DAYS):
+            store = hass.data.get(DATA_HISTOGRAM_STORE)
+            self._index_histogram = IndexHistogram.from_dict(
+                days, store.stored(entity_id) if store is not None else None
+            )
+        # Trends are kept for sources with tuned trend or with trend sensor
+        trend = options.get(CONF_TREND) or NO_OPTIONS
+        sensors = options.get(CONF_SENSORS, ())
+        self._trends = {
+            src: LinearTrend(
+                trend.get(src, DEFAULT_TREND_TIME_CONSTANT).total_seconds()
+            )
+            for src in BOUNDARIES
+            if src in trend or SENSOR_TREND_TPL.format(src) in sensors
+        } or None
+        # Additional profiles are scored only for rooms with their sensors
+        self._profiles = {
+            name: profile
+            for name, profile in PROFILES.items()
+            if SENSOR_PROFILE_INDEX_TPL.format(name) in sensors
+            or SENSOR_PROFILE_LEVEL_TPL.format(name) in sensors
+        } or None
+        self._profile_scores: dict[str, Score] = {}
+        # Additional profiles rate PM2.5 only, not the sum of all PM sources
+        self._pm25: float | None = None
+        self._values = (
+            array("d", NO_VALUES)
+            if DATA_EXPORTER in hass.data or self._profiles is not None
+            else None
+        )
+        # Values of source entities before despike are kept only for export
+        self._raw: dict[str, float] | None = {} if DATA_EXPORTER in hass.data else None
+        # Filters are kept only for rooms with despiked sources
+        self._filters = {} if self._despike else None
+        self._filtered_at = {} if self._despike else None
+        self._listeners: list[CALLBACK_TYPE] = []
 
     def async_added_to_hass(self) -> None:
         """Register callbacks."""
 
-        # pylint: disable=unused-argument
-        # pragma: no cover
-        @callback
-        def sensor_state_listener(event: Event) -> None:  # noqa: ARG001
-            """Handle device state changes."""
-            self.update()
-
         # pylint: disable=unused-argument
         @callback
-        def sensor_startup(event: Event) -> None:  # noqa: ARG001
+        def sensor_startup(hass: HomeAssistant) -> None:  # noqa: ARG001
             """Update template on startup."""
-            entity_ids = []
-            for src in self._sources.values():
-                if isinstance(src, list):
-                    entity_ids.extend(src)
-                else:
-                    entity_ids.append(src)
-
-            _LOGGER.debug(
-                "[%s] Setup states tracking for %s",
-                self._entity_id,
-                ", ".join(entity_ids),
-            )
-
-            async_track_state_change_event(self.hass, entity_ids, sensor_state_listener)
+            self._started = True
+            self._async_track_sources()
             self.update()  # Force first update
 
         if not self._added:
             self._added = True
-            self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, sensor_startup)
+            # Rooms added later, e.g. from config entries, are started at once
+            cancel_start = async_at_start(self.hass, sensor_startup)
+            if self._cancel_tracking is None:
+                self._cancel_tracking = cancel_start
+
+    @callback
+    def _async_track_sources(self) -> None:
+        """Track state changes of entities of sources."""
+        entity_ids = []
+        for src in self._sources.values():
+            if isinstance(src, list):
+                entity_ids.extend(src)
+            else:
+                entity_ids.append(src)
+
+        _LOGGER.debug(
+            "[%s] Setup states tracking for %s",
+            self._entity_id,
+            ", ".join(entity_ids),
+        )
+
+        self._cancel_tracking = async_track_state_change_event(
+            self.hass, entity_ids, self._async_source_changed
+        )
+
+    @callback
+    def _async_source_changed(self, event: Event) -> None:
+        """Handle device state changes."""
+        if self._filters is not None:
+            self._sample_source(event.data["entity_id"])
+        scheduler = self.hass.data.get(DATA_SCHEDULER)
+        if scheduler is None:
+            self.update()
+        else:
+            scheduler.async_schedule(self)
+
+    @callback
+    def async_set_sources(self, sources: dict[str, str | list[str]]) -> None:
+        """Replace sources of room and track the new ones."""
+        sources = {sys.intern(src): ids for src, ids in sources.items()}
+        if sources == self._sources:
+            return
+
+        _LOGGER.debug(
+            "[%s] Sources changed: %s",
+            self._entity_id,
+            ", ".join([f"{key}={value}" for (key, value) in sources.items()]),
+        )
+        self._sources = sources
+        self._attributes = None
+        self._version += 1
+        if self._started and self._cancel_tracking is not None:
+            self._cancel_tracking()
+            self._async_track_sources()
+            self.update()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop tracking of sources and keep statistics for the next setup."""
+        if self._cancel_tracking is not None:
+            self._cancel_tracking()
+            self._cancel_tracking = None
+
+        if (scheduler := self.hass.data.get(DATA_SCHEDULER)) is not None:
+            scheduler.async_discard(self)
+        if (wheel := self.hass.data.get(DATA_TIMER_WHEEL)) is not None:
+            wheel.async_cancel(self)
+
+        for key, stats in (
+            (DATA_LEVEL_TIME_STORE, self._level_time),
+            (DATA_HISTOGRAM_STORE, self._index_histogram),
+        ):
+            if stats is not None and (store := self.hass.data.get(key)) is not None:
+                store.async_release(self._entity_id, stats)
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for index updates."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove update listener."""
+            self._listeners.remove(update_callback)
+
+        return remove_listener
 
     @property
     def unique_id(self) -> str:
@@ -223,39 +840,102 @@ class IaqukController:
         """Get controller name."""
         return self._name
 
+    @property
+    def min_write_interval(self) -> timedelta | None:
+        """Get minimal interval between writes of IAQ index."""
+        return self._min_write_interval
+
+    @property
+    def significant_change(self) -> int | None:
+        """Get IAQ index change to be written regardless of interval."""
+        return self._significant_change
+
+    @property
+    def despike(self) -> Mapping[str, int]:
+        """Get median windows of despiked sources."""
+        return self._despike
+
+    @property
+    def hysteresis(self) -> Mapping[str, float]:
+        """Get hysteresis margins of sources and of level."""
+        return self._hysteresis
+
     @property
     def iaq_index(self) -> int | None:
         """Get IAQ index."""
         return self._iaq_index
 
-    # pylint: disable=R1705
     @property
     def iaq_level(self) -> str | None:
         """Get IAQ level."""
-        # Transform IAQ index to human readable text according
-        # to Indoor Air Quality UK: http://www.iaquk.org.uk/
-        if self._iaq_index is None:
-            return None
-        if self._iaq_index <= 25:  # noqa: PLR2004
-            return LEVEL_INADEQUATE
-        if self._iaq_index <= 38:  # noqa: PLR2004
-            return LEVEL_POOR
-        if self._iaq_index <= 51:  # noqa: PLR2004
-            return LEVEL_FAIR
-        if self._iaq_index <= 60:  # noqa: PLR2004
-            return LEVEL_GOOD
-        return LEVEL_EXCELLENT
+        return self._iaq_level
 
     @property
-    def state_attributes(self) -> dict[str, Any] | None:
+    def indexes(self) -> dict[str, int]:
+        """Get IAQ points of each source used in the last update."""
+        return {
+            src: idx
+            for src, idx in zip(SOURCES, self._indexes, strict=True)
+            if idx != NO_INDEX
+        }
+
+    def source_index(self, src: str) -> int | None:
+        """Get IAQ points of source used in the last update."""
+        idx = self._indexes[SOURCES_SLOTS[src]]
+        return None if idx == NO_INDEX else idx
+
+    def profile_score(self, name: str) -> Score | None:
+        """Get index, level and points of sources of additional profile."""
+        return self._profile_scores.get(name)
+
+    def source_trend(self, src: str) -> LinearTrend | None:
+        """Get trend of source values."""
+        return self._trends.get(src) if self._trends is not None else None
+
+    @property
+    def source_values(self) -> dict[str, float]:
+        """Get values of sources in base units used in the last update."""
+        if self._values is None:
+            return {}
+        return {
+            src: value
+            for src, value in zip(SOURCES, self._values, strict=True)
+            if not math.isnan(value)
+        }
+
+    @property
+    def raw_values(self) -> dict[str, list[float | None]]:
+        """Get values of source entities before despike used in the last update."""
+        if self._raw is None:
+            return {}
+        return {
+            src: [self._raw.get(eid) for eid in ids]
+            for src, entity_ids in self._sources.items()
+            if (ids := entity_ids if isinstance(entity_ids, list) else [entity_ids])
+        }
+
+    @property
+    def version(self) -> int:
+        """Get number of state attributes changes."""
+        return self._version
+
+    @property
+    def state_attributes(self) -> Mapping[str, Any] | None:
         """Return the state attributes."""
+        if self._attributes is None:
+            self._attributes = MappingProxyType(self._build_attributes())
+        return self._attributes
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Build the state attributes."""
         state_attr = {
             ATTR_SOURCES_SET: len(self._sources),
             ATTR_SOURCES_USED: self._iaq_sources,
         }
 
-        for src, idx in self._indexes.items():
-            state_attr[ATTR_SOURCE_INDEX_TPL.format(src)] = idx
+        for src, idx in zip(SOURCES, self._indexes, strict=True):
+            if idx != NO_INDEX:
+                state_attr[ATTR_SOURCE_INDEX_TPL.format(src)] = idx
 
         return state_attr
 
@@ -263,24 +943,34 @@ class IaqukController:
         """Update index state."""
         _LOGGER.debug("[%s] State update", self._entity_id)
 
-        iaq = 0
-        sources = 0
-        indexes = {}
+        indexes = array("b", NO_INDEXES)
+        points = []
+        self._expires = None
+        self._reset_values()
+        now = dt_util.utcnow()
         for src in self._sources:
-            try:
-                # pylint: disable=unnecessary-dunder-call
-                idx = self.__getattribute__(f"_{src}_index")
-                _LOGGER.debug("[%s] %s_index=%s", self._entity_id, src, idx)
-                if idx is not None:
-                    iaq += idx
-                    sources += 1
-                    indexes[src] = idx
-            except Exception:
-                _LOGGER.exception("Exception occurred")
-        if iaq:
-            self._indexes = indexes
-            self._iaq_index = int((65 * iaq) / (5 * sources))
-            self._iaq_sources = int(sources)
+            idx = self._checked_source_index(src, now)
+            _LOGGER.debug("[%s] %s_index=%s", self._entity_id, src, idx)
+            if idx is not None:
+                indexes[SOURCES_SLOTS[src]] = idx
+                points.append(idx)
+        if self._profiles is not None:
+            self._score_profiles(indexes)
+        if points:
+            old_level = self._iaq_level
+            if indexes != self._indexes or len(points) != self._iaq_sources:
+                self._indexes = indexes
+                self._iaq_sources = len(points)
+                # Attributes are rebuilt on demand and shared by all sensors
+                self._attributes = None
+                self._version += 1
+            self._iaq_index = iaq_index(points)
+            self._iaq_level = apply_hysteresis(
+                self._iaq_index,
+                LEVEL_BANDS,
+                self._iaq_level,
+                self._hysteresis.get(SENSOR_LEVEL),
+            )
             _LOGGER.debug(
                 "[%s] Update IAQ index to %d (%d sources used)",
                 self._entity_id,
@@ -288,6 +978,170 @@ class IaqukController:
                 self._iaq_sources,
             )
 
+            if old_level is not None and old_level != self._iaq_level:
+                self._fire_level_changed(old_level)
+
+        elif self._iaq_index is not None:
+            _LOGGER.debug("[%s] All sources are unavailable", self._entity_id)
+            self._indexes = NO_INDEXES
+            self._iaq_sources = 0
+            self._iaq_index = self._iaq_level = None
+            self._attributes = None
+            self._version += 1
+
+        self._account_stats(now)
+
+        wheel = self.hass.data.get(DATA_TIMER_WHEEL)
+        if wheel is not None:
+            if self._expires is None:
+                wheel.async_cancel(self)
+            else:
+                # Recalculate index when the oldest fresh reading becomes stale
+                wheel.async_schedule(self, self._expires)
+
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _account_stats(self, now: datetime) -> None:
+        """Account time spent at the current IAQ level and index."""
+        if self._level_time is not None and self._level_time.transition(
+            self._iaq_level, now
+        ):
+            store = self.hass.data.get(DATA_LEVEL_TIME_STORE)
+            if store is not None:
+                store.async_schedule_save()
+
+        if self._index_histogram is not None and self._index_histogram.observe(
+            self._iaq_index, now
+        ):
+            store = self.hass.data.get(DATA_HISTOGRAM_STORE)
+            if store is not None:
+                store.async_schedule_save()
+
+    @property
+    def level_time(self) -> LevelTimer | None:
+        """Get time spent in each IAQ level."""
+        return self._level_time
+
+    @property
+    def index_histogram(self) -> IndexHistogram | None:
+        """Get time spent at each IAQ index value."""
+        return self._index_histogram
+
+    @property
+    def source_health(self) -> dict[str, Any]:
+        """Get state of failing sources."""
+        return self._health.as_dict() if self._health else {}
+
+    def _issue_id(self, src: str) -> str:
+        """Return ID of repair issue for failing source."""
+        return f"{ISSUE_SOURCE_FAILING}_{self._entity_id}_{src}"
+
+    def _reset_values(self) -> None:
+        """Forget values of sources used in the previous update."""
+        if self._values is not None:
+            self._values[:] = NO_VALUES
+        self._pm25 = None
+        if self._raw is not None:
+            self._raw.clear()
+
+    def _score_profiles(self, indexes: array) -> None:
+        """Score additional profiles from the values used for IAQ index."""
+        values = {
+            src: self._values[slot]
+            for src, slot in SOURCES_SLOTS.items()
+            if indexes[slot] != NO_INDEX
+        }
+        values.pop(CONF_PM, None)
+        if self._pm25 is not None:
+            values[CONF_PM] = self._pm25
+        self._profile_scores = {
+            name: score(values, profile) for name, profile in self._profiles.items()
+        }
+
+    def _checked_source_index(self, src: str, now: datetime) -> int | None:
+        """Transform source values to IAQ points tracking failures of source."""
+        if self._health and (until := self._health.skip_until(src, now)):
+            _LOGGER.debug("[%s] %s is skipped until %s", self._entity_id, src, until)
+            self._expire_at(until)
+            return None
+
+        try:
+            idx = self._source_index(src)
+        except Exception as err:  # noqa: BLE001
+            self._source_failed(src, err, now)
+            return None
+
+        # Missing value is neither success nor failure of source
+        if idx is not None and self._health and self._health.success(src):
+            _LOGGER.info("[%s] Source %s has recovered", self._entity_id, src)
+            ir.async_delete_issue(self.hass, DOMAIN, self._issue_id(src))
+        return idx
+
+    def _source_failed(self, src: str, err: Exception, now: datetime) -> None:
+        """Count failure of source and quarantine it if it keeps failing."""
+        if self._health is None:
+            self._health = SourceHealth()
+        failures = self._health.failure(src, err, now)
+
+        # Only the first failure in a row is logged with traceback
+        if failures == 1:
+            _LOGGER.error(
+                "[%s] Can't get value of %s source", self._entity_id, src, exc_info=err
+            )
+            return
+        _LOGGER.debug(
+            "[%s] Source %s failed %d times in a row: %s",
+            self._entity_id,
+            src,
+            failures,
+            err,
+        )
+
+        until = self._health.skip_until(src, now)
+        if until is not None:
+            self._expire_at(until)
+        if failures == QUARANTINE_THRESHOLD:
+            _LOGGER.warning(
+                "[%s] Source %s keeps failing and is skipped for a while: %s",
+                self._entity_id,
+                src,
+                err,
+            )
+            ir.async_create_issue(
+                self.hass,
+                DOMAIN,
+                self._issue_id(src),
+                is_fixable=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key=ISSUE_SOURCE_FAILING,
+                translation_placeholders={
+                    "room": self._name,
+                    "source": src,
+                    "error": str(err),
+                },
+            )
+
+    def _expire_at(self, when: datetime) -> None:
+        """Request update of the room at given time."""
+        if self._expires is None or when < self._expires:
+            self._expires = when
+
+    def _fire_level_changed(self, old_level: str) -> None:
+        """Fire event on IAQ level transition."""
+        indexes = self.indexes
+        self.hass.bus.async_fire(
+            EVENT_LEVEL_CHANGED,
+            {
+                ATTR_ROOM: self._entity_id,
+                ATTR_OLD_LEVEL: old_level,
+                ATTR_NEW_LEVEL: self._iaq_level,
+                ATTR_INDEX: self._iaq_index,
+                # Source with the worst air quality limits the level most
+                ATTR_SOURCE: min(indexes, key=indexes.get),
+            },
+        )
+
     @staticmethod
     def _has_state(state: str | None) -> bool:
         """Return True if state has any value."""
@@ -301,9 +1155,9 @@ class IaqukController:
         mweight: float | None = None,
     ) -> float | None:
         """Convert value to number."""
-        target_unit = None
-        if entity_unit is not None and not isinstance(entity_unit, dict):
-            entity_unit = {entity_unit: 1}
+        target_unit = entity_unit
+        if isinstance(entity_unit, dict):
+            target_unit = next(iter(entity_unit))
 
         entity = self.hass.states.get(entity_id)
         if entity is None:
@@ -326,287 +1180,212 @@ class IaqukController:
             _LOGGER.debug("State of entity %s is unknown", entity_id)
             return None
 
-        if entity_unit is not None:
-            target_unit = next(iter(entity_unit))
-            if unit not in entity_unit:
-                # pylint: disable=R1705
-                if mweight is None:
-                    _LOGGER.debug(
-                        'Entity %s has inappropriate "%s" '
-                        "units for %s source. Ignored.",
-                        entity_id,
-                        unit,
-                        source_type,
-                    )
-                    return None
-                entity_unit = entity_unit.copy()
-                if "ppb" in (unit, target_unit):
-                    mweight /= 1000
-                if "µg/m³" in (unit, target_unit):
-                    mweight *= 1000
-                if unit in {"ppm", "ppb"}:
-                    entity_unit[unit] = mweight / 24.45
-                else:
-                    entity_unit[unit] = 24.45 / mweight
-
-        value = float(value)
+        if not self._is_fresh(entity, source_type):
+            _LOGGER.debug("State of entity %s is too old", entity_id)
+            return None
+
+        converted = convert_value(value, unit, entity_unit, mweight)
+        if converted is None:
+            _LOGGER.debug(
+                'Entity %s has inappropriate "%s" units for %s source. Ignored.',
+                entity_id,
+                unit,
+                source_type,
+            )
+            return None
 
         if entity_unit is not None and unit != target_unit:
-            value *= entity_unit[unit]
             _LOGGER.debug(
                 "[%s] %s=%s %s (converted)",
                 self._entity_id,
                 entity_id,
-                value,
+                converted,
                 target_unit,
             )
-        return value
 
-    @property
-    def _temperature_index(self) -> int | None:
-        """Transform indoor temperature values to IAQ points."""
-        entity_id = self._sources.get(CONF_TEMPERATURE)
-        if entity_id is None:
-            return None
+        return self._despike_value(entity, converted, source_type)
+
+    def _is_fresh(self, entity: State, source_type: str) -> bool:
+        """Return False if state of source is older than max age of the source."""
+        max_age = self._max_age.get(source_type)
+        if max_age is None:
+            return True
+
+        # Sensors reporting unchanged values only update last_reported (HA 2024.3+)
+        reported = getattr(entity, "last_reported", entity.last_updated)
+        expires = reported + max_age
+        if expires <= dt_util.utcnow():
+            return False
 
-        value = self._get_number_state(entity_id, source_type=CONF_TEMPERATURE)
-        if value is None:
+        self._expire_at(expires)
+        return True
+
+    def _source_value(self, src: str, entity_id: str) -> float | None:
+        """Get source value in target units."""
+        entity_unit, mweight = SOURCES_UNITS[src]
+        return self._get_number_state(entity_id, entity_unit, src, mweight=mweight)
+
+    def _sample_source(self, entity_id: str) -> None:
+        """Push new state of despiked source entity to its filter."""
+        # Batched update reads only the last of states changed since the previous
+        # one, so every state is sampled when it changes
+        for src, ids in self._sources.items():
+            if src in self._despike and entity_id in (
+                ids if isinstance(ids, list) else [ids]
+            ):
+                try:
+                    self._source_value(src, entity_id)
+                except Exception:  # noqa: BLE001
+                    _LOGGER.debug("Sample of %s is counted on update", entity_id)
+                return
+
+    def _despike_value(self, entity: State, value: float, source_type: str) -> float:
+        """Replace value with median of the last samples of the entity."""
+        if self._raw is not None:
+            self._raw[entity.entity_id] = value
+        window = self._despike.get(source_type)
+        if window is None:
+            return value
+
+        entity_id = entity.entity_id
+        flt = self._filters.get(entity_id)
+        if flt is None:
+            flt = self._filters[entity_id] = SlidingMedian(window)
+
+        # Every state change is a new sample; repeated reads of the same state
+        # (e.g. when another source of the room changes) are not
+        if self._filtered_at.get(entity_id) != entity.last_updated:
+            self._filtered_at[entity_id] = entity.last_updated
+            flt.push(value)
+
+        _LOGGER.debug(
+            "[%s] %s=%s (despiked over %d samples)",
+            self._entity_id,
+            entity_id,
+            flt.median,
+            len(flt),
+        )
+        return flt.median
+
+    def _source_index(self, src: str) -> int | None:
+        """Transform source values to IAQ points."""
+        entity_ids = self._sources.get(src)
+        if not entity_ids:
             return None
 
+        if src in SOURCES_LISTS:
+            values = []
+            pm25 = []
+            for eid in entity_ids:
+                val = self._source_value(src, eid)
+                if val is None:
+                    continue
+                values.append(val)
+                if (
+                    src == CONF_PM
+                    and self._profiles is not None
+                    and self._is_pm25(eid, len(entity_ids))
+                ):
+                    pm25.append(val)
+
+            if not values:
+                return None
+            value = sum(values)
+            if pm25:
+                self._pm25 = sum(pm25)
+
+        else:
+            value = self._source_value(src, entity_ids)
+            if value is None:
+                return None
+
+            if src == CONF_TEMPERATURE:
+                value = self._temperature_value(entity_ids, value)
+
+        if self._values is not None:
+            self._values[SOURCES_SLOTS[src]] = value
+        if self._trends is not None and src in self._trends:
+            self._push_trend(src, entity_ids, value)
+        return apply_hysteresis(
+            value, BANDS[src], self.source_index(src), self._hysteresis.get(src)
+        )
+
+    def _temperature_value(self, entity_id: str, value: float) -> float:
+        """Convert temperature of entity to degrees Celsius."""
         entity = self.hass.states.get(entity_id)
-        entity_unit = entity.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
-        if entity_unit not in (UnitOfTemperature.CELSIUS, UnitOfTemperature.FAHRENHEIT):
-            raise ValueError(
-                UNIT_NOT_RECOGNIZED_TEMPLATE.format(entity_unit, TEMPERATURE)
-            )
+        unit = entity.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if self._raw is not None and entity_id in self._raw:
+            self._raw[entity_id] = temperature_celsius(self._raw[entity_id], unit)
+        return temperature_celsius(value, unit)
 
-        if entity_unit != UnitOfTemperature.CELSIUS:
-            value = TemperatureConverter.convert(
-                value, entity_unit, UnitOfTemperature.CELSIUS
-            )
+    def _is_pm25(self, entity_id: str, count: int) -> bool:
+        """Return True if PM source entity measures PM2.5."""
+        entity = self.hass.states.get(entity_id)
+        device_class = entity.attributes.get(ATTR_DEVICE_CLASS)
+        # The only PM entity without device class is taken as PM2.5 sensor
+        return device_class == SensorDeviceClass.PM25 or (
+            device_class is None and count == 1
+        )
 
-        index = 1
-        if 18 <= value <= 21:  # °C     # noqa: PLR2004
-            index = 5
-        elif 16 < value < 23:  # °C     # noqa: PLR2004
-            index = 4
-        elif 15 < value < 24:  # °C     # noqa: PLR2004
-            index = 3
-        elif 14 < value < 25:  # °C     # noqa: PLR2004
-            index = 2
-        return index
+    def _push_trend(self, src: str, entity_ids: str | list[str], value: float) -> None:
+        """Add value of source to its trend if any source entity has changed."""
+        ids = entity_ids if isinstance(entity_ids, list) else [entity_ids]
+        at = max(
+            state.last_updated.timestamp()
+            for eid in ids
+            if (state := self.hass.states.get(eid)) is not None
+        )
+        trend = self._trends[src]
+        # Reads of the same states (e.g. when other source changes) are ignored
+        if at != trend.at:
+            trend.push(value, at)
+
+    @property
+    def _temperature_index(self) -> int | None:
+        """Transform indoor temperature values to IAQ points."""
+        return self._source_index(CONF_TEMPERATURE)
 
     @property
     def _humidity_index(self) -> int | None:
         """Transform indoor humidity values to IAQ points."""
-        entity_id = self._sources.get(CONF_HUMIDITY)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(entity_id, PERCENTAGE, CONF_HUMIDITY)
-        if value is None:
-            return None
-
-        index = 1
-        if 40 <= value <= 60:  # %      # noqa: PLR2004
-            index = 5
-        elif 30 <= value <= 70:  # %    # noqa: PLR2004
-            index = 4
-        elif 20 <= value <= 80:  # %    # noqa: PLR2004
-            index = 3
-        elif 10 <= value <= 90:  # %    # noqa: PLR2004
-            index = 2
-        return index
+        return self._source_index(CONF_HUMIDITY)
 
     @property
     def _co2_index(self) -> int | None:
         """Transform indoor eCO2 values to IAQ points."""
-        entity_id = self._sources.get(CONF_CO2)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(
-            entity_id, UNIT_PPM, CONF_CO2, mweight=MWEIGTH_CO2
-        )
-        if value is None:
-            return None
-
-        index = 1
-        if value < 600:  # ppm      # noqa: PLR2004
-            index = 5
-        elif value <= 800:  # ppm   # noqa: PLR2004
-            index = 4
-        elif value <= 1500:  # ppm  # noqa: PLR2004
-            index = 3
-        elif value <= 1800:  # ppm  # noqa: PLR2004
-            index = 2
-        return index
+        return self._source_index(CONF_CO2)
 
     @property
     def _tvoc_index(self) -> int | None:
         """Transform indoor tVOC values to IAQ points."""
-        entity_id = self._sources.get(CONF_TVOC)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(
-            entity_id, UNIT_MGM3, CONF_TVOC, mweight=MWEIGTH_TVOC
-        )
-        if value is None:
-            return None
-
-        index = 1
-        if value < 0.1:  # mg/m³        # noqa: PLR2004
-            index = 5
-        elif value <= 0.3:  # mg/m³     # noqa: PLR2004
-            index = 4
-        elif value <= 0.5:  # mg/m³     # noqa: PLR2004
-            index = 3
-        elif value <= 1.0:  # mg/m³
-            index = 2
-        return index
+        return self._source_index(CONF_TVOC)
 
     @property
     def _voc_index_index(self) -> int | None:
-        """
-        Transform indoor VOC index (0-500) values to IAQ points.
-
-        Especially for SGP40 and SGP41 gas sensors:
-            0-50    — Good
-            51-100  — Moderate
-            101-150 — Unhealthy for sensitive peoples
-            151-200 — Unhealthy
-            201-300 — Very unhealthy
-            301-500 — Hazardous
-        """
-        entity_id = self._sources.get(CONF_VOC_INDEX)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(entity_id, None, CONF_VOC_INDEX)
-        if value is None:
-            return None
-
-        index = 1
-        if value <= 50:  # noqa: PLR2004
-            index = 5
-        elif value <= 115:  # noqa: PLR2004
-            index = 4
-        elif value <= 180:  # noqa: PLR2004
-            index = 3
-        elif value <= 260:  # noqa: PLR2004
-            index = 2
-        return index
+        """Transform indoor VOC index (0-500) values to IAQ points."""
+        return self._source_index(CONF_VOC_INDEX)
 
     @property
     def _pm_index(self) -> int | None:
         """Transform indoor particulate matters values to IAQ points."""
-        entity_ids = self._sources.get(CONF_PM)
-        if entity_ids is None or entity_ids == []:
-            return None
-
-        values = []
-        for eid in entity_ids:
-            val = self._get_number_state(eid, UNIT_UGM3, CONF_PM)
-            if val is None:
-                continue
-            values.append(val)
-
-        if not values:
-            return None
-
-        value = sum(values)
-        index = 1
-        if value <= 23:  # µg/m3    # noqa: PLR2004
-            index = 5
-        elif value <= 41:  # µg/m3  # noqa: PLR2004
-            index = 4
-        elif value <= 53:  # µg/m3  # noqa: PLR2004
-            index = 3
-        elif value <= 64:  # µg/m3  # noqa: PLR2004
-            index = 2
-        return index
+        return self._source_index(CONF_PM)
 
     @property
     def _no2_index(self) -> int | None:
         """Transform indoor NO2 values to IAQ points."""
-        entity_id = self._sources.get(CONF_NO2)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(
-            entity_id, UNIT_MGM3, CONF_NO2, mweight=MWEIGTH_NO2
-        )
-        if value is None:
-            return None
-
-        index = 1
-        if value < 0.2:  # mg/m³        # noqa: PLR2004
-            index = 5
-        elif value <= 0.4:  # mg/m³     # noqa: PLR2004
-            index = 3
-        return index
+        return self._source_index(CONF_NO2)
 
     @property
     def _co_index(self) -> int | None:
         """Transform indoor CO values to IAQ points."""
-        entity_id = self._sources.get(CONF_CO)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(
-            entity_id, UNIT_MGM3, CONF_CO, mweight=MWEIGTH_CO
-        )
-        if value is None:
-            return None
-
-        index = 1
-        if value == 0:  # mg/m³
-            index = 5
-        elif value <= 7:  # mg/m³   # noqa: PLR2004
-            index = 3
-        return index
+        return self._source_index(CONF_CO)
 
     @property
     def _hcho_index(self) -> int | None:
         """Transform indoor Formaldehyde (HCHO) values to IAQ points."""
-        entity_id = self._sources.get(CONF_HCHO)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(
-            entity_id, UNIT_UGM3, CONF_HCHO, mweight=MWEIGTH_HCHO
-        )
-        if value is None:
-            return None
-
-        index = 1
-        if value < 20:  # µg/m³         # noqa: PLR2004
-            index = 5
-        elif value <= 50:  # µg/m³      # noqa: PLR2004
-            index = 4
-        elif value <= 100:  # µg/m³     # noqa: PLR2004
-            index = 3
-        elif value <= 200:  # µg/m³     # noqa: PLR2004
-            index = 2
-        return index
+        return self._source_index(CONF_HCHO)
 
     @property
     def _radon_index(self) -> int | None:
         """Transform indoor Radon (Rn) values to IAQ points."""
-        entity_id = self._sources.get(CONF_RADON)
-        if entity_id is None:
-            return None
-
-        value = self._get_number_state(entity_id, "Bq/m3")
-        if value is None:
-            return None
-
-        index = 1
-        if value == 0:  # Bq/m3
-            index = 5
-        elif value < 20:  # Bq/m3       # noqa: PLR2004
-            index = 3
-        elif value <= 100:  # Bq/m3     # noqa: PLR2004
-            index = 2
-        return index
+        return self._source_index(CONF_RADON)
@@ -0,0 +1,191 @@
+"""Discovery of sources of rooms defined by areas."""
+
+import logging
+from typing import Final
+
+from homeassistant.components.sensor import DOMAIN as SENSOR
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from .const import (
+    CONF_CO,
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_NO2,
+    CONF_PM,
+    CONF_RADON,
+    CONF_TEMPERATURE,
+    CONF_TVOC,
+)
+from .core import SOURCES_LISTS
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+DEVICE_CLASSES_SOURCES: Final = {
+    SensorDeviceClass.TEMPERATURE: CONF_TEMPERATURE,
+    SensorDeviceClass.HUMIDITY: CONF_HUMIDITY,
+    SensorDeviceClass.CO2: CONF_CO2,
+    SensorDeviceClass.CO: CONF_CO,
+    SensorDeviceClass.NITROGEN_DIOXIDE: CONF_NO2,
+    SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS: CONF_TVOC,
+    SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS_PARTS: CONF_TVOC,
+    SensorDeviceClass.PM25: CONF_PM,
+    SensorDeviceClass.PM10: CONF_PM,
+}
+
+# Sources which have no device class are recognized by unit
+UNITS_SOURCES: Final = {
+    "Bq/m3": CONF_RADON,
+    "Bq/m³": CONF_RADON,
+}
+
+
+def entity_source(entry: er.RegistryEntry) -> str | None:
+    """Return source which entity can be used for."""
+    if entry.domain != SENSOR or entry.disabled_by is not None:
+        return None
+    device_class = entry.device_class or entry.original_device_class
+    if device_class in DEVICE_CLASSES_SOURCES:
+        return DEVICE_CLASSES_SOURCES[device_class]
+    return UNITS_SOURCES.get(entry.unit_of_measurement)
+
+
+class AreaIndex:
+    """
+    Index of source entities in each area.
+
+    The index is built from entity and device registries once and then is
+    updated by registry events for changed entities only, so rooms resolve
+    their sources without scanning registries.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize index."""
+        self.hass = hass
+        self._entities = er.async_get(hass)
+        self._devices = dr.async_get(hass)
+        # Source entities of each area and the area of each of them
+        self._areas: dict[str, dict[str, str]] = {}
+        self._entity_areas: dict[str, str] = {}
+        # Source entities which follow area of their device
+        self._device_entities: dict[str, set[str]] = {}
+        self._entity_devices: dict[str, str] = {}
+        self._listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        self._unsubscribe: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_start(self) -> None:
+        """Build index and follow registries changes."""
+        for entry in self._entities.entities.values():
+            self._add_entity(entry)
+        _LOGGER.debug(
+            "Indexed %d source entities in %d areas",
+            len(self._entity_areas),
+            len(self._areas),
+        )
+
+        self._unsubscribe = [
+            self.hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_updated
+            ),
+            self.hass.bus.async_listen(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_updated
+            ),
+        ]
+
+    @callback
+    def async_shutdown(self, *_: object) -> None:
+        """Stop following registries changes."""
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+
+    @callback
+    def async_add_listener(
+        self, area_id: str, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for changes of source entities of area."""
+        self._listeners.setdefault(area_id, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove area listener."""
+            self._listeners[area_id].remove(update_callback)
+
+        return remove_listener
+
+    def sources(self, area_id: str) -> dict[str, str | list[str]]:
+        """Return sources of area; the first entity is taken for single sources."""
+        found: dict[str, list[str]] = {}
+        for entity_id, src in sorted(self._areas.get(area_id, {}).items()):
+            found.setdefault(src, []).append(entity_id)
+        return {
+            src: ids if src in SOURCES_LISTS else ids[0] for src, ids in found.items()
+        }
+
+    def _add_entity(self, entry: er.RegistryEntry) -> str | None:
+        """Index entity if it is a source in some area. Return its area."""
+        src = entity_source(entry)
+        if src is None:
+            return None
+
+        area_id = entry.area_id
+        if area_id is None and entry.device_id is not None:
+            self._device_entities.setdefault(entry.device_id, set()).add(
+                entry.entity_id
+            )
+            self._entity_devices[entry.entity_id] = entry.device_id
+            device = self._devices.async_get(entry.device_id)
+            area_id = device.area_id if device is not None else None
+        if area_id is None:
+            return None
+
+        self._areas.setdefault(area_id, {})[entry.entity_id] = src
+        self._entity_areas[entry.entity_id] = area_id
+        return area_id
+
+    def _remove_entity(self, entity_id: str) -> str | None:
+        """Remove entity from index. Return its former area."""
+        device_id = self._entity_devices.pop(entity_id, None)
+        if device_id is not None:
+            self._device_entities[device_id].discard(entity_id)
+        area_id = self._entity_areas.pop(entity_id, None)
+        if area_id is not None:
+            del self._areas[area_id][entity_id]
+        return area_id
+
+    def _reindex_entity(self, entity_id: str, old_entity_id: str | None) -> set[str]:
+        """Index entity again. Return areas which sources have changed."""
+        old_area = self._remove_entity(old_entity_id or entity_id)
+        entry = self._entities.async_get(entity_id)
+        new_area = self._add_entity(entry) if entry is not None else None
+        return {area_id for area_id in (old_area, new_area) if area_id is not None}
+
+    @callback
+    def _async_entity_updated(self, event: Event) -> None:
+        """Index again entity which has changed."""
+        data = event.data
+        self._async_notify(
+            self._reindex_entity(data["entity_id"], data.get("old_entity_id"))
+        )
+
+    @callback
+    def _async_device_updated(self, event: Event) -> None:
+        """Index again entities which follow area of changed device."""
+        data = event.data
+        if data["action"] != "update" or "area_id" not in data.get("changes", {}):
+            return
+
+        changed = set()
+        for entity_id in list(self._device_entities.get(data["device_id"], ())):
+            changed |= self._reindex_entity(entity_id, None)
+        self._async_notify(changed)
+
+    @callback
+    def _async_notify(self, areas: set[str]) -> None:
+        """Call listeners of changed areas."""
+        for area_id in areas:
+            for update_callback in list(self._listeners.get(area_id, ())):
+                update_callback()
@@ -0,0 +1,144 @@
+"""Config flow for IAQ UK rooms."""
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant import config_entries
+from homeassistant.components.sensor import DOMAIN as SENSOR
+from homeassistant.const import CONF_NAME, CONF_SENSORS
+from homeassistant.core import callback
+from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import selector
+from homeassistant.util import slugify
+
+from . import SOURCES_SCHEMA
+from .const import (
+    CONF_SETTINGS,
+    CONF_SOURCES,
+    DOMAIN,
+    LEVEL_TIME_SENSORS,
+    PROFILE_SENSORS,
+    SENSORS,
+    SOURCE_INDEX_SENSORS,
+    TREND_SENSORS,
+)
+from .core import SOURCES, SOURCES_LISTS
+
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        **{
+            vol.Optional(src): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain=SENSOR, multiple=src in SOURCES_LISTS
+                )
+            )
+            for src in SOURCES
+        },
+        vol.Optional(CONF_SENSORS): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=[
+                    selector.SelectOptionDict(value=key, label=name)
+                    for key, name in {
+                        **SENSORS,
+                        **SOURCE_INDEX_SENSORS,
+                        **LEVEL_TIME_SENSORS,
+                        **TREND_SENSORS,
+                        **PROFILE_SENSORS,
+                    }.items()
+                ],
+                multiple=True,
+            )
+        ),
+    }
+)
+
+
+def _room_options(user_input: dict[str, Any]) -> tuple[dict[str, Any], dict[str, str]]:
+    """Return room options from form and errors of their validation."""
+    options: dict[str, Any] = {
+        CONF_SOURCES: {src: user_input[src] for src in SOURCES if user_input.get(src)}
+    }
+    if user_input.get(CONF_SENSORS):
+        options[CONF_SENSORS] = user_input[CONF_SENSORS]
+
+    try:
+        SOURCES_SCHEMA(options[CONF_SOURCES])
+    except vol.Invalid:
+        return options, {"base": "invalid_sources"}
+    return options, {}
+
+
+class IaqukConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Config flow of one room."""
+
+    VERSION = 1
+
+    async def async_step_user(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle room creation."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            object_id = slugify(user_input[CONF_NAME])
+            await self.async_set_unique_id(object_id)
+            self._abort_if_unique_id_configured()
+
+            options, errors = _room_options(user_input)
+            # Rooms from YAML use the same IDs
+            if object_id == CONF_SETTINGS or object_id in self.hass.data.get(
+                DOMAIN, {}
+            ):
+                errors[CONF_NAME] = "name_exists"
+            if not errors:
+                return self.async_create_entry(
+                    title=user_input[CONF_NAME], data={}, options=options
+                )
+
+        schema = vol.Schema({vol.Required(CONF_NAME): selector.TextSelector()}).extend(
+            OPTIONS_SCHEMA.schema
+        )
+        return self.async_show_form(
+            step_id="user",
+            data_schema=self.add_suggested_values_to_schema(schema, user_input or {}),
+            errors=errors,
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,  # noqa: ARG004
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return IaqukOptionsFlow()
+
+
+class IaqukOptionsFlow(config_entries.OptionsFlow):
+    """Options flow to change sources and sensors of room."""
+
+    if not hasattr(config_entries.OptionsFlow, "config_entry"):  # HA < 2024.11
+
+        @property
+        def config_entry(self) -> config_entries.ConfigEntry:
+            """Return config entry of the flow."""
+            return self.hass.config_entries.async_get_entry(self.handler)
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            options, errors = _room_options(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=options)
+
+        current = self.config_entry.options
+        suggested = user_input or {
+            **current[CONF_SOURCES],
+            CONF_SENSORS: current.get(CONF_SENSORS, []),
+        }
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(OPTIONS_SCHEMA, suggested),
+            errors=errors,
+        )
@@ -4,6 +4,65 @@ from typing import Final
 
 from homeassistant.components.sensor import DOMAIN as SENSOR
 
+# Sources, levels and units are defined in HA-free core module
+from .core import (
+    CONF_CO,
+    CONF_CO2,
+    CONF_HCHO,
+    CONF_HUMIDITY,
+    CONF_NO2,
+    CONF_PM,
+    CONF_RADON,
+    CONF_TEMPERATURE,
+    CONF_TVOC,
+    CONF_VOC_INDEX,
+    LEVEL_EXCELLENT,
+    LEVEL_FAIR,
+    LEVEL_GOOD,
+    LEVEL_INADEQUATE,
+    LEVEL_POOR,
+    LEVELS,
+    MWEIGTH_CO,
+    MWEIGTH_CO2,
+    MWEIGTH_HCHO,
+    MWEIGTH_NO2,
+    MWEIGTH_TVOC,
+    PROFILE_EPA,
+    PROFILE_RESET,
+    UNIT_MGM3,
+    UNIT_PPB,
+    UNIT_PPM,
+    UNIT_UGM3,
+)
+
+# Names of the core module which are re-exported by this module
+__all__ = [
+    "CONF_CO",
+    "CONF_CO2",
+    "CONF_HCHO",
+    "CONF_HUMIDITY",
+    "CONF_NO2",
+    "CONF_PM",
+    "CONF_RADON",
+    "CONF_TEMPERATURE",
+    "CONF_TVOC",
+    "CONF_VOC_INDEX",
+    "LEVEL_EXCELLENT",
+    "LEVEL_FAIR",
+    "LEVEL_GOOD",
+    "LEVEL_INADEQUATE",
+    "LEVEL_POOR",
+    "MWEIGTH_CO",
+    "MWEIGTH_CO2",
+    "MWEIGTH_HCHO",
+    "MWEIGTH_NO2",
+    "MWEIGTH_TVOC",
+    "UNIT_MGM3",
+    "UNIT_PPB",
+    "UNIT_PPM",
+    "UNIT_UGM3",
+]
+
 # Base component constants
 NAME: Final = "Indoor Air Quality UK Index"
 DOMAIN: Final = "iaquk"
@@ -42,64 +101,118 @@ SENSORS: Final = {
     SENSOR_LEVEL: "Indoor Air Quality Level",
 }
 
+# Periods of time-in-level sensors
+PERIOD_DAILY: Final = "daily"
+PERIOD_WEEKLY: Final = "weekly"
+PERIODS: Final = {PERIOD_DAILY: "Today", PERIOD_WEEKLY: "This Week"}
+
+SENSOR_LEVEL_TIME_TPL: Final = "{}_time_{}"
+
+LEVEL_TIME_SENSORS: Final = {
+    SENSOR_LEVEL_TIME_TPL.format(level.lower(), period): f"Time {level} {name}"
+    for level in LEVELS
+    for period, name in PERIODS.items()
+}
+
 # Configuration and options
 CONF_SOURCES: Final = "sources"
-CONF_TEMPERATURE: Final = "temperature"
-CONF_HUMIDITY: Final = "humidity"
-CONF_CO2: Final = "co2"
-CONF_TVOC: Final = "tvoc"
-CONF_VOC_INDEX: Final = "voc_index"
-CONF_PM: Final = "pm"
-CONF_NO2: Final = "no2"
-CONF_CO: Final = "co"
-CONF_HCHO: Final = "hcho"  # Formaldehyde
-CONF_RADON: Final = "radon"
+CONF_AREA: Final = "area"
+CONF_AREAS: Final = "areas"
+CONF_DESPIKE: Final = "despike"
+CONF_HYSTERESIS: Final = "hysteresis"
+CONF_MIN_WRITE_INTERVAL: Final = "min_write_interval"
+CONF_SIGNIFICANT_CHANGE: Final = "significant_change"
+CONF_MAX_AGE: Final = "max_age"
+CONF_TREND: Final = "trend"
+CONF_QUANTILE_DAYS: Final = "quantile_days"
+CONF_SETTINGS: Final = "settings"  # Integration-wide options, not a room
+CONF_TICK: Final = "tick"
+CONF_EXPORT: Final = "export"
+CONF_FORMAT: Final = "format"
+CONF_MAX_SIZE: Final = "max_size"
+CONF_KEEP: Final = "keep"
+
+# Formats of exported files
+FORMAT_JSONL: Final = "jsonl"
+FORMAT_ARROW: Final = "arrow"
+
+# Data
+DATA_SCHEDULER: Final = f"{DOMAIN}_scheduler"
+DATA_TIMER_WHEEL: Final = f"{DOMAIN}_timer_wheel"
+DATA_LEVEL_TIME_STORE: Final = f"{DOMAIN}_level_time_store"
+DATA_HISTOGRAM_STORE: Final = f"{DOMAIN}_histogram_store"
+DATA_EXPORTER: Final = f"{DOMAIN}_exporter"
+DATA_AREA_INDEX: Final = f"{DOMAIN}_area_index"
+
+# Storage
+STORAGE_LEVEL_TIME: Final = f"{DOMAIN}.level_time"
+STORAGE_HISTOGRAM: Final = f"{DOMAIN}.histogram"
+
+# Services
+SERVICE_CALCULATE: Final = "calculate"
+SERVICE_QUANTILES: Final = "quantiles"
+
+# Repairs
+ISSUE_SOURCE_FAILING: Final = "source_failing"
+
+# Signals
+SIGNAL_ROOMS_CHANGED: Final = f"{DOMAIN}_rooms_changed"
+
+# Events
+EVENT_LEVEL_CHANGED: Final = f"{DOMAIN}_level_changed"
 
 # Attributes
+ATTR_ROOM: Final = "room"
+ATTR_OLD_LEVEL: Final = "old_level"
+ATTR_NEW_LEVEL: Final = "new_level"
+ATTR_INDEX: Final = "index"
+ATTR_LEVEL: Final = "level"
+ATTR_INDEXES: Final = "indexes"
+ATTR_INTERVAL: Final = "interval"
+ATTR_SOURCE: Final = "source"
+ATTR_SAMPLES: Final = "samples"
+ATTR_RESULTS: Final = "results"
+ATTR_ROOMS: Final = "rooms"
+ATTR_QUANTILES: Final = "quantiles"
+ATTR_DAYS: Final = "days"
+ATTR_MERGED: Final = "merged"
+ATTR_VALUE: Final = "value"
+ATTR_UNIT: Final = "unit"
 ATTR_SOURCES_SET: Final = "sources_set"
 ATTR_SOURCES_USED: Final = "sources_used"
+ATTR_SOURCE_HEALTH: Final = "source_health"
 ATTR_SOURCE_INDEX_TPL: Final = "{}_index"
+ATTR_SOURCE_RAW_TPL: Final = "{}_raw"
+ATTR_NEXT_BOUNDARY: Final = "next_boundary"
+ATTR_MINUTES_TO_BOUNDARY: Final = "minutes_to_boundary"
 
+SENSOR_TREND_TPL: Final = "{}_trend"
 
-LEVEL_EXCELLENT: Final = "Excellent"
-LEVEL_GOOD: Final = "Good"
-LEVEL_FAIR: Final = "Fair"
-LEVEL_POOR: Final = "Poor"
-LEVEL_INADEQUATE: Final = "Inadequate"
-
-UNIT_PPM: Final = {
-    "ppm": 1,  # Target unit -- conversion rate will be ignored
-    "ppb": 0.001,
-}
-UNIT_PPB: Final = {
-    "ppb": 1,  # Target unit -- conversion rate will be ignored
-    "ppm": 1000,
+SOURCE_INDEX_SENSORS: Final = {
+    ATTR_SOURCE_INDEX_TPL.format(CONF_TEMPERATURE): "Temperature Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_HUMIDITY): "Humidity Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_CO2): "CO2 Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_CO): "CO Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_NO2): "NO2 Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_TVOC): "tVOC Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_VOC_INDEX): "VOC Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_HCHO): "HCHO Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_RADON): "Radon Index",
+    ATTR_SOURCE_INDEX_TPL.format(CONF_PM): "PM Index",
 }
-UNIT_UGM3: Final = {
-    "µg/m³": 1,  # Target unit -- conversion rate will be ignored
-    "µg/m3": 1,
-    "µg/m^3": 1,
-    "ug/m³": 1,
-    "ug/m3": 1,
-    "ug/m^3": 1,
-    "mg/m³": 1000,
-    "mg/m3": 1000,
-    "mg/m^3": 1000,
-}
-UNIT_MGM3: Final = {
-    "mg/m³": 1,  # Target unit -- conversion rate will be ignored
-    "mg/m3": 1,
-    "mg/m^3": 1,
-    "µg/m³": 0.001,
-    "µg/m3": 0.001,
-    "µg/m^3": 0.001,
-    "ug/m³": 0.001,
-    "ug/m3": 0.001,
-    "ug/m^3": 0.001,
+
+TREND_SENSORS: Final = {
+    SENSOR_TREND_TPL.format(CONF_CO2): "CO2 Trend",
+    SENSOR_TREND_TPL.format(CONF_TVOC): "tVOC Trend",
+    SENSOR_TREND_TPL.format(CONF_PM): "PM Trend",
 }
 
-MWEIGTH_TVOC: Final = 78.9516  # g/mol
-MWEIGTH_HCHO: Final = 30.0260  # g/mol
-MWEIGTH_CO: Final = 28.0100  # g/mol
-MWEIGTH_NO2: Final = 46.0100  # g/mol
-MWEIGTH_CO2: Final = 44.0100  # g/mol
+SENSOR_PROFILE_INDEX_TPL: Final = "{}_index"
+SENSOR_PROFILE_LEVEL_TPL: Final = "{}_level"
+
+PROFILE_SENSORS: Final = {
+    SENSOR_PROFILE_INDEX_TPL.format(PROFILE_RESET): "RESET Index",
+    SENSOR_PROFILE_LEVEL_TPL.format(PROFILE_RESET): "RESET Level",
+    SENSOR_PROFILE_INDEX_TPL.format(PROFILE_EPA): "EPA Index",
+    SENSOR_PROFILE_LEVEL_TPL.format(PROFILE_EPA): "EPA Level",
+}
@@ -0,0 +1,477 @@
+"""
+Core of IAQ UK index calculation.
+
+This module owns sources thresholds, units conversion and index calculation.
+It depends on standard library only and has no imports from the integration
+package, so offline tools can load it without Home Assistant, e.g.:
+
+    sys.path.insert(0, "custom_components/iaquk")
+    import core
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Collection, Mapping
+from typing import Any, Final, NamedTuple
+
+# Sources
+CONF_TEMPERATURE: Final = "temperature"
+CONF_HUMIDITY: Final = "humidity"
+CONF_CO2: Final = "co2"
+CONF_TVOC: Final = "tvoc"
+CONF_VOC_INDEX: Final = "voc_index"
+CONF_PM: Final = "pm"
+CONF_NO2: Final = "no2"
+CONF_CO: Final = "co"
+CONF_HCHO: Final = "hcho"  # Formaldehyde
+CONF_RADON: Final = "radon"
+
+SOURCES: Final = [
+    CONF_TEMPERATURE,
+    CONF_HUMIDITY,
+    CONF_CO2,
+    CONF_CO,
+    CONF_NO2,
+    CONF_TVOC,
+    CONF_VOC_INDEX,
+    CONF_HCHO,
+    CONF_RADON,
+    CONF_PM,
+]
+
+# Sources which values are summed up from several entities
+SOURCES_LISTS: Final = [CONF_PM]
+
+LEVEL_EXCELLENT: Final = "Excellent"
+LEVEL_GOOD: Final = "Good"
+LEVEL_FAIR: Final = "Fair"
+LEVEL_POOR: Final = "Poor"
+LEVEL_INADEQUATE: Final = "Inadequate"
+LEVELS: Final = [LEVEL_EXCELLENT, LEVEL_GOOD, LEVEL_FAIR, LEVEL_POOR, LEVEL_INADEQUATE]
+
+UNIT_CELSIUS: Final = "°C"
+UNIT_FAHRENHEIT: Final = "°F"
+UNIT_PERCENTAGE: Final = "%"
+UNIT_BQM3: Final = "Bq/m3"
+
+UNIT_PPM: Final = {
+    "ppm": 1,  # Target unit -- conversion rate will be ignored
+    "ppb": 0.001,
+}
+UNIT_PPB: Final = {
+    "ppb": 1,  # Target unit -- conversion rate will be ignored
+    "ppm": 1000,
+}
+UNIT_UGM3: Final = {
+    "µg/m³": 1,  # Target unit -- conversion rate will be ignored
+    "µg/m3": 1,
+    "µg/m^3": 1,
+    "ug/m³": 1,
+    "ug/m3": 1,
+    "ug/m^3": 1,
+    "mg/m³": 1000,
+    "mg/m3": 1000,
+    "mg/m^3": 1000,
+}
+UNIT_MGM3: Final = {
+    "mg/m³": 1,  # Target unit -- conversion rate will be ignored
+    "mg/m3": 1,
+    "mg/m^3": 1,
+    "µg/m³": 0.001,
+    "µg/m3": 0.001,
+    "µg/m^3": 0.001,
+    "ug/m³": 0.001,
+    "ug/m3": 0.001,
+    "ug/m^3": 0.001,
+}
+
+UNIT_NOT_RECOGNIZED_TEMPLATE: Final = "{} is not a recognized {} unit."
+
+MWEIGTH_TVOC: Final = 78.9516  # g/mol
+MWEIGTH_HCHO: Final = 30.0260  # g/mol
+MWEIGTH_CO: Final = 28.0100  # g/mol
+MWEIGTH_NO2: Final = 46.0100  # g/mol
+MWEIGTH_CO2: Final = 44.0100  # g/mol
+
+# Target units (the first one of list) and molecular weight of each source
+SOURCES_UNITS: Final = {
+    CONF_TEMPERATURE: (None, None),
+    CONF_HUMIDITY: (UNIT_PERCENTAGE, None),
+    CONF_CO2: (UNIT_PPM, MWEIGTH_CO2),
+    CONF_CO: (UNIT_MGM3, MWEIGTH_CO),
+    CONF_NO2: (UNIT_MGM3, MWEIGTH_NO2),
+    CONF_TVOC: (UNIT_MGM3, MWEIGTH_TVOC),
+    CONF_VOC_INDEX: (None, None),
+    CONF_HCHO: (UNIT_UGM3, MWEIGTH_HCHO),
+    CONF_RADON: (UNIT_BQM3, None),
+    CONF_PM: (UNIT_UGM3, None),
+}
+
+
+class Score(NamedTuple):
+    """IAQ index calculation result."""
+
+    index: int | None
+    level: str | None
+    indexes: dict[str, int]
+
+
+def base_unit(src: str) -> str | None:
+    """Return unit in which values of source are evaluated."""
+    if src == CONF_TEMPERATURE:
+        return UNIT_CELSIUS
+    target_unit = SOURCES_UNITS[src][0]
+    if isinstance(target_unit, dict):
+        return next(iter(target_unit))
+    return target_unit
+
+
+def convert_value(
+    value: str | float,
+    unit: str | None,
+    entity_unit: str | dict[str, float] | None = None,
+    mweight: float | None = None,
+) -> float | None:
+    """Convert value to number in target units. Return None for wrong units."""
+    target_unit = None
+    if entity_unit is not None and not isinstance(entity_unit, dict):
+        entity_unit = {entity_unit: 1}
+
+    if entity_unit is not None:
+        target_unit = next(iter(entity_unit))
+        if unit not in entity_unit:
+            if mweight is None:
+                return None
+            entity_unit = entity_unit.copy()
+            if "ppb" in (unit, target_unit):
+                mweight /= 1000
+            if "µg/m³" in (unit, target_unit):
+                mweight *= 1000
+            if unit in {"ppm", "ppb"}:
+                entity_unit[unit] = mweight / 24.45
+            else:
+                entity_unit[unit] = 24.45 / mweight
+
+    value = float(value)
+
+    if entity_unit is not None and unit != target_unit:
+        value *= entity_unit[unit]
+    return value
+
+
+def temperature_celsius(value: float, unit: str | None) -> float:
+    """Convert temperature value to °C."""
+    if unit not in (UNIT_CELSIUS, UNIT_FAHRENHEIT):
+        raise ValueError(UNIT_NOT_RECOGNIZED_TEMPLATE.format(unit, CONF_TEMPERATURE))
+
+    if unit != UNIT_CELSIUS:
+        value = (value - 32.0) / 1.8
+    return value
+
+
+def convert_source(src: str, value: str | float, unit: str | None) -> float | None:
+    """Convert source value to its base units. Return None for wrong units."""
+    if src == CONF_TEMPERATURE:
+        if unit not in (UNIT_CELSIUS, UNIT_FAHRENHEIT):
+            return None
+        return temperature_celsius(float(value), unit)
+
+    entity_unit, mweight = SOURCES_UNITS[src]
+    return convert_value(value, unit, entity_unit, mweight)
+
+
+def apply_hysteresis(
+    value: float,
+    band: Callable[[float], Any],
+    previous: Any,
+    margin: float | None,
+) -> Any:
+    """
+    Return band for value taking into account hysteresis margin.
+
+    The previous band is kept until the value has crossed its boundary
+    by more than margin.
+    """
+    current = band(value)
+    if (
+        margin
+        and previous is not None
+        and current != previous
+        and previous in (band(value - margin), band(value + margin))
+    ):
+        return previous
+    return current
+
+
+class BandTable(NamedTuple):
+    """
+    Table of bands of values.
+
+    Value falls into the band of the first edge it is below (or at, if the edge
+    is closed), or into the last band if it is above all edges. Tables are
+    called like functions, so they are used in place of if-chains.
+    """
+
+    edges: tuple[float, ...]
+    closed: tuple[bool, ...]
+    results: tuple[Any, ...]
+
+    def __call__(self, value: float) -> Any:
+        """Return result of the band of value."""
+        if math.isnan(value):
+            # As in comparison chains, NaN is above all edges
+            return self.results[-1]
+        edges = self.edges
+        pos = bisect_left(edges, value)
+        while pos < len(edges) and edges[pos] == value and not self.closed[pos]:
+            pos += 1
+        return self.results[pos]
+
+
+def band_table(*steps: tuple[str, float, Any], above: Any) -> BandTable:
+    """
+    Build table of bands from steps like ("<", 600, 5) or ("<=", 800, 4).
+
+    Steps are sorted by their edges, the result of values above all edges
+    is given separately.
+    """
+    return BandTable(
+        tuple(edge for _, edge, _ in steps),
+        tuple(op == "<=" for op, _, _ in steps),
+        (*(result for _, _, result in steps), above),
+    )
+
+
+class Profile(NamedTuple):
+    """
+    Table-defined scoring standard.
+
+    Sources get points from their band tables, the higher the better. Index
+    is the mean of points of sources (or the points of the worst source)
+    scaled from best points to scale, and level is given by its own table.
+    """
+
+    bands: Mapping[str, BandTable]
+    levels: BandTable
+    best: int
+    scale: int
+    worst: bool = False
+
+    def index(self, points: Collection[int]) -> int | None:
+        """Calculate index from points of sources."""
+        if not points:
+            return None
+        if self.worst:
+            return int((self.scale * min(points)) / self.best)
+        return int((self.scale * sum(points)) / (self.best * len(points)))
+
+
+# Transform IAQ index to human readable text according
+# to Indoor Air Quality UK: http://www.iaquk.org.uk/
+LEVEL_BANDS: Final = band_table(
+    ("<=", 25, LEVEL_INADEQUATE),
+    ("<=", 38, LEVEL_POOR),
+    ("<=", 51, LEVEL_FAIR),
+    ("<=", 60, LEVEL_GOOD),
+    above=LEVEL_EXCELLENT,
+)
+
+# IAQ points of sources' values in base units
+BANDS: Final[dict[str, BandTable]] = {
+    CONF_TEMPERATURE: band_table(  # °C
+        ("<=", 14, 1),
+        ("<=", 15, 2),
+        ("<=", 16, 3),
+        ("<", 18, 4),
+        ("<=", 21, 5),
+        ("<", 23, 4),
+        ("<", 24, 3),
+        ("<", 25, 2),
+        above=1,
+    ),
+    CONF_HUMIDITY: band_table(  # %
+        ("<", 10, 1),
+        ("<", 20, 2),
+        ("<", 30, 3),
+        ("<", 40, 4),
+        ("<=", 60, 5),
+        ("<=", 70, 4),
+        ("<=", 80, 3),
+        ("<=", 90, 2),
+        above=1,
+    ),
+    CONF_CO2: band_table(  # ppm
+        ("<", 600, 5),
+        ("<=", 800, 4),
+        ("<=", 1500, 3),
+        ("<=", 1800, 2),
+        above=1,
+    ),
+    CONF_CO: band_table(  # mg/m³
+        ("<", 0, 3),
+        ("<=", 0, 5),
+        ("<=", 7, 3),
+        above=1,
+    ),
+    CONF_NO2: band_table(  # mg/m³
+        ("<", 0.2, 5),
+        ("<=", 0.4, 3),
+        above=1,
+    ),
+    CONF_TVOC: band_table(  # mg/m³
+        ("<", 0.1, 5),
+        ("<=", 0.3, 4),
+        ("<=", 0.5, 3),
+        ("<=", 1.0, 2),
+        above=1,
+    ),
+    # Especially for SGP40 and SGP41 gas sensors (VOC index 0-500):
+    #     0-50    — Good
+    #     51-100  — Moderate
+    #     101-150 — Unhealthy for sensitive peoples
+    #     151-200 — Unhealthy
+    #     201-300 — Very unhealthy
+    #     301-500 — Hazardous
+    CONF_VOC_INDEX: band_table(
+        ("<=", 50, 5),
+        ("<=", 115, 4),
+        ("<=", 180, 3),
+        ("<=", 260, 2),
+        above=1,
+    ),
+    CONF_HCHO: band_table(  # µg/m³
+        ("<", 20, 5),
+        ("<=", 50, 4),
+        ("<=", 100, 3),
+        ("<=", 200, 2),
+        above=1,
+    ),
+    CONF_RADON: band_table(  # Bq/m3
+        ("<", 0, 3),
+        ("<=", 0, 5),
+        ("<", 20, 3),
+        ("<=", 100, 2),
+        above=1,
+    ),
+    CONF_PM: band_table(  # µg/m³
+        ("<=", 23, 5),
+        ("<=", 41, 4),
+        ("<=", 53, 3),
+        ("<=", 64, 2),
+        above=1,
+    ),
+}
+
+IAQUK_PROFILE: Final = Profile(BANDS, LEVEL_BANDS, best=5, scale=65)
+
+# Additional profiles, scored from the same values of sources
+PROFILE_RESET: Final = "reset"
+PROFILE_EPA: Final = "epa"
+
+PROFILES: Final[dict[str, Profile]] = {
+    # Limits of high performance and acceptable air, similar to RESET Air
+    PROFILE_RESET: Profile(
+        {
+            CONF_CO2: band_table(("<=", 600, 3), ("<=", 1000, 2), above=1),  # ppm
+            CONF_TVOC: band_table(("<=", 0.4, 3), ("<=", 0.5, 2), above=1),  # mg/m³
+            CONF_PM: band_table(("<=", 12, 3), ("<=", 35, 2), above=1),  # µg/m³
+        },
+        band_table(
+            ("<=", 1, "Not acceptable"),
+            ("<=", 2, "Acceptable"),
+            above="High performance",
+        ),
+        best=3,
+        scale=3,
+        worst=True,
+    ),
+    # Categories of US EPA Air Quality Index by the worst pollutant
+    PROFILE_EPA: Profile(
+        {
+            CONF_CO: band_table(  # mg/m³ (4.4, 9.4, 12.4, 15.4, 30.4 ppm)
+                ("<=", 5.04, 6),
+                ("<=", 10.77, 5),
+                ("<=", 14.21, 4),
+                ("<=", 17.64, 3),
+                ("<=", 34.83, 2),
+                above=1,
+            ),
+            CONF_NO2: band_table(  # mg/m³ (53, 100, 360, 649, 1249 ppb)
+                ("<=", 0.1, 6),
+                ("<=", 0.188, 5),
+                ("<=", 0.677, 4),
+                ("<=", 1.221, 3),
+                ("<=", 2.35, 2),
+                above=1,
+            ),
+            CONF_PM: band_table(  # µg/m³
+                ("<=", 9.0, 6),
+                ("<=", 35.4, 5),
+                ("<=", 55.4, 4),
+                ("<=", 125.4, 3),
+                ("<=", 225.4, 2),
+                above=1,
+            ),
+        },
+        band_table(
+            ("<=", 1, "Hazardous"),
+            ("<=", 2, "Very unhealthy"),
+            ("<=", 3, "Unhealthy"),
+            ("<=", 4, "Unhealthy for sensitive groups"),
+            ("<=", 5, "Moderate"),
+            above="Good",
+        ),
+        best=6,
+        scale=6,
+        worst=True,
+    ),
+}
+
+# Values at which bands of sources with trends change
+BOUNDARIES: Final[dict[str, tuple[float, ...]]] = {
+    src: BANDS[src].edges for src in (CONF_CO2, CONF_TVOC, CONF_PM)
+}
+
+
+def next_boundary(src: str, value: float, slope: float) -> float | None:
+    """
+    Return the next boundary of source bands in direction of the trend.
+
+    Edges are classified as in BandTable: value at a closed edge is still
+    in the lower band, so rising it changes band right after the edge, and
+    value at an open edge is already in the upper band.
+    """
+    table = BANDS[src]
+    edges, closed = table.edges, table.closed
+    if slope > 0:
+        pos = bisect_left(edges, value)
+        while pos < len(edges) and edges[pos] == value and not closed[pos]:
+            pos += 1
+        return edges[pos] if pos < len(edges) else None
+    if slope < 0:
+        pos = bisect_right(edges, value)
+        while pos > 0 and edges[pos - 1] == value and closed[pos - 1]:
+            pos -= 1
+        return edges[pos - 1] if pos > 0 else None
+    return None
+
+
+def iaq_index(points: Collection[int]) -> int | None:
+    """Calculate IAQ index from IAQ points of sources."""
+    if not points:
+        return None
+    return int((65 * sum(points)) / (5 * len(points)))
+
+
+def score(
+    values: Mapping[str, float | None], profile: Profile = IAQUK_PROFILE
+) -> Score:
+    """Calculate index and level of profile for sources' values in base units."""
+    bands = profile.bands
+    indexes = {
+        src: bands[src](value)
+        for src, value in values.items()
+        if value is not None and src in bands
+    }
+    index = profile.index(indexes.values())
+    return Score(index, profile.levels(index) if indexes else None, indexes)
@@ -0,0 +1,26 @@
+"""Diagnostics support for IAQ UK."""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import ATTR_ROOMS, ATTR_SOURCE_HEALTH, DOMAIN
+from .websocket import room_state
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics of all rooms, including rooms from YAML."""
+    return {
+        "entry": {"title": entry.title, "options": dict(entry.options)},
+        ATTR_ROOMS: {
+            room: {
+                **room_state(controller),
+                ATTR_SOURCE_HEALTH: controller.source_health,
+            }
+            for room, controller in hass.data.get(DOMAIN, {}).items()
+        },
+    }
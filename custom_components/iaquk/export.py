@@ -0,0 +1,249 @@
+"""Periodic export of snapshots of all rooms to local files."""
+
+import json
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Final
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_INDEX,
+    ATTR_LEVEL,
+    ATTR_ROOM,
+    ATTR_SOURCE_INDEX_TPL,
+    ATTR_SOURCE_RAW_TPL,
+    CONF_DESPIKE,
+    CONF_HYSTERESIS,
+    FORMAT_ARROW,
+    FORMAT_JSONL,
+)
+from .core import SOURCES
+
+if TYPE_CHECKING:
+    from . import IaqukController
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+ATTR_TIME: Final = "time"
+
+# Batches waiting for the writer thread; new batches are dropped when it is full
+QUEUE_SIZE: Final = 16
+
+EXTENSIONS: Final = {FORMAT_JSONL: "jsonl", FORMAT_ARROW: "arrow"}
+
+# Options of rooms which change levels, exported for offline replay
+OPTIONS: Final = (CONF_DESPIKE, CONF_HYSTERESIS)
+
+
+def snapshot_rows(
+    controllers: dict[str, "IaqukController"], now: datetime
+) -> list[dict[str, Any]]:
+    """Return flat rows with the current state of all rooms."""
+    time = now.isoformat()
+    rows = []
+    for room, controller in controllers.items():
+        row = {
+            ATTR_TIME: time,
+            ATTR_ROOM: room,
+            ATTR_INDEX: controller.iaq_index,
+            ATTR_LEVEL: controller.iaq_level,
+        }
+        indexes = controller.indexes
+        values = controller.source_values
+        raw = controller.raw_values
+        for src in SOURCES:
+            row[ATTR_SOURCE_INDEX_TPL.format(src)] = indexes.get(src)
+            row[src] = values.get(src)
+            row[ATTR_SOURCE_RAW_TPL.format(src)] = raw.get(src)
+        row[CONF_DESPIKE] = dict(controller.despike) or None
+        row[CONF_HYSTERESIS] = dict(controller.hysteresis) or None
+        rows.append(row)
+    return rows
+
+
+class SnapshotWriter:
+    """
+    Writer of snapshots to rotating files.
+
+    A new file is started on every start and when the current one exceeds
+    max size; only the newest files are kept. Used only from writer thread.
+    """
+
+    def __init__(self, directory: Path, fmt: str, max_bytes: int, keep: int) -> None:
+        """Initialize writer."""
+        self._directory = directory
+        self._format = fmt
+        self._max_bytes = max_bytes
+        self._keep = keep
+        self._file: IO | None = None
+        self._arrow: Any = None
+        self._schema: Any = None
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        """Append rows to the current file."""
+        if self._file is None:
+            self._open()
+
+        if self._format == FORMAT_ARROW:
+            import pyarrow as pa  # noqa: PLC0415
+
+            # Map columns are built from pairs
+            rows = [
+                {
+                    **row,
+                    **{
+                        key: list(row[key].items())
+                        for key in OPTIONS
+                        if row.get(key) is not None
+                    },
+                }
+                for row in rows
+            ]
+            self._arrow.write_batch(pa.RecordBatch.from_pylist(rows, self._schema))
+        else:
+            self._file.writelines(
+                json.dumps(row, separators=(",", ":")) + "\n" for row in rows
+            )
+        self._file.flush()
+
+        if self._file.tell() >= self._max_bytes:
+            self.close()
+
+    def close(self) -> None:
+        """Close the current file."""
+        if self._arrow is not None:
+            self._arrow.close()
+            self._arrow = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        """Start a new file and remove the oldest ones."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        extension = EXTENSIONS[self._format]
+        name = f"iaquk-{dt_util.utcnow():%Y%m%d-%H%M%S-%f}.{extension}"
+        if self._format == FORMAT_ARROW:
+            import pyarrow as pa  # noqa: PLC0415
+
+            self._schema = pa.schema(
+                [
+                    (ATTR_TIME, pa.string()),
+                    (ATTR_ROOM, pa.string()),
+                    (ATTR_INDEX, pa.int8()),
+                    (ATTR_LEVEL, pa.string()),
+                    *(
+                        field
+                        for src in SOURCES
+                        for field in (
+                            (ATTR_SOURCE_INDEX_TPL.format(src), pa.int8()),
+                            (src, pa.float64()),
+                            (ATTR_SOURCE_RAW_TPL.format(src), pa.list_(pa.float64())),
+                        )
+                    ),
+                    *((key, pa.map_(pa.string(), pa.float64())) for key in OPTIONS),
+                ]
+            )
+            self._file = (self._directory / name).open("wb")
+            self._arrow = pa.ipc.new_stream(self._file, self._schema)
+        else:
+            self._file = (self._directory / name).open("w", encoding="utf-8")
+
+        # Names start with time, so the oldest files are the first ones
+        files = sorted(self._directory.glob(f"iaquk-*.{extension}"))
+        for path in files[: -self._keep]:
+            path.unlink(missing_ok=True)
+
+
+class SnapshotExporter:
+    """
+    Periodic export of snapshots of all rooms.
+
+    Snapshots are taken in the event loop once per interval and are passed
+    through a bounded queue to a writer thread, so file operations never block
+    the event loop or updates of rooms.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        writer: SnapshotWriter,
+        interval: timedelta,
+        controllers: Callable[[], dict[str, "IaqukController"]],
+    ) -> None:
+        """Initialize exporter."""
+        self.hass = hass
+        self._writer = writer
+        self._interval = interval
+        self._controllers = controllers
+        self._queue: queue.Queue[list[dict[str, Any]] | None] = queue.Queue(QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._cancel: CALLBACK_TYPE | None = None
+        self._dropped = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start writer thread and periodic snapshots."""
+        self._thread = threading.Thread(
+            target=self._run, name="iaquk_export", daemon=True
+        )
+        self._thread.start()
+        self._cancel = async_track_time_interval(
+            self.hass, self._async_snapshot, self._interval
+        )
+
+    async def async_shutdown(self, *_: object) -> None:
+        """Stop snapshots and wait until all queued batches are written."""
+        if self._cancel is not None:
+            self._cancel()
+            self._cancel = None
+        if self._thread is not None:
+            await self.hass.async_add_executor_job(self._stop)
+
+    @callback
+    def _async_snapshot(self, now: datetime) -> None:
+        """Queue snapshot of all rooms."""
+        rows = snapshot_rows(self._controllers(), now)
+        if not rows:
+            return
+
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped == 1:
+                _LOGGER.warning("Export is too slow, snapshots are dropped")
+        else:
+            self._dropped = 0
+
+    def _stop(self) -> None:
+        """Stop writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        """Write queued batches until stopped."""
+        while True:
+            rows = self._queue.get()
+            # Batches queued meanwhile are written at once
+            batches = [rows]
+            while rows is not None and not self._queue.empty():
+                rows = self._queue.get_nowait()
+                batches.append(rows)
+
+            for batch in batches:
+                if batch is None:
+                    self._writer.close()
+                    return
+                try:
+                    self._writer.write(batch)
+                except Exception:
+                    _LOGGER.exception("Can't export snapshot")
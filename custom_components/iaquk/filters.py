@@ -0,0 +1,166 @@
+"""Sliding window filters for noisy sources and trends of sources."""
+
+import math
+from collections import deque
+from heapq import heapify, heappop, heappush
+
+
+class SlidingMedian:
+    """
+    Median of the last N samples.
+
+    Samples are kept in two heaps (lower and upper half of the window) with
+    lazy deletion of expired samples. Expired samples deep in the heaps are
+    dropped by rebuilding the heaps when they grow over twice the window, so
+    memory is bounded and every new sample costs amortized O(log N).
+    """
+
+    def __init__(self, window: int) -> None:
+        """Initialize filter."""
+        self._window = window
+        self._samples: deque[float] = deque()
+        self._low: list[float] = []  # Max-heap of the lower half (negated values)
+        self._high: list[float] = []  # Min-heap of the upper half
+        self._low_size = 0
+        self._high_size = 0
+        self._expired: dict[float, int] = {}
+
+    def __len__(self) -> int:
+        """Return number of samples in the window."""
+        return len(self._samples)
+
+    @property
+    def median(self) -> float | None:
+        """Return median of samples in the window."""
+        if not self._samples:
+            return None
+        if self._low_size > self._high_size:
+            return -self._low[0]
+        return (self._high[0] - self._low[0]) / 2
+
+    def push(self, value: float) -> float:
+        """Add new sample and return current median."""
+        if not self._low or value <= -self._low[0]:
+            heappush(self._low, -value)
+            self._low_size += 1
+        else:
+            heappush(self._high, value)
+            self._high_size += 1
+
+        self._samples.append(value)
+        if len(self._samples) > self._window:
+            self._expire(self._samples.popleft())
+
+        self._rebalance()
+        if len(self._low) + len(self._high) > 2 * self._window:
+            self._compact()
+        return self.median
+
+    def _compact(self) -> None:
+        """Rebuild heaps from the samples in the window."""
+        samples = sorted(self._samples)
+        self._low_size = (len(samples) + 1) // 2
+        self._high_size = len(samples) - self._low_size
+        self._low = [-value for value in samples[: self._low_size]]
+        self._high = samples[self._low_size :]
+        heapify(self._low)
+        heapify(self._high)
+        self._expired.clear()
+
+    def _expire(self, value: float) -> None:
+        """Mark sample as expired."""
+        self._expired[value] = self._expired.get(value, 0) + 1
+        if value <= -self._low[0]:
+            self._low_size -= 1
+            if value == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if value == self._high[0]:
+                self._prune(self._high, 1)
+
+    def _prune(self, heap: list[float], sign: int) -> None:
+        """Drop expired samples from the top of the heap."""
+        while heap:
+            value = sign * heap[0]
+            count = self._expired.get(value)
+            if not count:
+                return
+            if count == 1:
+                del self._expired[value]
+            else:
+                self._expired[value] = count - 1
+            heappop(heap)
+
+    def _rebalance(self) -> None:
+        """Keep both halves of the window balanced."""
+        if self._low_size > self._high_size + 1:
+            heappush(self._high, -heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heappush(self._low, -heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+
+class LinearTrend:
+    """
+    Exponentially weighted linear regression of samples over time.
+
+    Weights of samples decay with time constant. Weighted sums are decayed and
+    shifted to the time of the last sample on every new sample, so each sample
+    costs O(1) time and memory and the sums stay small.
+    """
+
+    __slots__ = ("_at", "_s0", "_st", "_stt", "_stv", "_sv", "_tau")
+
+    def __init__(self, time_constant: float) -> None:
+        """Initialize regression with time constant in seconds."""
+        self._tau = time_constant
+        self._at: float | None = None
+        # Weighted sums of 1, t, t², v and t·v; t is relative to the last sample
+        self._s0 = self._st = self._stt = self._sv = self._stv = 0.0
+
+    @property
+    def at(self) -> float | None:
+        """Return timestamp of the last sample."""
+        return self._at
+
+    def push(self, value: float, at: float) -> None:
+        """Add new sample taken at given timestamp."""
+        if self._at is None:
+            self._at = at
+        elapsed = at - self._at
+        if elapsed < 0:
+            return  # Samples out of order are ignored
+
+        decay = math.exp(-elapsed / self._tau)
+        # Old samples are moved back in time by elapsed: t -> t - elapsed
+        self._stt = decay * (
+            self._stt - 2 * elapsed * self._st + elapsed * elapsed * self._s0
+        )
+        self._stv = decay * (self._stv - elapsed * self._sv)
+        self._st = decay * (self._st - elapsed * self._s0)
+        # New sample is at t = 0, so it adds nothing to t-weighted sums
+        self._s0 = decay * self._s0 + 1
+        self._sv = decay * self._sv + value
+        self._at = at
+
+    @property
+    def slope(self) -> float | None:
+        """Return change of value per second or None if there are too few samples."""
+        det = self._s0 * self._stt - self._st * self._st
+        if det <= 0:
+            return None
+        return (self._s0 * self._stv - self._st * self._sv) / det
+
+    @property
+    def value(self) -> float | None:
+        """Return fitted value at the time of the last sample."""
+        slope = self.slope
+        if slope is None:
+            return None
+        return (self._sv - slope * self._st) / self._s0
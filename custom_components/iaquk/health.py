@@ -0,0 +1,70 @@
+"""Health tracking of failing sources."""
+
+from datetime import datetime, timedelta
+from typing import Any, Final
+
+# Consecutive failures after which source is skipped for a while
+QUARANTINE_THRESHOLD: Final = 3
+BACKOFF_MIN: Final = timedelta(seconds=30)
+BACKOFF_MAX: Final = timedelta(hours=1)
+
+
+class SourceHealth:
+    """
+    Consecutive failures of room's sources.
+
+    After QUARANTINE_THRESHOLD failures in a row a source is skipped,
+    and the skip time doubles with every next failure up to BACKOFF_MAX.
+    """
+
+    __slots__ = ("_errors", "_failures", "_skip_until")
+
+    def __init__(self) -> None:
+        """Initialize tracker."""
+        self._failures: dict[str, int] = {}
+        self._errors: dict[str, str] = {}
+        self._skip_until: dict[str, datetime] = {}
+
+    def __bool__(self) -> bool:
+        """Return True if any source is failing."""
+        return bool(self._failures)
+
+    def failures(self, src: str) -> int:
+        """Return number of consecutive failures of source."""
+        return self._failures.get(src, 0)
+
+    def skip_until(self, src: str, now: datetime) -> datetime | None:
+        """Return end of quarantine of source or None if it is not skipped."""
+        until = self._skip_until.get(src)
+        return until if until is not None and until > now else None
+
+    def failure(self, src: str, error: Exception, now: datetime) -> int:
+        """Record failure of source. Return number of consecutive failures."""
+        failures = self._failures[src] = self._failures.get(src, 0) + 1
+        self._errors[src] = str(error) or type(error).__name__
+
+        if failures >= QUARANTINE_THRESHOLD:
+            backoff = BACKOFF_MIN * 2 ** (failures - QUARANTINE_THRESHOLD)
+            self._skip_until[src] = now + min(backoff, BACKOFF_MAX)
+        return failures
+
+    def success(self, src: str) -> bool:
+        """Record success of source. Return True if source has recovered."""
+        self._errors.pop(src, None)
+        self._skip_until.pop(src, None)
+        return self._failures.pop(src, None) is not None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return failing sources state for diagnostics."""
+        return {
+            src: {
+                "failures": failures,
+                "error": self._errors.get(src),
+                "skip_until": (
+                    until.isoformat()
+                    if (until := self._skip_until.get(src)) is not None
+                    else None
+                ),
+            }
+            for src, failures in self._failures.items()
+        }
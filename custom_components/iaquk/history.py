@@ -0,0 +1,239 @@
+r"""
+Local cache of history of source entities for offline analyses.
+
+States of entities are extracted from the recorder database once and kept
+as columnar files: for each entity a directory with `time.f8` (POSIX
+timestamps) and `value.f8` (numbers, NaN for missing and non-numeric states)
+raw little-endian float64 arrays and `meta.json` with the unit of values.
+Further updates append only states recorded after the last cached one, and
+analyses read series through memory maps, so multi-month histories neither
+hit the database again nor have to fit in memory.
+
+Usage:
+
+    python custom_components/iaquk/history.py home-assistant_v2.db \
+        iaquk_cache sensor.kitchen_co2 sensor.kitchen_pm25
+
+Only SQLite databases of Home Assistant 2023.4 or newer are supported.
+The tool requires numpy package.
+"""
+
+import argparse
+import json
+import logging
+import math
+import re
+import sqlite3
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import closing
+from itertools import islice
+from pathlib import Path
+from typing import Final, NamedTuple
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    msg = "History cache requires numpy package"
+    raise SystemExit(msg) from exc
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+DTYPE: Final = np.dtype("<f8")
+
+FILE_TIME: Final = "time.f8"
+FILE_VALUE: Final = "value.f8"
+FILE_META: Final = "meta.json"
+
+META_UNIT: Final = "unit"
+
+# States are fetched from database in batches to keep memory use flat
+BATCH_SIZE: Final = 100_000
+
+ENTITY_ID: Final = re.compile(r"^[a-z0-9_]+\.[a-z0-9_]+$")
+
+STATES_QUERY: Final = """
+SELECT s.last_updated_ts, s.state,
+    json_extract(a.shared_attrs, '$.unit_of_measurement')
+FROM states AS s
+JOIN states_meta AS m ON s.metadata_id = m.metadata_id
+LEFT JOIN state_attributes AS a ON s.attributes_id = a.attributes_id
+WHERE m.entity_id = ? AND s.last_updated_ts > ?
+ORDER BY s.last_updated_ts
+"""
+
+
+class Series(NamedTuple):
+    """History of entity sorted by time."""
+
+    times: np.ndarray
+    values: np.ndarray
+    unit: str | None
+
+
+def state_number(state: str | None) -> float:
+    """Return number of state or NaN if it is not a number."""
+    try:
+        return float(state)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class HistoryCache:
+    """
+    Columnar cache of history of entities.
+
+    Values and times are appended separately, so after an interrupted update
+    the longer file is cut to the length of the shorter one.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """Initialize cache."""
+        self._directory = directory
+
+    def _entity_dir(self, entity_id: str) -> Path:
+        """Return directory of entity files."""
+        if not ENTITY_ID.match(entity_id):
+            msg = f"Invalid entity ID: {entity_id}"
+            raise ValueError(msg)
+        return self._directory / entity_id
+
+    def unit(self, entity_id: str) -> str | None:
+        """Return unit of cached values of entity."""
+        path = self._entity_dir(entity_id) / FILE_META
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8")).get(META_UNIT)
+
+    def series(self, entity_id: str) -> Series:
+        """Return cached history of entity as read-only memory maps."""
+        entity_dir = self._entity_dir(entity_id)
+        times = _memmap(entity_dir / FILE_TIME)
+        values = _memmap(entity_dir / FILE_VALUE)
+        size = min(len(times), len(values))
+        return Series(times[:size], values[:size], self.unit(entity_id))
+
+    def last_time(self, entity_id: str) -> float:
+        """Return time of the last cached state of entity."""
+        times = self.series(entity_id).times
+        return float(times[-1]) if len(times) else -math.inf
+
+    def append(
+        self, entity_id: str, states: Iterable[tuple[float, str | None, str | None]]
+    ) -> int:
+        """
+        Append states (time, state, unit) recorded after the cached ones.
+
+        Unit of the first cached number is kept for the entity, numbers in
+        other units are cached as missing values. Return number of new states.
+        """
+        entity_dir = self._entity_dir(entity_id)
+        entity_dir.mkdir(parents=True, exist_ok=True)
+        paths = [entity_dir / FILE_TIME, entity_dir / FILE_VALUE]
+        size = min(_length(path) for path in paths)
+        for path in paths:
+            with path.open("ab") as file:
+                file.truncate(size * DTYPE.itemsize)
+
+        last = self.last_time(entity_id)
+        unit = self.unit(entity_id)
+        has_unit = (entity_dir / FILE_META).exists()
+        count = other_units = 0
+        for rows in _batched(states, BATCH_SIZE):
+            batch = [row for row in rows if row[0] > last]
+            if not batch:
+                continue
+
+            values = np.empty(len(batch), dtype=DTYPE)
+            for pos, (_, state, state_unit) in enumerate(batch):
+                value = state_number(state)
+                if not math.isnan(value) and not has_unit:
+                    unit, has_unit = state_unit, True
+                    (entity_dir / FILE_META).write_text(
+                        json.dumps({META_UNIT: unit}), encoding="utf-8"
+                    )
+                if not math.isnan(value) and state_unit != unit:
+                    value = math.nan
+                    other_units += 1
+                values[pos] = value
+            times = np.fromiter((row[0] for row in batch), DTYPE, len(batch))
+            # Times are written last: they mark states as complete
+            with paths[1].open("ab") as file:
+                file.write(values.tobytes())
+            with paths[0].open("ab") as file:
+                file.write(times.tobytes())
+            last = float(times[-1])
+            count += len(batch)
+
+        if other_units:
+            _LOGGER.warning(
+                "%s: %d numbers not in %s are cached as missing",
+                entity_id,
+                other_units,
+                unit,
+            )
+        return count
+
+    def update(self, database: Path, entity_ids: Iterable[str]) -> int:
+        """Append states of entities recorded after the cached ones."""
+        count = 0
+        uri = f"{database.resolve().as_uri()}?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True)) as connection:
+            for entity_id in entity_ids:
+                cursor = connection.execute(
+                    STATES_QUERY, (entity_id, self.last_time(entity_id))
+                )
+                added = self.append(entity_id, _fetched(cursor))
+                _LOGGER.debug("%s: %d new states cached", entity_id, added)
+                count += added
+        return count
+
+
+def _length(path: Path) -> int:
+    """Return number of values in file."""
+    return path.stat().st_size // DTYPE.itemsize if path.exists() else 0
+
+
+def _memmap(path: Path) -> np.ndarray:
+    """Map file of values to read-only array."""
+    length = _length(path)
+    if not length:
+        return np.empty(0, dtype=DTYPE)
+    return np.memmap(path, dtype=DTYPE, mode="r", shape=length)
+
+
+def _fetched(cursor: sqlite3.Cursor) -> Iterator[tuple]:
+    """Stream rows of query result."""
+    while rows := cursor.fetchmany(BATCH_SIZE):
+        yield from rows
+
+
+def _batched(rows: Iterable, size: int) -> Iterator[list]:
+    """Split rows to batches of given size."""
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Cache history of entities from recorder database."
+    )
+    parser.add_argument("database", type=Path, help="recorder SQLite database")
+    parser.add_argument("cache", type=Path, help="cache directory")
+    parser.add_argument("entity_id", nargs="+", help="entities to cache")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run command line tool."""
+    args = parse_args(argv)
+    count = HistoryCache(args.cache).update(args.database, args.entity_id)
+    _LOGGER.info("%d new states cached", count)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
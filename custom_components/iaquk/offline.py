@@ -0,0 +1,256 @@
+r"""
+Score exported sensor data with IAQ UK rules outside of Home Assistant.
+
+Input is a wide table sorted by time: one timestamp column and one column
+per source entity. Empty cells mean "no new reading" and are filled with
+the last known value of the column, so sources sampled at different times
+are aligned by timestamp. Rows with the same timestamp are merged.
+
+Usage:
+
+    python custom_components/iaquk/offline.py export.csv -o scores.csv \
+        --map co2=sensor.co2 --unit co2=ppb --map pm=pm25 --map pm=pm10
+
+Parquet files are read with optional pyarrow package.
+"""
+
+import argparse
+import csv
+import logging
+import os
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Final, TextIO
+
+try:
+    from .core import SOURCES, SOURCES_LISTS, base_unit, convert_source, score
+except ImportError:  # Started as a script, without Home Assistant
+    from core import SOURCES, SOURCES_LISTS, base_unit, convert_source, score
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE: Final = 50_000
+DEFAULT_TIMESTAMP: Final = "timestamp"
+
+OUTPUT_INDEX: Final = "iaq_index"
+OUTPUT_LEVEL: Final = "iaq_level"
+
+# Values which clear the last known value of a column
+STATES_MISSING: Final = frozenset({"unknown", "unavailable", "none", "nan"})
+
+
+def read_csv(path: Path, timestamp: str, columns: Iterable[str]) -> Iterator[dict]:
+    """Stream rows of CSV file."""
+    keys = [timestamp, *columns]
+    with path.open(newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            yield {key: row.get(key) for key in keys}
+
+
+def read_parquet(
+    path: Path, timestamp: str, columns: Iterable[str], batch_size: int
+) -> Iterator[dict]:
+    """Stream rows of Parquet file."""
+    try:
+        import pyarrow.parquet as pq  # noqa: PLC0415
+    except ImportError as exc:
+        msg = "Reading Parquet files requires pyarrow package"
+        raise SystemExit(msg) from exc
+
+    parquet = pq.ParquetFile(path)
+    keys = [timestamp, *columns]
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=keys):
+        for row in batch.to_pylist():
+            yield {key: None if val is None else str(val) for key, val in row.items()}
+
+
+def align(rows: Iterable[dict], timestamp: str) -> Iterator[tuple[str, dict]]:
+    """Forward fill columns and merge rows of the same timestamp."""
+    last: dict[str, str | None] = {}
+    current = None
+    for row in rows:
+        moment = row.pop(timestamp)
+        if current is not None and moment != current:
+            yield current, dict(last)
+        current = moment
+        for key, val in row.items():
+            if val is None or val == "":
+                continue
+            last[key] = None if val.lower() in STATES_MISSING else val
+    if current is not None:
+        yield current, dict(last)
+
+
+def source_values(
+    columns: dict[str, str | None], mapping: dict[str, list[str]], units: dict
+) -> dict[str, float | None]:
+    """Convert columns values to sources values in base units."""
+    values: dict[str, float | None] = {}
+    for src, names in mapping.items():
+        src_values = []
+        for name in names:
+            raw = columns.get(name)
+            if raw is None:
+                continue
+            try:
+                val = convert_source(src, raw, units[src])
+            except ValueError:
+                val = None
+            if val is not None:
+                src_values.append(val)
+        if src_values:
+            values[src] = sum(src_values) if src in SOURCES_LISTS else src_values[0]
+    return values
+
+
+def score_chunk(
+    chunk: Sequence[tuple[str, dict]], mapping: dict[str, list[str]], units: dict
+) -> list[list[Any]]:
+    """Calculate IAQ index for chunk of aligned rows."""
+    sources = list(mapping)
+    result = []
+    for moment, columns in chunk:
+        res = score(source_values(columns, mapping, units))
+        result.append(
+            [moment, res.index, res.level, *(res.indexes.get(src) for src in sources)]
+        )
+    return result
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    """Split rows to chunks of given size."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def process(  # noqa: PLR0913
+    rows: Iterable[tuple[str, dict]],
+    output: TextIO,
+    mapping: dict[str, list[str]],
+    units: dict[str, str | None],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+) -> int:
+    """Score aligned rows in process pool and write results in input order."""
+    writer = csv.writer(output)
+    indexes = [f"{src}_index" for src in mapping]
+    writer.writerow([DEFAULT_TIMESTAMP, OUTPUT_INDEX, OUTPUT_LEVEL, *indexes])
+
+    workers = workers or os.cpu_count() or 1
+    # Bound number of chunks in memory: some are scored while the rest waits
+    max_pending = workers * 2
+    pending: list[Future] = []
+    count = 0
+
+    def flush(future: Future) -> None:
+        nonlocal count
+        chunk = future.result()
+        writer.writerows(chunk)
+        count += len(chunk)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunked(rows, chunk_size):
+            pending.append(executor.submit(score_chunk, chunk, mapping, units))
+            if len(pending) >= max_pending:
+                flush(pending.pop(0))
+        for future in pending:
+            flush(future)
+
+    return count
+
+
+def parse_pairs(pairs: Iterable[str], option: str) -> list[tuple[str, str]]:
+    """Parse list of SOURCE=VALUE options."""
+    result = []
+    for pair in pairs:
+        src, sep, value = pair.partition("=")
+        if not sep or src not in SOURCES:
+            msg = f"Invalid {option} value: {pair}"
+            raise SystemExit(msg)
+        result.append((src, value))
+    return result
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Score sensor exports with IAQ UK.")
+    parser.add_argument("input", type=Path, help="CSV or Parquet file")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="output CSV file (default: stdout)"
+    )
+    parser.add_argument(
+        "--timestamp", default=DEFAULT_TIMESTAMP, help="name of timestamp column"
+    )
+    parser.add_argument(
+        "--map",
+        action="append",
+        default=[],
+        metavar="SOURCE=COLUMN",
+        help="column of source values (default: columns named as sources)",
+    )
+    parser.add_argument(
+        "--unit",
+        action="append",
+        default=[],
+        metavar="SOURCE=UNIT",
+        help="unit of source values (default: base unit of source)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    return parser.parse_args(argv)
+
+
+def input_columns(path: Path) -> list[str]:
+    """Return names of input columns."""
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        return pq.ParquetFile(path).schema_arrow.names
+
+    with path.open(newline="", encoding="utf-8") as file:
+        return next(csv.reader(file), [])
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run command line tool."""
+    args = parse_args(argv)
+
+    mapping: dict[str, list[str]] = {}
+    for src, column in parse_pairs(args.map, "--map"):
+        mapping.setdefault(src, []).append(column)
+    if not mapping:
+        available = input_columns(args.input)
+        mapping = {src: [src] for src in SOURCES if src in available}
+    if not mapping:
+        msg = "No source columns found"
+        raise SystemExit(msg)
+
+    units = {src: base_unit(src) for src in mapping}
+    units.update(parse_pairs(args.unit, "--unit"))
+
+    columns = [col for cols in mapping.values() for col in cols]
+    if args.input.suffix == ".parquet":
+        rows = read_parquet(args.input, args.timestamp, columns, args.chunk_size)
+    else:
+        rows = read_csv(args.input, args.timestamp, columns)
+
+    aligned = align(rows, args.timestamp)
+    kwargs = {"chunk_size": args.chunk_size, "workers": args.workers}
+    if args.output is None:
+        count = process(aligned, sys.stdout, mapping, units, **kwargs)
+    else:
+        with args.output.open("w", newline="", encoding="utf-8") as output:
+            count = process(aligned, output, mapping, units, **kwargs)
+
+    _LOGGER.info("%d rows scored", count)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Batch updates of IAQ UK controllers."""
+
+import logging
+import math
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Final
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+if TYPE_CHECKING:
+    from . import IaqukController
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+class UpdateScheduler:
+    """
+    Integration-wide scheduler of controllers updates.
+
+    Source changes only mark controllers as dirty. Dirty controllers are updated
+    together once per event loop iteration or once per tick, so a burst of
+    events costs one update of each affected room.
+    """
+
+    def __init__(self, hass: HomeAssistant, tick: timedelta | None = None) -> None:
+        """Initialize scheduler."""
+        self.hass = hass
+        self._tick = tick
+        # Dict is used as ordered set to update rooms in order they were changed
+        self._dirty: dict[IaqukController, None] = {}
+        self._cancel: CALLBACK_TYPE | None = None
+
+    @property
+    def tick(self) -> timedelta | None:
+        """Get interval between batches."""
+        return self._tick
+
+    @callback
+    def async_schedule(self, controller: "IaqukController") -> None:
+        """Mark controller as dirty."""
+        self._dirty[controller] = None
+        if self._cancel is not None:
+            return
+
+        if self._tick is None:
+            # Task runs on the next event loop iteration and is tracked by HA
+            self._cancel = self.hass.async_create_task(self._async_next()).cancel
+        else:
+            self._cancel = async_call_later(self.hass, self._tick, self._async_tick)
+
+    @callback
+    def async_discard(self, controller: "IaqukController") -> None:
+        """Forget pending update of controller."""
+        self._dirty.pop(controller, None)
+
+    async def _async_next(self) -> None:
+        """Process dirty controllers on the next event loop iteration."""
+        self._async_process()
+
+    @callback
+    def _async_tick(self, now: datetime) -> None:  # noqa: ARG002
+        """Process dirty controllers on tick."""
+        self._async_process()
+
+    @callback
+    def _async_process(self) -> None:
+        """Update all dirty controllers in one batch."""
+        self._cancel = None
+        dirty, self._dirty = self._dirty, {}
+        _LOGGER.debug("Update %d controllers", len(dirty))
+        for controller in dirty:
+            try:
+                controller.update()
+            except Exception:
+                _LOGGER.exception("Exception occurred")
+
+    @callback
+    def async_shutdown(self, *_: object) -> None:
+        """Cancel pending batch."""
+        if self._cancel is not None:
+            self._cancel()
+            self._cancel = None
+        self._dirty.clear()
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel for deadlines of many controllers.
+
+    Deadlines are hashed to slots by tick number, so all of them are served
+    by one periodic tick which runs only while any deadline is pending.
+    Each controller has at most one deadline; rescheduling just leaves a stale
+    entry in the old slot which is dropped when that slot is served.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        action: Callable[["IaqukController"], None],
+        resolution: timedelta = timedelta(seconds=10),
+        slots: int = 64,
+    ) -> None:
+        """Initialize timer wheel."""
+        self.hass = hass
+        self._action = action
+        self._resolution = resolution
+        # Dicts are used as ordered sets of controllers
+        self._wheel: list[dict[IaqukController, None]] = [{} for _ in range(slots)]
+        # Deadline and tick which serves it for each controller
+        self._deadlines: dict[IaqukController, tuple[float, int]] = {}
+        self._tick = 0  # The last served tick
+        self._cancel: CALLBACK_TYPE | None = None
+
+    def __len__(self) -> int:
+        """Return number of pending deadlines."""
+        return len(self._deadlines)
+
+    @callback
+    def async_schedule(self, controller: "IaqukController", when: datetime) -> None:
+        """Run action for controller at given time."""
+        deadline = when.timestamp()
+        if self._deadlines.get(controller, (None,))[0] == deadline:
+            return
+
+        if self._cancel is None:
+            self._tick = self._current_tick(dt_util.utcnow())
+            self._cancel = async_track_time_interval(
+                self.hass, self._async_tick, self._resolution
+            )
+        # Deadlines in the past are served by the next tick
+        tick = max(
+            math.ceil(deadline / self._resolution.total_seconds()), self._tick + 1
+        )
+        self._deadlines[controller] = (deadline, tick)
+        self._wheel[tick % len(self._wheel)][controller] = None
+
+    @callback
+    def async_cancel(self, controller: "IaqukController") -> None:
+        """Cancel deadline of controller."""
+        self._deadlines.pop(controller, None)
+
+    def _current_tick(self, now: datetime) -> int:
+        """Return number of the last tick before given time."""
+        return math.floor(now.timestamp() / self._resolution.total_seconds())
+
+    @callback
+    def _async_tick(self, now: datetime) -> None:
+        """Serve slots of all ticks since the previous one."""
+        current = self._current_tick(now)
+        while self._tick < current:
+            self._tick += 1
+            self._async_serve(now.timestamp())
+
+        if not self._deadlines:
+            self.async_shutdown()
+
+    @callback
+    def _async_serve(self, now: float) -> None:
+        """Run actions of expired deadlines in the slot of the current tick."""
+        slot = self._tick % len(self._wheel)
+        entries, self._wheel[slot] = self._wheel[slot], {}
+        for controller in entries:
+            deadline, tick = self._deadlines.get(controller, (None, None))
+            if tick is None or tick % len(self._wheel) != slot:
+                continue  # Stale entry
+            if deadline > now:
+                # Deadline of one of the next rounds
+                self._wheel[slot][controller] = None
+                continue
+
+            del self._deadlines[controller]
+            self._action(controller)
+
+    @callback
+    def async_shutdown(self, *_: object) -> None:
+        """Stop ticking."""
+        if self._cancel is not None:
+            self._cancel()
+            self._cancel = None
+        for slot in self._wheel:
+            slot.clear()
+        self._deadlines.clear()
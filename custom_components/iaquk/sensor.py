@@ -2,6 +2,7 @@
 
 import logging
 from collections.abc import Mapping
+from datetime import datetime, timedelta
 from typing import Any, Final
 
 from homeassistant.components.sensor import (
@@ -10,14 +11,20 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorStateClass,
 )
-from homeassistant.const import CONF_NAME, CONF_SENSORS
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME, CONF_SENSORS, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+from homeassistant.util import dt as dt_util
 
-from . import IaqukController
+from . import SOURCES, IaqukController
 from .const import (
+    ATTR_MINUTES_TO_BOUNDARY,
+    ATTR_NEXT_BOUNDARY,
+    ATTR_SOURCE_INDEX_TPL,
     DOMAIN,
     ICON_DEFAULT,
     ICON_EXCELLENT,
@@ -29,13 +36,27 @@ from .const import (
     LEVEL_GOOD,
     LEVEL_INADEQUATE,
     LEVEL_POOR,
+    LEVEL_TIME_SENSORS,
+    LEVELS,
+    PERIODS,
+    PROFILE_SENSORS,
     SENSOR_INDEX,
     SENSOR_LEVEL,
+    SENSOR_LEVEL_TIME_TPL,
+    SENSOR_PROFILE_INDEX_TPL,
+    SENSOR_PROFILE_LEVEL_TPL,
+    SENSOR_TREND_TPL,
     SENSORS,
+    SOURCE_INDEX_SENSORS,
+    TREND_SENSORS,
 )
+from .core import BOUNDARIES, PROFILES, Score, base_unit, next_boundary
 
 _LOGGER: Final = logging.getLogger(__name__)
 
+# Interval of refreshes of sensors which change with time between updates
+REFRESH_INTERVAL: Final = timedelta(minutes=1)
+
 
 # pylint: disable=unused-argument
 async def async_setup_platform(
@@ -50,18 +71,83 @@ async def async_setup_platform(
 
     object_id = discovery_info[CONF_NAME]
     controller = hass.data[DOMAIN][object_id]
+    async_add_entities(
+        _create_sensors(controller, discovery_info[CONF_SENSORS]),
+        update_before_add=True,
+    )
 
-    sensors = []
-    for sensor_type in discovery_info[CONF_SENSORS]:
-        _LOGGER.debug("Initialize sensor %s for controller %s", sensor_type, object_id)
-        sensors.append(IaqukSensor(controller, sensor_type))
 
-    async_add_entities(sensors, update_before_add=True)
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up sensors of room from config entry."""
+    controller = hass.data[DOMAIN][entry.unique_id]
+    async_add_entities(
+        _create_sensors(controller, entry.options.get(CONF_SENSORS) or list(SENSORS)),
+        update_before_add=True,
+    )
+
+
+def _create_sensors(
+    controller: IaqukController, sensor_types: list[str]
+) -> list["IaqukSensor"]:
+    """Create sensors of given types for room."""
+    sources = {ATTR_SOURCE_INDEX_TPL.format(src): src for src in SOURCES}
+    trends = {SENSOR_TREND_TPL.format(src): src for src in BOUNDARIES}
+    level_times = {
+        SENSOR_LEVEL_TIME_TPL.format(level.lower(), period): (level, period)
+        for level in LEVELS
+        for period in PERIODS
+    }
+    profiles = {
+        template.format(name): (name, template == SENSOR_PROFILE_LEVEL_TPL)
+        for name in PROFILES
+        for template in (SENSOR_PROFILE_INDEX_TPL, SENSOR_PROFILE_LEVEL_TPL)
+    }
+
+    sensors = []
+    for sensor_type in sensor_types:
+        _LOGGER.debug(
+            "Initialize sensor %s for controller %s",
+            sensor_type,
+            controller.unique_id,
+        )
+        if sensor_type in SOURCE_INDEX_SENSORS:
+            sensors.append(
+                IaqukSourceIndexSensor(controller, sensor_type, sources[sensor_type])
+            )
+        elif sensor_type in TREND_SENSORS:
+            sensors.append(
+                IaqukTrendSensor(controller, sensor_type, trends[sensor_type])
+            )
+        elif sensor_type in PROFILE_SENSORS:
+            profile, level = profiles[sensor_type]
+            sensors.append(
+                IaqukProfileSensor(controller, sensor_type, profile, level=level)
+            )
+        elif sensor_type in LEVEL_TIME_SENSORS:
+            sensors.append(
+                IaqukLevelTimeSensor(controller, sensor_type, *level_times[sensor_type])
+            )
+        else:
+            sensors.append(IaqukSensor(controller, sensor_type))
+    return sensors
 
 
 class IaqukSensor(SensorEntity):
     """IAQ UK sensor."""
 
+    # Sub-indexes are only needed to explain the current state
+    _unrecorded_attributes = frozenset(
+        ATTR_SOURCE_INDEX_TPL.format(src) for src in SOURCES
+    )
+
+    _attr_should_poll = False
+    # State changes with time, so it is refreshed between controller updates
+    _refreshed = False
+
     def __init__(self, controller: IaqukController, sensor_type: str) -> None:
         """Initialize sensor."""
         self._controller = controller
@@ -72,7 +158,14 @@ class IaqukSensor(SensorEntity):
             ENTITY_ID_FORMAT, self._attr_unique_id, hass=controller.hass
         )
 
-        self._attr_name = f"{controller.name} {SENSORS[sensor_type]}"
+        name = (
+            SENSORS.get(sensor_type)
+            or SOURCE_INDEX_SENSORS.get(sensor_type)
+            or LEVEL_TIME_SENSORS.get(sensor_type)
+            or TREND_SENSORS.get(sensor_type)
+            or PROFILE_SENSORS.get(sensor_type)
+        )
+        self._attr_name = f"{controller.name} {name}"
         self._attr_state_class = (
             SensorStateClass.MEASUREMENT if sensor_type == SENSOR_INDEX else None
         )
@@ -80,22 +173,65 @@ class IaqukSensor(SensorEntity):
             f"{DOMAIN}__level" if sensor_type == SENSOR_LEVEL else SensorDeviceClass.AQI
         )
         self._attr_icon = ICON_DEFAULT if sensor_type == SENSOR_INDEX else ICON_FAIR
+        self._last_write = None
+        self._version = None
+        self._attributes = controller.state_attributes
+        self._cancel_write: CALLBACK_TYPE | None = None
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
+        self.async_on_remove(
+            self._controller.async_add_listener(self._handle_controller_update)
+        )
+        self.async_on_remove(self._async_cancel_write)
+        if self._refreshed:
+            self.async_on_remove(
+                async_track_time_interval(
+                    self.hass,
+                    self._async_refresh,
+                    REFRESH_INTERVAL,
+                    cancel_on_shutdown=True,
+                )
+            )
         self._controller.async_added_to_hass()
 
+    @callback
+    def _async_refresh(self, now: datetime) -> None:  # noqa: ARG002
+        """Write state which has changed with time since the last update."""
+        self._handle_controller_update()
+
+    @callback
+    def _handle_controller_update(self) -> None:
+        """Write new state on controller update."""
+        if self._update_state():
+            self.async_write_ha_state()
+
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return the state attributes."""
-        return self._controller.state_attributes
+        return self._attributes
 
     async def async_update(self) -> None:
         """Update sensor state."""
+        self._update_state()
+
+    def _update_state(self) -> bool:
+        """Update sensor state. Return True if state has to be written."""
+        changed = self._version != self._controller.version
+
         if self._sensor_type == SENSOR_INDEX:
-            self._attr_native_value = self._controller.iaq_index
+            value = self._controller.iaq_index
+            if value != self._attr_native_value:
+                if not self._is_write_due(value):
+                    # Attributes are only published together with the index
+                    self._schedule_write()
+                    return False
+                self._async_cancel_write()
+                self._attr_native_value = value
+                self._last_write = dt_util.utcnow()
+                changed = True
 
-        else:
+        elif self._attr_native_value != self._controller.iaq_level:
             self._attr_native_value = self._controller.iaq_level
             self._attr_icon = (
                 ICON_EXCELLENT
@@ -108,3 +244,216 @@ class IaqukSensor(SensorEntity):
                 if self.state == LEVEL_INADEQUATE
                 else ICON_FAIR
             )
+            changed = True
+
+        # Attributes are not compared while their version stays the same
+        if changed:
+            self._version = self._controller.version
+            self._attributes = self._controller.state_attributes
+        return changed
+
+    def _is_write_due(self, value: int | None) -> bool:
+        """Return True if changed IAQ index should be written now."""
+        interval = self._controller.min_write_interval
+        if (
+            interval is None
+            or self._last_write is None
+            or value is None
+            or self._attr_native_value is None
+        ):
+            return True
+
+        threshold = self._controller.significant_change
+        if threshold is not None and abs(value - self._attr_native_value) >= threshold:
+            return True
+
+        return dt_util.utcnow() - self._last_write >= interval
+
+    def _schedule_write(self) -> None:
+        """Schedule write of throttled IAQ index at the end of the interval."""
+        if self._cancel_write is not None:
+            return
+
+        due = self._last_write + self._controller.min_write_interval
+        self._cancel_write = async_call_later(
+            self.hass, due - dt_util.utcnow(), self._async_write_throttled
+        )
+
+    @callback
+    def _async_write_throttled(self, now: datetime) -> None:  # noqa: ARG002
+        """Write the last IAQ index blocked by the interval."""
+        self._cancel_write = None
+        self._handle_controller_update()
+
+    @callback
+    def _async_cancel_write(self) -> None:
+        """Cancel scheduled write of throttled IAQ index."""
+        if self._cancel_write is not None:
+            self._cancel_write()
+            self._cancel_write = None
+
+
+class IaqukSourceIndexSensor(IaqukSensor):
+    """IAQ UK sensor of a single source IAQ points."""
+
+    def __init__(
+        self, controller: IaqukController, sensor_type: str, source: str
+    ) -> None:
+        """Initialize sensor."""
+        super().__init__(controller, sensor_type)
+        self._source = source
+
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_device_class = None
+        self._attr_icon = ICON_DEFAULT
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the state attributes."""
+        return None
+
+    def _update_state(self) -> bool:
+        """Update sensor state. Return True if state has to be written."""
+        value = self._controller.source_index(self._source)
+        if value == self._attr_native_value:
+            return False
+
+        self._attr_native_value = value
+        return True
+
+
+class IaqukProfileSensor(IaqukSensor):
+    """Index or level sensor of additional scoring profile."""
+
+    def __init__(
+        self,
+        controller: IaqukController,
+        sensor_type: str,
+        profile: str,
+        *,
+        level: bool,
+    ) -> None:
+        """Initialize sensor."""
+        super().__init__(controller, sensor_type)
+        self._profile = profile
+        self._level = level
+        self._score: Score | None = None
+        self._attributes: dict[str, Any] = {}
+
+        self._attr_state_class = None if level else SensorStateClass.MEASUREMENT
+        self._attr_device_class = None
+        self._attr_icon = ICON_DEFAULT
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the state attributes."""
+        return self._attributes
+
+    def _update_state(self) -> bool:
+        """Update sensor state. Return True if state has to be written."""
+        result = self._controller.profile_score(self._profile)
+        if result == self._score:
+            return False
+
+        self._score = result
+        if result is None:
+            self._attr_native_value = None
+            self._attributes = {}
+            return True
+
+        self._attr_native_value = result.level if self._level else result.index
+        self._attributes = {
+            ATTR_SOURCE_INDEX_TPL.format(src): idx
+            for src, idx in result.indexes.items()
+        }
+        return True
+
+
+class IaqukLevelTimeSensor(IaqukSensor):
+    """IAQ UK sensor of time spent in IAQ level during the current period."""
+
+    _refreshed = True
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_suggested_display_precision = 2
+
+    def __init__(
+        self, controller: IaqukController, sensor_type: str, level: str, period: str
+    ) -> None:
+        """Initialize sensor."""
+        super().__init__(controller, sensor_type)
+        self._level = level
+        self._period = period
+
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_icon = "mdi:timer-outline"
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the state attributes."""
+        return None
+
+    def _update_state(self) -> bool:
+        """Update sensor state. Return True if state has to be written."""
+        hours = self._controller.level_time.hours(
+            self._level, self._period, dt_util.utcnow()
+        )
+        # Value is changed only by whole minutes
+        value = round(round(hours * 60) / 60, 3)
+        if value == self._attr_native_value:
+            return False
+
+        self._attr_native_value = value
+        return True
+
+
+class IaqukTrendSensor(IaqukSensor):
+    """IAQ UK sensor of trend of a single source."""
+
+    _refreshed = True
+    _attr_suggested_display_precision = 2
+
+    def __init__(
+        self, controller: IaqukController, sensor_type: str, source: str
+    ) -> None:
+        """Initialize sensor."""
+        super().__init__(controller, sensor_type)
+        self._source = source
+        self._attributes: dict[str, Any] = {}
+
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_device_class = None
+        self._attr_icon = "mdi:chart-line"
+        self._attr_native_unit_of_measurement = f"{base_unit(source)}/min"
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the state attributes."""
+        return self._attributes
+
+    def _update_state(self) -> bool:
+        """Update sensor state. Return True if state has to be written."""
+        trend = self._controller.source_trend(self._source)
+        slope = trend.slope if trend is not None else None
+        value = None
+        attributes = {}
+        if slope is not None:
+            value = slope * 60
+            fitted = trend.value
+            boundary = next_boundary(self._source, fitted, slope)
+            if boundary is not None:
+                # Time to boundary is counted from now, not from the last sample
+                seconds = (boundary - fitted) / slope - (
+                    dt_util.utcnow().timestamp() - trend.at
+                )
+                attributes = {
+                    ATTR_NEXT_BOUNDARY: boundary,
+                    ATTR_MINUTES_TO_BOUNDARY: round(max(seconds, 0) / 60, 1),
+                }
+
+        if value == self._attr_native_value and attributes == self._attributes:
+            return False
+
+        self._attr_native_value = value
+        self._attributes = attributes
+        return True
@@ -0,0 +1,281 @@
+"""Time spent by rooms in each IAQ level and at each IAQ index value."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import PERIOD_DAILY, PERIOD_WEEKLY, PERIODS
+
+STORAGE_VERSION: Final = 1
+SAVE_DELAY: Final = 60  # seconds
+
+HISTOGRAM_SIZE: Final = 66  # IAQ index values from 0 to 65
+
+
+def period_start(period: str, moment: datetime) -> datetime:
+    """Return start of the local day or week (from Monday) of the moment."""
+    start = dt_util.start_of_local_day(moment)
+    if period == PERIOD_WEEKLY:
+        start = dt_util.start_of_local_day(
+            start.date() - timedelta(days=start.weekday())
+        )
+    return start
+
+
+def period_end(period: str, start: datetime) -> datetime:
+    """Return start of the next local day or week."""
+    days = 7 if period == PERIOD_WEEKLY else 1
+    # Calculated from date, so DST changes do not shift the boundary
+    return dt_util.start_of_local_day(start.date() + timedelta(days=days))
+
+
+class LevelTimer:
+    """
+    Time spent in each IAQ level during the current day and week.
+
+    Time is accounted only on level changes and reads, so the cost does not
+    depend on how often the IAQ index is updated.
+    """
+
+    __slots__ = ("_ends", "_level", "_seconds", "_since", "_starts")
+
+    def __init__(self) -> None:
+        """Initialize timer."""
+        self._level: str | None = None
+        self._since: datetime | None = None
+        self._starts: dict[str, datetime] = {}
+        self._ends: dict[str, datetime] = {}
+        self._seconds: dict[str, dict[str, float]] = {period: {} for period in PERIODS}
+
+    @property
+    def level(self) -> str | None:
+        """Get current level."""
+        return self._level
+
+    def transition(self, level: str | None, now: datetime) -> bool:
+        """Account time of the previous level. Return True if level has changed."""
+        if level == self._level:
+            return False
+
+        self._account(now)
+        self._level = level
+        return True
+
+    def hours(self, level: str, period: str, now: datetime) -> float:
+        """Return hours spent in level during the current period."""
+        self._account(now)
+        return self._seconds[period].get(level, 0) / 3600
+
+    def _account(self, now: datetime) -> None:
+        """Add time since the last accounting to the current level."""
+        since = self._since or now
+        while True:
+            for period in PERIODS:
+                if period not in self._ends or since >= self._ends[period]:
+                    self._starts[period] = period_start(period, since)
+                    self._ends[period] = period_end(period, self._starts[period])
+                    self._seconds[period] = {}
+
+            until = min(now, *self._ends.values())
+            if self._level is not None and until > since:
+                elapsed = (until - since).total_seconds()
+                for seconds in self._seconds.values():
+                    seconds[self._level] = seconds.get(self._level, 0) + elapsed
+            since = until
+            if since >= now:
+                break
+        self._since = now
+
+    def as_dict(self, now: datetime) -> dict[str, Any]:
+        """Return accumulated time for storage."""
+        self._account(now)
+        return {
+            period: {
+                "start": self._starts[period].isoformat(),
+                "seconds": self._seconds[period],
+            }
+            for period in PERIODS
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "LevelTimer":
+        """Restore accumulated time from storage."""
+        timer = cls()
+        for period, stored in (data or {}).items():
+            start = dt_util.parse_datetime(stored["start"])
+            if period not in PERIODS or start is None:
+                continue
+            timer._starts[period] = start
+            timer._ends[period] = period_end(period, start)
+            timer._seconds[period] = stored["seconds"]
+        return timer
+
+
+class IndexHistogram:
+    """
+    Time spent at each IAQ index value during the last days.
+
+    IAQ index is an integer from 0 to 65, so a histogram of seconds per value
+    is an exact quantile sketch of bounded size. Histograms are merged just
+    by adding them, e.g. to get quantiles of a whole building.
+    """
+
+    __slots__ = ("_days", "_end", "_index", "_since")
+
+    def __init__(self, days: int) -> None:
+        """Initialize histogram."""
+        self._index: int | None = None
+        self._since: datetime | None = None
+        self._end: datetime | None = None
+        # Histogram for each day, the current one is the last
+        self._days: deque[tuple[datetime, array]] = deque(maxlen=days)
+
+    def observe(self, index: int | None, now: datetime) -> bool:
+        """Account time of the previous index. Return True if index has changed."""
+        if index == self._index:
+            return False
+
+        self._account(now)
+        self._index = index
+        return True
+
+    def histogram(self, now: datetime, days: int | None = None) -> array:
+        """Return seconds spent at each index value during the last days."""
+        self._account(now)
+        result = array("d", bytes(8 * HISTOGRAM_SIZE))
+        for _, seconds in list(self._days)[-days if days else 0 :]:
+            for index, value in enumerate(seconds):
+                result[index] += value
+        return result
+
+    def _account(self, now: datetime) -> None:
+        """Add time since the last accounting to the current index."""
+        since = self._since or now
+        while True:
+            if self._end is None or since >= self._end:
+                start = period_start(PERIOD_DAILY, since)
+                if self._end is not None:
+                    # Days without accounting (e.g. downtime) roll the ring too
+                    missing = (start.date() - self._end.date()).days
+                    for offset in range(min(missing, self._days.maxlen), 0, -1):
+                        day = start.date() - timedelta(days=offset)
+                        self._days.append(
+                            (
+                                dt_util.start_of_local_day(day),
+                                array("d", bytes(8 * HISTOGRAM_SIZE)),
+                            )
+                        )
+                self._days.append((start, array("d", bytes(8 * HISTOGRAM_SIZE))))
+                self._end = period_end(PERIOD_DAILY, start)
+
+            until = min(now, self._end)
+            if self._index is not None and until > since:
+                self._days[-1][1][self._index] += (until - since).total_seconds()
+            since = until
+            if since >= now:
+                break
+        self._since = now
+
+    def as_dict(self, now: datetime) -> dict[str, Any]:
+        """Return histograms for storage."""
+        self._account(now)
+        return {
+            start.isoformat(): {
+                index: value for index, value in enumerate(seconds) if value
+            }
+            for start, seconds in self._days
+        }
+
+    @classmethod
+    def from_dict(cls, days: int, data: dict[str, Any] | None) -> "IndexHistogram":
+        """Restore histograms from storage."""
+        hist = cls(days)
+        for start, stored in (data or {}).items():
+            seconds = array("d", bytes(8 * HISTOGRAM_SIZE))
+            for index, value in stored.items():
+                seconds[int(index)] = value
+            hist._days.append((dt_util.parse_datetime(start), seconds))
+        if hist._days:
+            hist._end = period_end(PERIOD_DAILY, hist._days[-1][0])
+        return hist
+
+
+def quantiles(histogram: Sequence[float], qs: Iterable[float]) -> list[int | None]:
+    """Return quantiles of IAQ index by histogram of time at each value."""
+    total = sum(histogram)
+    if not total:
+        return [None for _ in qs]
+
+    cumulative = list(accumulate(histogram))
+    result = []
+    for q in qs:
+        # The lowest quantile is the first value which has been seen at all
+        pos = (
+            bisect_left(cumulative, q * total) if q > 0 else bisect_right(cumulative, 0)
+        )
+        result.append(min(pos, len(cumulative) - 1))
+    return result
+
+
+class StatsStore:
+    """Persistent storage of statistics of all rooms."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: str,
+        stats: Callable[[], dict[str, LevelTimer | IndexHistogram]],
+    ) -> None:
+        """Initialize storage."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, key)
+        self._stats = stats
+        self._data: dict[str, Any] = {}
+        # Statistics of unloaded rooms which may be set up again
+        self._released: dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        """Load stored statistics."""
+        self._data = await self._store.async_load() or {}
+
+    def stored(self, room: str) -> dict[str, Any] | None:
+        """Return stored statistics of room."""
+        if room in self._released:
+            return self._released.pop(room)
+        return self._data.get(room)
+
+    @callback
+    def async_release(self, room: str, stats: LevelTimer | IndexHistogram) -> None:
+        """Keep statistics of unloaded room until it is set up again."""
+        self._released[room] = stats.as_dict(dt_util.utcnow())
+        self.async_schedule_save()
+
+    @callback
+    def async_forget(self, room: str) -> None:
+        """Drop statistics of removed room."""
+        stored = self._data.pop(room, None)
+        if self._released.pop(room, None) is not None or stored is not None:
+            self.async_schedule_save()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save statistics of all rooms a bit later."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data of all statistics."""
+        now = dt_util.utcnow()
+        # Rooms which are not set up now keep their stored statistics
+        self._data.update(self._released)
+        self._data.update(
+            (room, stats.as_dict(now)) for room, stats in self._stats().items()
+        )
+        return dict(self._data)
@@ -0,0 +1,670 @@
+r"""
+Sweep candidate thresholds over exported history of rooms.
+
+Snapshots of rooms written by the export option are loaded once, and every
+candidate configuration is scored over the whole history with vectorised
+band tables of the core module. For each candidate and room the tool reports
+hours spent at each IAQ level and the number of level changes, so effects of
+new thresholds can be compared before they are used in production.
+
+Usage:
+
+    python custom_components/iaquk/sweep.py iaquk_export/*.jsonl \
+        --candidates candidates.json -o sweep.csv
+
+Candidates file is a JSON object of named candidates, e.g.:
+
+    {
+        "co2_700": {"edges": {"co2": [700, 900, 1500, 1800]}},
+        "strict_levels": {"levels": [30, 42, 54, 62]},
+        "despike_5": {"despike": {"co2": 5, "pm": 5}},
+        "no_hysteresis": {"hysteresis": {"co2": 0, "iaq_level": 0}}
+    }
+
+History of rooms can be read from the cache of source entities (see the
+history module) instead of snapshots; rooms are given by a JSON file with
+sources of each room as in the configuration, optionally with despike and
+hysteresis options of the room, e.g.:
+
+    python custom_components/iaquk/sweep.py --cache iaquk_cache \
+        --rooms rooms.json --database home-assistant_v2.db
+
+    {
+        "kitchen": {"co2": "sensor.kitchen_co2", "pm": ["sensor.pm25"]},
+        "bedroom": {"sources": {"co2": "sensor.bedroom_co2"}, "despike": {"co2": 5}}
+    }
+
+Edges replace edges of band tables of sources (or of levels) and keep their
+points and closed sides. Despike windows and hysteresis margins replace the
+options of rooms: values of each source entity are replaced with medians of
+their last samples before they are summed, as the despike option does, and
+hysteresis is replayed sample by sample. Raw values of entities exported
+with snapshots are used, so the room's own despike is not applied twice.
+Current options of each room are always scored as the "current" candidate.
+The tool requires numpy package, Arrow files are read with optional pyarrow
+package.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Final, NamedTuple, TextIO
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError as exc:  # pragma: no cover
+    msg = "Threshold sweep requires numpy package"
+    raise SystemExit(msg) from exc
+
+try:
+    from .core import (
+        IAQUK_PROFILE,
+        LEVELS,
+        SOURCES,
+        SOURCES_LISTS,
+        BandTable,
+        Profile,
+        convert_source,
+    )
+    from .history import HistoryCache, Series
+except ImportError:  # Started as a script, without Home Assistant
+    from core import (
+        IAQUK_PROFILE,
+        LEVELS,
+        SOURCES,
+        SOURCES_LISTS,
+        BandTable,
+        Profile,
+        convert_source,
+    )
+    from history import HistoryCache, Series
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# Columns of snapshots written by the export option
+COLUMN_TIME: Final = "time"
+COLUMN_ROOM: Final = "room"
+COLUMN_RAW_TPL: Final = "{}_raw"
+COLUMN_DESPIKE: Final = "despike"
+COLUMN_HYSTERESIS: Final = "hysteresis"
+
+# Keys of rooms file with options of rooms
+ROOM_SOURCES: Final = "sources"
+
+CANDIDATE_CURRENT: Final = "current"
+
+SPEC_EDGES: Final = "edges"
+SPEC_LEVELS: Final = "levels"
+SPEC_DESPIKE: Final = "despike"
+SPEC_HYSTERESIS: Final = "hysteresis"
+
+# Key of hysteresis margin of levels, in IAQ index points
+HYSTERESIS_LEVEL: Final = "iaq_level"
+
+OUTPUT_CANDIDATE: Final = "candidate"
+OUTPUT_CHANGES: Final = "changes"
+
+NO_LEVEL: Final = -1
+
+NO_OPTIONS: Final = MappingProxyType({})
+
+
+class Candidate(NamedTuple):
+    """Scoring configuration to evaluate."""
+
+    name: str
+    profile: Profile
+    # Options replacing the ones of rooms
+    despike: Mapping[str, int]
+    hysteresis: Mapping[str, float]
+
+
+class RoomOptions(NamedTuple):
+    """Options of room which change its levels."""
+
+    despike: Mapping[str, int] = NO_OPTIONS
+    hysteresis: Mapping[str, float] = NO_OPTIONS
+
+
+class RoomHistory(NamedTuple):
+    """Snapshots of room sorted by time."""
+
+    times: np.ndarray  # POSIX timestamps
+    values: dict[str, np.ndarray]  # Values in base units, NaN if missing
+    # Values of each source entity (rows) before despike, if they are known
+    entities: Mapping[str, np.ndarray] = NO_OPTIONS
+    options: RoomOptions = RoomOptions()
+
+
+class SweepResult(NamedTuple):
+    """Levels of room scored by candidate."""
+
+    candidate: str
+    room: str
+    changes: int
+    hours: dict[str, float]
+
+
+def band_positions(table: BandTable, values: np.ndarray) -> np.ndarray:
+    """
+    Return positions of bands of values in table.
+
+    This is a vectorised call of the table: a value passes an edge if it is
+    above it, or at it when the edge is open. NaN passes no edges, so missing
+    values have to be masked by caller.
+    """
+    positions = np.zeros(values.shape, dtype=np.intp)
+    for edge, closed in zip(table.edges, table.closed, strict=True):
+        positions += values > edge if closed else values >= edge
+    return positions
+
+
+def band_results(table: BandTable, values: np.ndarray) -> np.ndarray:
+    """Return results of bands of values in table."""
+    return np.asarray(table.results)[band_positions(table, values)]
+
+
+def despiked(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Replace values with medians of their last samples.
+
+    As with the despike option, each change of value (and a value after a
+    gap) is a new sample, while repeated values are not.
+    """
+    present = ~np.isnan(values)
+    previous = np.concatenate(([np.nan], values[:-1]))
+    new = present & (values != previous)
+    samples = values[new]
+    if not samples.size:
+        return values
+
+    padded = np.concatenate((np.full(window - 1, np.nan), samples))
+    medians = np.nanmedian(sliding_window_view(padded, window), axis=1)
+    result = np.full_like(values, np.nan)
+    result[present] = medians[np.cumsum(new)[present] - 1]
+    return result
+
+
+def summed(columns: Sequence[np.ndarray]) -> np.ndarray:
+    """Return sums of values of entities; NaN where all of them are missing."""
+    if len(columns) == 1:
+        return columns[0]
+    stacked = np.vstack(columns)
+    missing = np.isnan(stacked).all(axis=0)
+    return np.where(missing, np.nan, np.nansum(stacked, axis=0))
+
+
+def source_values(
+    history: RoomHistory, src: str, window: int | None
+) -> np.ndarray | None:
+    """
+    Return values of source, despiked over window of samples of each entity.
+
+    As with the despike option, entities are despiked before they are summed.
+    Without raw values of entities the values used by the room are despiked.
+    """
+    entities = history.entities.get(src)
+    if entities is None:
+        values = history.values.get(src)
+        if values is None or window is None:
+            return values
+        return despiked(values, window)
+    if window is None:
+        return summed(list(entities))
+    return summed([despiked(column, window) for column in entities])
+
+
+def hysteresis_results(
+    table: BandTable, values: np.ndarray, margin: float
+) -> np.ndarray:
+    """
+    Return results of bands of values, keeping the previous one within margin.
+
+    This replays apply_hysteresis of the core module sample by sample; after
+    a missing value (NaN) there is no previous result.
+    """
+    results = band_results(table, values)
+    lows = band_results(table, values - margin).tolist()
+    highs = band_results(table, values + margin).tolist()
+    current = results.tolist()
+    previous = None
+    for pos, missing in enumerate(np.isnan(values).tolist()):
+        if missing:
+            previous = None
+            continue
+        if (
+            previous is not None
+            and current[pos] != previous
+            and previous in (lows[pos], highs[pos])
+        ):
+            current[pos] = previous
+        previous = current[pos]
+    return np.asarray(current, dtype=results.dtype)
+
+
+def replace_edges(table: BandTable, edges: Sequence[float]) -> BandTable:
+    """Return table with new edges of the same bands."""
+    edges = tuple(float(edge) for edge in edges)
+    if len(edges) != len(table.edges):
+        msg = f"{len(table.edges)} edges expected, got {len(edges)}"
+        raise ValueError(msg)
+    if list(edges) != sorted(edges):
+        msg = f"Edges are not sorted: {edges}"
+        raise ValueError(msg)
+    return table._replace(edges=edges)
+
+
+def make_candidate(name: str, spec: Mapping[str, Any]) -> Candidate:
+    """Build candidate from its specification."""
+    profile = IAQUK_PROFILE
+    bands = dict(profile.bands)
+    for src, edges in spec.get(SPEC_EDGES, {}).items():
+        if src not in bands:
+            msg = f"Unknown source: {src}"
+            raise ValueError(msg)
+        bands[src] = replace_edges(bands[src], edges)
+    levels = profile.levels
+    if SPEC_LEVELS in spec:
+        levels = replace_edges(levels, spec[SPEC_LEVELS])
+
+    despike = {}
+    for src, window in spec.get(SPEC_DESPIKE, {}).items():
+        if src not in bands or int(window) < 1:
+            msg = f"Invalid despike window: {src}={window}"
+            raise ValueError(msg)
+        despike[src] = int(window)
+
+    hysteresis = {}
+    for key, margin in spec.get(SPEC_HYSTERESIS, {}).items():
+        if (key not in bands and key != HYSTERESIS_LEVEL) or float(margin) < 0:
+            msg = f"Invalid hysteresis margin: {key}={margin}"
+            raise ValueError(msg)
+        hysteresis[key] = float(margin)
+
+    return Candidate(
+        name, profile._replace(bands=bands, levels=levels), despike, hysteresis
+    )
+
+
+def score_levels(
+    history: RoomHistory,
+    candidate: Candidate,
+    despiked_values: dict[tuple[str, int | None], np.ndarray | None],
+) -> np.ndarray:
+    """
+    Return positions of levels of room in levels table of candidate.
+
+    Options of candidate replace the ones of room. Rows without sources get
+    NO_LEVEL. Despiked values are cached by caller, so candidates with the
+    same windows share them.
+    """
+    profile = candidate.profile
+    despike = {**history.options.despike, **candidate.despike}
+    hysteresis = {**history.options.hysteresis, **candidate.hysteresis}
+    size = len(history.times)
+    total = np.zeros(size, dtype=np.int64)
+    worst = np.full(size, profile.best, dtype=np.int64)
+    count = np.zeros(size, dtype=np.int64)
+    for src, table in profile.bands.items():
+        key = (src, despike.get(src))
+        if key not in despiked_values:
+            despiked_values[key] = source_values(history, src, key[1])
+        values = despiked_values[key]
+        if values is None:
+            continue
+
+        present = ~np.isnan(values)
+        margin = hysteresis.get(src)
+        results = (
+            hysteresis_results(table, values, margin)
+            if margin
+            else band_results(table, values)
+        )
+        points = np.where(present, results, 0)
+        total += points
+        worst = np.where(present, np.minimum(worst, points), worst)
+        count += present
+
+    scored = count > 0
+    if profile.worst:
+        index = (profile.scale * worst) // profile.best
+    else:
+        index = (profile.scale * total) // (profile.best * np.maximum(count, 1))
+    margin = hysteresis.get(HYSTERESIS_LEVEL)
+    if margin:
+        # Results of levels table are replaced with their positions
+        table = profile.levels
+        table = table._replace(results=tuple(range(len(table.results))))
+        levels = hysteresis_results(table, np.where(scored, index, np.nan), margin)
+    else:
+        levels = band_positions(profile.levels, index)
+    return np.where(scored, levels, NO_LEVEL)
+
+
+def level_hours(
+    times: np.ndarray, levels: np.ndarray, size: int, max_gap: float | None = None
+) -> tuple[np.ndarray, int]:
+    """
+    Return hours at each level and number of level changes.
+
+    Each snapshot lasts until the next one, but not longer than max_gap
+    seconds, so downtimes are not counted for the last level before them.
+    """
+    durations = np.diff(times, append=times[-1:])
+    if max_gap is not None:
+        durations = np.minimum(durations, max_gap)
+    scored = levels != NO_LEVEL
+    seconds = np.bincount(levels[scored], weights=durations[scored], minlength=size)
+    levels = levels[scored]
+    changes = int(np.count_nonzero(levels[1:] != levels[:-1]))
+    return seconds / 3600, changes
+
+
+def sweep(
+    rooms: Mapping[str, RoomHistory],
+    candidates: Iterable[Candidate],
+    max_gap: float | None = None,
+) -> list[SweepResult]:
+    """Score history of all rooms by each candidate."""
+    candidates = list(candidates)
+    results = []
+    for room, history in rooms.items():
+        if not len(history.times):
+            continue
+        despiked_values: dict[tuple[str, int | None], np.ndarray | None] = {}
+        for candidate in candidates:
+            names = candidate.profile.levels.results
+            levels = score_levels(history, candidate, despiked_values)
+            hours, changes = level_hours(history.times, levels, len(names), max_gap)
+            results.append(
+                SweepResult(
+                    candidate.name,
+                    room,
+                    changes,
+                    dict(zip(names, hours.tolist(), strict=True)),
+                )
+            )
+    return results
+
+
+def read_jsonl(path: Path, columns: dict[str, list]) -> None:
+    """Append columns of JSON Lines snapshots file."""
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            for key, values in columns.items():
+                values.append(row.get(key))
+
+
+def read_arrow(path: Path, columns: dict[str, list]) -> None:
+    """Append columns of Arrow IPC stream snapshots file."""
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+    except ImportError as exc:
+        msg = "Reading Arrow files requires pyarrow package"
+        raise SystemExit(msg) from exc
+
+    with path.open("rb") as file:
+        table = pa.ipc.open_stream(file).read_all()
+    for key, values in columns.items():
+        if key in table.column_names:
+            values.extend(table.column(key).to_pylist())
+        else:
+            values.extend([None] * table.num_rows)
+
+
+def entity_values(raw: Sequence[list | None]) -> np.ndarray:
+    """Return raw values of entities as rows padded with NaN."""
+    width = max(len(values) for values in raw if values)
+    return np.array(
+        [(values or []) + [None] * (width - len(values or [])) for values in raw],
+        dtype=np.float64,
+    ).T
+
+
+def room_options(despike: Any, hysteresis: Any) -> RoomOptions:
+    """Return options of room from snapshot; Arrow maps are lists of pairs."""
+    return RoomOptions(
+        {src: int(window) for src, window in dict(despike or {}).items()},
+        {key: float(margin) for key, margin in dict(hysteresis or {}).items()},
+    )
+
+
+def load_snapshots(paths: Iterable[Path]) -> dict[str, RoomHistory]:
+    """
+    Load snapshots files and split them to histories of rooms.
+
+    Options of rooms are taken from their latest snapshots. Values of rooms
+    whose snapshots have no raw values of entities (exported by older
+    versions) are already despiked by the room.
+    """
+    keys = (COLUMN_TIME, COLUMN_ROOM, COLUMN_DESPIKE, COLUMN_HYSTERESIS)
+    columns: dict[str, list] = {key: [] for key in keys}
+    columns.update((src, []) for src in SOURCES)
+    columns.update((COLUMN_RAW_TPL.format(src), []) for src in SOURCES)
+    for path in paths:
+        if path.suffix == ".arrow":
+            read_arrow(path, columns)
+        else:
+            read_jsonl(path, columns)
+
+    times = np.array(
+        [datetime.fromisoformat(moment).timestamp() for moment in columns[COLUMN_TIME]],
+        dtype=np.float64,
+    )
+    names, rooms = np.unique(
+        np.array(columns[COLUMN_ROOM], dtype=str), return_inverse=True
+    )
+    values = {
+        src: np.array(columns[src], dtype=np.float64)
+        for src in SOURCES
+        if any(value is not None for value in columns[src])
+    }
+
+    # Files may come in any order, so rows are sorted by room and time
+    order = np.lexsort((times, rooms))
+    bounds = np.searchsorted(rooms[order], np.arange(len(names) + 1))
+    result = {}
+    for pos, room in enumerate(names.tolist()):
+        rows = order[bounds[pos] : bounds[pos + 1]]
+        room_values = {src: vals[rows] for src, vals in values.items()}
+        entities = {}
+        for src, vals in room_values.items():
+            raw = [columns[COLUMN_RAW_TPL.format(src)][row] for row in rows.tolist()]
+            present = (~np.isnan(vals)).tolist()
+            if not any(present):
+                continue
+            if all(entry for entry, has in zip(raw, present, strict=True) if has):
+                entities[src] = entity_values(raw)
+            else:
+                _LOGGER.warning("Snapshots of %s have no raw %s values", room, src)
+        last = rows[-1]
+        options = room_options(
+            columns[COLUMN_DESPIKE][last], columns[COLUMN_HYSTERESIS][last]
+        )
+        result[room] = RoomHistory(times[rows], room_values, entities, options)
+    return result
+
+
+def aligned(series: Series, times: np.ndarray) -> np.ndarray:
+    """Return values of series at given times; each value lasts until the next."""
+    if not len(series.times):
+        return np.full(len(times), np.nan)
+    positions = np.searchsorted(series.times, times, side="right") - 1
+    return np.where(positions >= 0, series.values[np.maximum(positions, 0)], np.nan)
+
+
+def base_values(src: str, values: np.ndarray, unit: str | None) -> np.ndarray | None:
+    """Convert values of source to its base units. Return None for wrong units."""
+    # All conversions are linear (or affine for temperature)
+    zero = convert_source(src, 0.0, unit)
+    if zero is None:
+        return None
+    return zero + (convert_source(src, 1.0, unit) - zero) * values
+
+
+def cached_history(
+    cache: HistoryCache,
+    sources: Mapping[str, str | list[str]],
+    options: RoomOptions | None = None,
+) -> RoomHistory:
+    """
+    Return history of room from cached series of its source entities.
+
+    Series are read through memory maps; only values at the times of changes
+    of any source of the room are copied.
+    """
+    series = {
+        src: [cache.series(entity_id) for entity_id in ids]
+        for src, entity_ids in sources.items()
+        if (ids := entity_ids if isinstance(entity_ids, list) else [entity_ids])
+    }
+    all_times = [
+        entity.times for src_series in series.values() for entity in src_series
+    ]
+    times = np.unique(np.concatenate(all_times)) if all_times else np.empty(0)
+
+    values = {}
+    entities = {}
+    for src, src_series in series.items():
+        columns = []
+        for entity in src_series:
+            column = base_values(src, aligned(entity, times), entity.unit)
+            if column is None:
+                _LOGGER.warning("%s is not a recognized %s unit", entity.unit, src)
+                continue
+            columns.append(column)
+        if not columns:
+            continue
+        if src not in SOURCES_LISTS:
+            columns = columns[:1]
+        entities[src] = np.vstack(columns)
+        values[src] = summed(columns)
+    return RoomHistory(times, values, entities, options or RoomOptions())
+
+
+def load_rooms(
+    path: Path, cache: HistoryCache, database: Path | None
+) -> dict[str, RoomHistory]:
+    """Load histories of rooms from cache, updated from database first if given."""
+    with path.open(encoding="utf-8") as file:
+        specs = json.load(file)
+    rooms = {}
+    options = {}
+    for room, spec in specs.items():
+        sources = spec.get(ROOM_SOURCES, spec) if isinstance(spec, dict) else spec
+        if not isinstance(sources, dict) or not set(sources) <= set(SOURCES):
+            msg = f"Invalid sources of room {room}: {sources}"
+            raise SystemExit(msg)
+        rooms[room] = sources
+        try:
+            options[room] = room_options(
+                spec.get(COLUMN_DESPIKE), spec.get(COLUMN_HYSTERESIS)
+            )
+        except (TypeError, ValueError) as exc:
+            msg = f"Invalid options of room {room}: {exc}"
+            raise SystemExit(msg) from exc
+
+    if database is not None:
+        entity_ids = {
+            entity_id
+            for sources in rooms.values()
+            for ids in sources.values()
+            for entity_id in (ids if isinstance(ids, list) else [ids])
+        }
+        count = cache.update(database, sorted(entity_ids))
+        _LOGGER.info("%d new states cached", count)
+
+    return {
+        room: cached_history(cache, sources, options[room])
+        for room, sources in rooms.items()
+    }
+
+
+def load_candidates(path: Path | None) -> list[Candidate]:
+    """Load candidates file; current configuration is always the first one."""
+    specs = {CANDIDATE_CURRENT: {}}
+    if path is not None:
+        with path.open(encoding="utf-8") as file:
+            specs.update(json.load(file))
+    try:
+        return [make_candidate(name, spec) for name, spec in specs.items()]
+    except (AttributeError, TypeError, ValueError) as exc:
+        msg = f"Invalid candidates file: {exc}"
+        raise SystemExit(msg) from exc
+
+
+def write_results(results: Iterable[SweepResult], output: TextIO) -> None:
+    """Write results as CSV table."""
+    writer = csv.writer(output)
+    writer.writerow([OUTPUT_CANDIDATE, COLUMN_ROOM, OUTPUT_CHANGES, *LEVELS])
+    for res in results:
+        hours = [round(res.hours.get(level, 0), 3) for level in LEVELS]
+        writer.writerow([res.candidate, res.room, res.changes, *hours])
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare IAQ UK thresholds on exported history of rooms."
+    )
+    parser.add_argument(
+        "input", type=Path, nargs="*", help="JSON Lines or Arrow snapshots files"
+    )
+    parser.add_argument("--cache", type=Path, help="cache directory of history")
+    parser.add_argument(
+        "--rooms", type=Path, help="JSON file of sources of rooms in cache"
+    )
+    parser.add_argument(
+        "--database", type=Path, help="recorder SQLite database to update cache"
+    )
+    parser.add_argument("--candidates", type=Path, help="JSON file of candidates")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="output CSV file (default: stdout)"
+    )
+    parser.add_argument(
+        "--max-gap",
+        type=float,
+        metavar="SECONDS",
+        help="longest time a snapshot lasts (default: until the next one)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run command line tool."""
+    args = parse_args(argv)
+
+    candidates = load_candidates(args.candidates)
+    rooms = {}
+    if args.cache is not None and args.rooms is not None:
+        rooms.update(load_rooms(args.rooms, HistoryCache(args.cache), args.database))
+    if args.input:
+        rooms.update(load_snapshots(args.input))
+    if not rooms:
+        msg = "No snapshots found"
+        raise SystemExit(msg)
+
+    results = sweep(rooms, candidates, args.max_gap)
+    if args.output is None:
+        write_results(results, sys.stdout)
+    else:
+        with args.output.open("w", newline="", encoding="utf-8") as output:
+            write_results(results, output)
+
+    _LOGGER.info("%d candidates scored over %d rooms", len(candidates), len(rooms))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
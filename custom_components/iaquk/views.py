@@ -0,0 +1,93 @@
+"""HTTP API of IAQ UK rooms."""
+
+import hashlib
+from functools import partial
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+from aiohttp import hdrs, web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.json import json_bytes
+
+from .const import (
+    ATTR_INDEXES,
+    ATTR_ROOMS,
+    ATTR_SOURCES_USED,
+    DOMAIN,
+    SIGNAL_ROOMS_CHANGED,
+)
+from .websocket import room_state
+
+if TYPE_CHECKING:
+    from . import IaqukController
+
+
+class IaqukRoomsView(HomeAssistantView):
+    """
+    IAQ of all rooms in one document.
+
+    The document is serialized only on the first request after state of any
+    room has changed (its version is bumped). Its ETag is a hash of the
+    content, so polls of unchanged rooms are answered by 304 Not Modified
+    without the body.
+    """
+
+    url = f"/api/{DOMAIN}/rooms"
+    name = f"api:{DOMAIN}:rooms"
+
+    def __init__(
+        self, hass: HomeAssistant, controllers: dict[str, "IaqukController"]
+    ) -> None:
+        """Initialize view."""
+        self._controllers = controllers
+        self._body: bytes | None = None
+        self._etag: str | None = None
+        self._remove_listeners: dict[str, CALLBACK_TYPE] = {}
+        # Versions of rooms in the cached document
+        self._versions: dict[str, int] = {}
+        for room in controllers:
+            self._async_room_changed(room)
+        async_dispatcher_connect(hass, SIGNAL_ROOMS_CHANGED, self._async_room_changed)
+
+    @callback
+    def _async_room_changed(self, room: str) -> None:
+        """Follow updates of added room and stop following removed one."""
+        if (remove := self._remove_listeners.pop(room, None)) is not None:
+            remove()
+        self._versions.pop(room, None)
+        if (controller := self._controllers.get(room)) is not None:
+            self._versions[room] = controller.version
+            self._remove_listeners[room] = controller.async_add_listener(
+                partial(self._async_room_updated, room)
+            )
+        self._body = None
+
+    @callback
+    def _async_room_updated(self, room: str) -> None:
+        """Drop cached document if state of room has changed."""
+        version = self._controllers[room].version
+        if self._versions.get(room) != version:
+            self._versions[room] = version
+            self._body = None
+
+    def _document(self) -> tuple[bytes, str]:
+        """Return serialized document and its ETag."""
+        if self._body is None:
+            rooms = {}
+            for room, controller in self._controllers.items():
+                state = rooms[room] = room_state(controller)
+                state[ATTR_SOURCES_USED] = len(state[ATTR_INDEXES])
+            self._body = json_bytes({ATTR_ROOMS: rooms})
+            digest = hashlib.blake2b(self._body, digest_size=16).hexdigest()
+            self._etag = f'"{digest}"'
+        return self._body, self._etag
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return IAQ of all rooms."""
+        body, etag = self._document()
+        headers = {hdrs.ETAG: etag, hdrs.CACHE_CONTROL: "no-cache"}
+        if etag in request.headers.get(hdrs.IF_NONE_MATCH, ""):
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
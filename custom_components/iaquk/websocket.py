@@ -0,0 +1,190 @@
+"""Websocket API of IAQ UK rooms."""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Final
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    ATTR_INDEX,
+    ATTR_INDEXES,
+    ATTR_INTERVAL,
+    ATTR_LEVEL,
+    ATTR_ROOMS,
+    DOMAIN,
+    SIGNAL_ROOMS_CHANGED,
+)
+
+if TYPE_CHECKING:
+    from . import IaqukController
+
+DEFAULT_INTERVAL: Final = 1  # seconds
+
+
+def room_state(controller: "IaqukController") -> dict[str, Any]:
+    """Return compact state of room."""
+    return {
+        ATTR_INDEX: controller.iaq_index,
+        ATTR_LEVEL: controller.iaq_level,
+        ATTR_INDEXES: controller.indexes,
+    }
+
+
+def _room_delta(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any] | None:
+    """Return changes of room state or None if nothing has changed."""
+    indexes = {
+        src: idx
+        for src, idx in new[ATTR_INDEXES].items()
+        if old[ATTR_INDEXES].get(src) != idx
+    }
+    # Sources which are not used anymore
+    indexes.update(dict.fromkeys(old[ATTR_INDEXES].keys() - new[ATTR_INDEXES].keys()))
+    if (
+        not indexes
+        and old[ATTR_INDEX] == new[ATTR_INDEX]
+        and old[ATTR_LEVEL] == new[ATTR_LEVEL]
+    ):
+        return None
+
+    return {
+        ATTR_INDEX: new[ATTR_INDEX],
+        ATTR_LEVEL: new[ATTR_LEVEL],
+        ATTR_INDEXES: indexes,
+    }
+
+
+class RoomsSubscription:
+    """
+    Subscription to IAQ updates of all rooms.
+
+    The first event is a snapshot of all rooms. Then changes of rooms are
+    collected and sent together at most once per interval. Each change contains
+    index and level of room and only changed IAQ points of its sources.
+    Added rooms are sent in full, removed rooms are sent as null.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: websocket_api.ActiveConnection,
+        msg_id: int,
+        interval: float,
+    ) -> None:
+        """Initialize subscription."""
+        self.hass = hass
+        self._connection = connection
+        self._msg_id = msg_id
+        self._interval = interval
+        self._controllers: dict[str, IaqukController] = hass.data.get(DOMAIN, {})
+        self._sent: dict[str, dict[str, Any]] = {}
+        # Dict is used as ordered set of changed rooms
+        self._dirty: dict[str, None] = {}
+        self._removers: dict[str, CALLBACK_TYPE] = {}
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._disconnect: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Send snapshot of all rooms and start following their updates."""
+        for room, controller in self._controllers.items():
+            self._sent[room] = room_state(controller)
+            self._removers[room] = controller.async_add_listener(
+                self._room_listener(room)
+            )
+        self._disconnect = async_dispatcher_connect(
+            self.hass, SIGNAL_ROOMS_CHANGED, self._async_room_changed
+        )
+        self._send({ATTR_ROOMS: dict(self._sent)})
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop sending updates."""
+        if self._disconnect is not None:
+            self._disconnect()
+        for remove in self._removers.values():
+            remove()
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+
+    def _room_listener(self, room: str) -> CALLBACK_TYPE:
+        """Return listener of room updates."""
+
+        @callback
+        def room_updated() -> None:
+            """Mark room as dirty."""
+            self._dirty[room] = None
+            if self._cancel_flush is None:
+                self._cancel_flush = async_call_later(
+                    self.hass, self._interval, self._async_flush
+                )
+
+        return room_updated
+
+    @callback
+    def _async_room_changed(self, room: str) -> None:
+        """Follow updates of added room and stop following removed one."""
+        if (remove := self._removers.pop(room, None)) is not None:
+            remove()
+        listener = self._room_listener(room)
+        if (controller := self._controllers.get(room)) is not None:
+            self._removers[room] = controller.async_add_listener(listener)
+        # Room is sent in full, even if it has been set up again with the same ID
+        self._sent.pop(room, None)
+        listener()
+
+    @callback
+    def _async_flush(self, now: datetime) -> None:  # noqa: ARG002
+        """Send changes of all dirty rooms."""
+        self._cancel_flush = None
+        rooms = {}
+        for room in self._dirty:
+            if (controller := self._controllers.get(room)) is None:
+                self._sent.pop(room, None)
+                rooms[room] = None
+                continue
+
+            state = room_state(controller)
+            if room not in self._sent:
+                rooms[room] = self._sent[room] = state
+            elif (delta := _room_delta(self._sent[room], state)) is not None:
+                rooms[room] = delta
+                self._sent[room] = state
+        self._dirty.clear()
+
+        if rooms:
+            self._send({ATTR_ROOMS: rooms})
+
+    def _send(self, event: dict[str, Any]) -> None:
+        """Send event to client."""
+        self._connection.send_message(websocket_api.event_message(self._msg_id, event))
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe",
+        vol.Optional(ATTR_INTERVAL, default=DEFAULT_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+    }
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Subscribe to IAQ updates of all rooms."""
+    subscription = RoomsSubscription(hass, connection, msg["id"], msg[ATTR_INTERVAL])
+    connection.subscriptions[msg["id"]] = subscription.async_stop
+    connection.send_result(msg["id"])
+    subscription.async_start()
+
+
+@callback
+def async_register_websocket(hass: HomeAssistant) -> None:
+    """Register websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe)
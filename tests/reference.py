@@ -0,0 +1,314 @@
+"""
+Reference model of IAQ UK index calculation.
+
+A frozen copy of the original property-based logic of `IaqukController`:
+units conversion of `_get_number_state` and threshold chains of
+`_<source>_index` properties. Do not change it to follow the integration --
+it is the ground truth that optimised engines are checked against.
+"""
+
+# pylint: disable=too-many-return-statements
+from collections.abc import Mapping, Sequence
+
+from homeassistant.const import PERCENTAGE, UnitOfTemperature
+from homeassistant.util.unit_conversion import TemperatureConverter
+
+UNIT_PPM = {"ppm": 1, "ppb": 0.001}
+UNIT_UGM3 = {
+    "µg/m³": 1,
+    "µg/m3": 1,
+    "µg/m^3": 1,
+    "ug/m³": 1,
+    "ug/m3": 1,
+    "ug/m^3": 1,
+    "mg/m³": 1000,
+    "mg/m3": 1000,
+    "mg/m^3": 1000,
+}
+UNIT_MGM3 = {
+    "mg/m³": 1,
+    "mg/m3": 1,
+    "mg/m^3": 1,
+    "µg/m³": 0.001,
+    "µg/m3": 0.001,
+    "µg/m^3": 0.001,
+    "ug/m³": 0.001,
+    "ug/m3": 0.001,
+    "ug/m^3": 0.001,
+}
+
+MWEIGTH_TVOC = 78.9516  # g/mol
+MWEIGTH_HCHO = 30.0260  # g/mol
+MWEIGTH_CO = 28.0100  # g/mol
+MWEIGTH_NO2 = 46.0100  # g/mol
+MWEIGTH_CO2 = 44.0100  # g/mol
+
+# Values at which IAQ points of sources change
+EDGES = {
+    "temperature": (14, 15, 16, 18, 21, 23, 24, 25),
+    "humidity": (10, 20, 30, 40, 60, 70, 80, 90),
+    "co2": (600, 800, 1500, 1800),
+    "co": (0, 7),
+    "no2": (0.2, 0.4),
+    "tvoc": (0.1, 0.3, 0.5, 1.0),
+    "voc_index": (50, 115, 180, 260),
+    "hcho": (20, 50, 100, 200),
+    "radon": (0, 20, 100),
+    "pm": (23, 41, 53, 64),
+}
+
+# Units accepted by each source without conversion by molecular weight
+UNITS = {
+    "temperature": None,
+    "humidity": PERCENTAGE,
+    "co2": UNIT_PPM,
+    "co": UNIT_MGM3,
+    "no2": UNIT_MGM3,
+    "tvoc": UNIT_MGM3,
+    "voc_index": None,
+    "hcho": UNIT_UGM3,
+    "radon": "Bq/m3",
+    "pm": UNIT_UGM3,
+}
+
+MWEIGHTS = {
+    "co2": MWEIGTH_CO2,
+    "co": MWEIGTH_CO,
+    "no2": MWEIGTH_NO2,
+    "tvoc": MWEIGTH_TVOC,
+    "hcho": MWEIGTH_HCHO,
+}
+
+
+def number(
+    value: str,
+    unit: str | None,
+    entity_unit: str | dict[str, float] | None = None,
+    mweight: float | None = None,
+) -> float | None:
+    """Convert value to number (`_get_number_state`)."""
+    target_unit = None
+    if entity_unit is not None and not isinstance(entity_unit, dict):
+        entity_unit = {entity_unit: 1}
+
+    if entity_unit is not None:
+        target_unit = next(iter(entity_unit))
+        if unit not in entity_unit:
+            if mweight is None:
+                return None
+            entity_unit = entity_unit.copy()
+            if "ppb" in (unit, target_unit):
+                mweight /= 1000
+            if "µg/m³" in (unit, target_unit):
+                mweight *= 1000
+            if unit in {"ppm", "ppb"}:
+                entity_unit[unit] = mweight / 24.45
+            else:
+                entity_unit[unit] = 24.45 / mweight
+
+    value = float(value)
+
+    if entity_unit is not None and unit != target_unit:
+        value *= entity_unit[unit]
+    return value
+
+
+def temperature_index(value: float, unit: str | None) -> int:
+    """Transform indoor temperature values to IAQ points."""
+    if unit not in (UnitOfTemperature.CELSIUS, UnitOfTemperature.FAHRENHEIT):
+        raise ValueError(unit)
+
+    if unit != UnitOfTemperature.CELSIUS:
+        value = TemperatureConverter.convert(value, unit, UnitOfTemperature.CELSIUS)
+
+    index = 1
+    if 18 <= value <= 21:
+        index = 5
+    elif 16 < value < 23:
+        index = 4
+    elif 15 < value < 24:
+        index = 3
+    elif 14 < value < 25:
+        index = 2
+    return index
+
+
+def humidity_index(value: float) -> int:
+    """Transform indoor humidity values to IAQ points."""
+    index = 1
+    if 40 <= value <= 60:
+        index = 5
+    elif 30 <= value <= 70:
+        index = 4
+    elif 20 <= value <= 80:
+        index = 3
+    elif 10 <= value <= 90:
+        index = 2
+    return index
+
+
+def co2_index(value: float) -> int:
+    """Transform indoor eCO2 values to IAQ points."""
+    index = 1
+    if value < 600:
+        index = 5
+    elif value <= 800:
+        index = 4
+    elif value <= 1500:
+        index = 3
+    elif value <= 1800:
+        index = 2
+    return index
+
+
+def tvoc_index(value: float) -> int:
+    """Transform indoor tVOC values to IAQ points."""
+    index = 1
+    if value < 0.1:
+        index = 5
+    elif value <= 0.3:
+        index = 4
+    elif value <= 0.5:
+        index = 3
+    elif value <= 1.0:
+        index = 2
+    return index
+
+
+def voc_index_index(value: float) -> int:
+    """Transform indoor VOC index (0-500) values to IAQ points."""
+    index = 1
+    if value <= 50:
+        index = 5
+    elif value <= 115:
+        index = 4
+    elif value <= 180:
+        index = 3
+    elif value <= 260:
+        index = 2
+    return index
+
+
+def pm_index(value: float) -> int:
+    """Transform indoor particulate matters values to IAQ points."""
+    index = 1
+    if value <= 23:
+        index = 5
+    elif value <= 41:
+        index = 4
+    elif value <= 53:
+        index = 3
+    elif value <= 64:
+        index = 2
+    return index
+
+
+def no2_index(value: float) -> int:
+    """Transform indoor NO2 values to IAQ points."""
+    index = 1
+    if value < 0.2:
+        index = 5
+    elif value <= 0.4:
+        index = 3
+    return index
+
+
+def co_index(value: float) -> int:
+    """Transform indoor CO values to IAQ points."""
+    index = 1
+    if value == 0:
+        index = 5
+    elif value <= 7:
+        index = 3
+    return index
+
+
+def hcho_index(value: float) -> int:
+    """Transform indoor Formaldehyde (HCHO) values to IAQ points."""
+    index = 1
+    if value < 20:
+        index = 5
+    elif value <= 50:
+        index = 4
+    elif value <= 100:
+        index = 3
+    elif value <= 200:
+        index = 2
+    return index
+
+
+def radon_index(value: float) -> int:
+    """Transform indoor Radon (Rn) values to IAQ points."""
+    index = 1
+    if value == 0:
+        index = 5
+    elif value < 20:
+        index = 3
+    elif value <= 100:
+        index = 2
+    return index
+
+
+INDEXES = {
+    "humidity": humidity_index,
+    "co2": co2_index,
+    "co": co_index,
+    "no2": no2_index,
+    "tvoc": tvoc_index,
+    "voc_index": voc_index_index,
+    "hcho": hcho_index,
+    "radon": radon_index,
+    "pm": pm_index,
+}
+
+
+def points(src: str, readings: Sequence[tuple[str, str | None]]) -> int | None:
+    """
+    Return IAQ points of source for its entities' states and units.
+
+    Errors (e.g. unknown temperature units) give None, as the original
+    `update()` skipped sources which raised.
+    """
+    try:
+        values = [
+            value
+            for state, unit in readings
+            if (value := number(state, unit, UNITS[src], MWEIGHTS.get(src))) is not None
+        ]
+        if not values:
+            return None
+        if src == "temperature":
+            return temperature_index(values[0], readings[0][1])
+        return INDEXES[src](sum(values))
+    except ValueError:
+        return None
+
+
+def level(index: int | None) -> str | None:
+    """Transform IAQ index to human readable level."""
+    if index is None:
+        return None
+    if index <= 25:
+        return "Inadequate"
+    if index <= 38:
+        return "Poor"
+    if index <= 51:
+        return "Fair"
+    if index <= 60:
+        return "Good"
+    return "Excellent"
+
+
+def score(
+    readings: Mapping[str, Sequence[tuple[str, str | None]]],
+) -> tuple[int | None, str | None, dict[str, int]]:
+    """Return IAQ index, level and points of sources."""
+    indexes = {
+        src: idx
+        for src, src_readings in readings.items()
+        if (idx := points(src, src_readings)) is not None
+    }
+    if not indexes:
+        return None, None, {}
+    index = int((65 * sum(indexes.values())) / (5 * len(indexes)))
+    return index, level(index), indexes
@@ -1,6 +1,9 @@
 """Test integration setup process."""
 
 # pylint: disable=redefined-outer-name,protected-access
+import tracemalloc
+from datetime import timedelta
+
 import pytest
 from homeassistant.const import (
     ATTR_UNIT_OF_MEASUREMENT,
@@ -10,8 +13,15 @@ from homeassistant.const import (
     UnitOfTemperature,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import issue_registry as ir
 from homeassistant.setup import async_setup_component
-from pytest_homeassistant_custom_component.common import assert_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    assert_setup_component,
+    async_capture_events,
+    async_fire_time_changed,
+)
 from voluptuous import Invalid
 
 from custom_components.iaquk import (
@@ -20,8 +30,11 @@ from custom_components.iaquk import (
     ATTR_SOURCES_USED,
     CONF_CO,
     CONF_CO2,
+    CONF_DESPIKE,
     CONF_HCHO,
     CONF_HUMIDITY,
+    CONF_HYSTERESIS,
+    CONF_MAX_AGE,
     CONF_NO2,
     CONF_PM,
     CONF_RADON,
@@ -30,6 +43,13 @@ from custom_components.iaquk import (
     CONF_TVOC,
     CONF_VOC_INDEX,
     DOMAIN,
+    EVENT_LEVEL_CHANGED,
+    IAQ_SCHEMA,
+    IaqukController,
+    _deslugify,
+    check_voc_keys,
+)
+from custom_components.iaquk.const import (
     LEVEL_EXCELLENT,
     LEVEL_FAIR,
     LEVEL_GOOD,
@@ -40,12 +60,13 @@ from custom_components.iaquk import (
     MWEIGTH_HCHO,
     MWEIGTH_NO2,
     MWEIGTH_TVOC,
+    UNIT_MGM3,
+    UNIT_PPB,
     UNIT_PPM,
-    IaqukController,
-    _deslugify,
-    check_voc_keys,
+    UNIT_UGM3,
 )
-from custom_components.iaquk.const import UNIT_MGM3, UNIT_PPB, UNIT_UGM3
+from custom_components.iaquk.core import BANDS, LEVEL_BANDS, apply_hysteresis
+from custom_components.iaquk.health import BACKOFF_MIN, QUARANTINE_THRESHOLD
 
 
 async def async_mock_sensors(hass: HomeAssistant):
@@ -115,6 +136,87 @@ async def test_async_setup(hass: HomeAssistant):
     await hass.async_block_till_done()
 
 
+async def test_calculate_service(hass: HomeAssistant):
+    """Test calculation of IAQ index for raw values."""
+    with assert_setup_component(1, DOMAIN):
+        await async_setup_component(
+            hass,
+            DOMAIN,
+            {DOMAIN: {"test": {CONF_SOURCES: {CONF_CO2: "sensor.test_co2"}}}},
+        )
+        await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "calculate",
+        {
+            CONF_SOURCES: {
+                CONF_TEMPERATURE: {"value": 62.6, "unit": UnitOfTemperature.FAHRENHEIT},
+                CONF_HUMIDITY: 50,
+                CONF_CO2: {"value": 0.8, "unit": "mg/m³"},
+                CONF_PM: [10, {"value": 0.04, "unit": "mg/m³"}],
+            }
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        "iaq_index": 55,
+        "iaq_level": LEVEL_GOOD,
+        "sources_used": 4,
+        "temperature_index": 4,
+        "humidity_index": 5,
+        "co2_index": 5,
+        "pm_index": 3,
+    }
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "calculate",
+        {"samples": [{CONF_CO2: 2000}, {CONF_RADON: 0, CONF_PM: []}]},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        "results": [
+            {
+                "iaq_index": 13,
+                "iaq_level": LEVEL_INADEQUATE,
+                "sources_used": 1,
+                "co2_index": 1,
+            },
+            {
+                "iaq_index": 65,
+                "iaq_level": LEVEL_EXCELLENT,
+                "sources_used": 1,
+                "radon_index": 5,
+            },
+        ]
+    }
+
+    for sources in [
+        {CONF_TEMPERATURE: {"value": 20, "unit": "ppm"}},
+        {CONF_HUMIDITY: {"value": 20, "unit": "ppm"}},
+    ]:
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                "calculate",
+                {CONF_SOURCES: sources},
+                blocking=True,
+                return_response=True,
+            )
+
+    with pytest.raises(Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            "calculate",
+            {CONF_SOURCES: {CONF_CO2: 500}, "samples": [{CONF_CO2: 500}]},
+            blocking=True,
+            return_response=True,
+        )
+
+
 async def test_controller_init(hass: HomeAssistant):
     """Test controller initialization."""
     controller = IaqukController(hass, "test", "Test", {"": "sensor.test_monitored"})
@@ -214,6 +316,210 @@ async def test_update(hass: HomeAssistant):
     assert controller.state_attributes == expected_attributes
 
 
+async def test_despike(hass: HomeAssistant):
+    """Test despiking of noisy sources."""
+    await async_mock_sensors(hass)
+
+    entity_id = "sensor.test_monitored"
+
+    _ = IAQ_SCHEMA({CONF_SOURCES: {CONF_CO2: entity_id}, CONF_DESPIKE: {CONF_CO2: 5}})
+    with pytest.raises(Invalid):
+        _ = IAQ_SCHEMA(
+            {CONF_SOURCES: {CONF_CO2: entity_id}, CONF_DESPIKE: {CONF_CO2: 2}}
+        )
+    controller = IaqukController(
+        hass, "test", "Test", {CONF_CO2: entity_id}, {CONF_DESPIKE: {CONF_CO2: 3}}
+    )
+
+    for value, expected in [(500, 5), (550, 5), (2000, 5), (900, 3), (1000, 3)]:
+        hass.states.async_set(entity_id, value, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+        controller.update()
+        assert controller._co2_index == expected
+
+    # Re-reading the same state does not add samples
+    hass.states.async_set(entity_id, 2000, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    for _ in range(3):
+        assert controller._co2_index == 3
+    assert len(controller._filters[entity_id]) == 3
+
+    controller = IaqukController(
+        hass, "test", "Test", {CONF_PM: [entity_id]}, {CONF_DESPIKE: {CONF_CO2: 3}}
+    )
+    hass.states.async_set(entity_id, 100, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"})
+    assert controller._pm_index == 1
+    assert controller._filters == {}
+
+
+async def test_hysteresis(hass: HomeAssistant):
+    """Test hysteresis of source and level bands."""
+    await async_mock_sensors(hass)
+
+    entity_id = "sensor.test_monitored"
+    controller = IaqukController(
+        hass,
+        "test",
+        "Test",
+        {CONF_CO2: entity_id},
+        {CONF_HYSTERESIS: {CONF_CO2: 50, "iaq_level": 2}},
+    )
+
+    for value, expected in [(700, 4), (590, 4), (540, 5), (620, 5), (660, 4)]:
+        hass.states.async_set(entity_id, value, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+        controller.update()
+        assert controller._co2_index == expected
+
+    assert apply_hysteresis(52, LEVEL_BANDS, None, 2) == LEVEL_GOOD
+    assert apply_hysteresis(52, LEVEL_BANDS, LEVEL_FAIR, 2) == LEVEL_FAIR
+    assert apply_hysteresis(54, LEVEL_BANDS, LEVEL_FAIR, 2) == LEVEL_GOOD
+    assert apply_hysteresis(50, LEVEL_BANDS, LEVEL_GOOD, 2) == LEVEL_GOOD
+    assert apply_hysteresis(20, LEVEL_BANDS, LEVEL_GOOD, 2) == LEVEL_INADEQUATE
+    assert apply_hysteresis(0.1, BANDS[CONF_TVOC], 5, None) == 4
+
+
+async def test_max_age(hass: HomeAssistant, freezer):
+    """Test stale sources are treated as unavailable."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_humidity", 50, {ATTR_UNIT_OF_MEASUREMENT: "%"})
+    config = {
+        "test": {
+            CONF_SOURCES: {
+                CONF_CO2: "sensor.test_co2",
+                CONF_HUMIDITY: "sensor.test_humidity",
+            },
+            CONF_MAX_AGE: {CONF_CO2: {"minutes": 5}, CONF_HUMIDITY: {"minutes": 10}},
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    controller = hass.data[DOMAIN]["test"]
+    assert controller.indexes == {CONF_CO2: 5, CONF_HUMIDITY: 5}
+
+    now = dt_util.utcnow()
+    for minutes, expected in [(4, 2), (6, 1), (11, 0)]:
+        freezer.move_to(now + timedelta(minutes=minutes))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        assert len(controller.indexes) == expected
+
+    assert controller.iaq_index is None
+    assert controller.iaq_level is None
+    assert controller.state_attributes[ATTR_SOURCES_USED] == 0
+
+    hass.states.async_set("sensor.test_co2", 510, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+    assert controller.iaq_index == 65
+
+
+async def test_failing_source(hass: HomeAssistant, freezer, caplog):
+    """Test quarantine of sources which keep failing."""
+    entity_id = "sensor.test_monitored"
+    controller = IaqukController(
+        hass, "test", "Test", {CONF_CO2: entity_id, CONF_HUMIDITY: entity_id + "2"}
+    )
+    hass.states.async_set(entity_id + "2", 50, {ATTR_UNIT_OF_MEASUREMENT: PERCENTAGE})
+    issue_id = "source_failing_test_co2"
+    registry = ir.async_get(hass)
+
+    # Unavailable states between failures do not reset the count
+    for i in range(QUARANTINE_THRESHOLD):
+        hass.states.async_set(entity_id, STATE_UNAVAILABLE)
+        controller.update()
+        hass.states.async_set(entity_id, f"bad{i}", {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+        controller.update()
+    assert controller.indexes == {CONF_HUMIDITY: 5}
+    assert controller.source_health[CONF_CO2]["failures"] == QUARANTINE_THRESHOLD
+    assert caplog.text.count("Traceback") == 1
+    assert registry.async_get_issue(DOMAIN, issue_id) is not None
+
+    # Quarantined source is not read at all
+    hass.states.async_set(entity_id, 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    controller.update()
+    assert controller.indexes == {CONF_HUMIDITY: 5}
+
+    freezer.tick(BACKOFF_MIN)
+    controller.update()
+    assert controller.indexes == {CONF_HUMIDITY: 5, CONF_CO2: 5}
+    assert controller.source_health == {}
+    assert registry.async_get_issue(DOMAIN, issue_id) is None
+
+
+async def test_memory_per_room(hass: HomeAssistant, record_property):
+    """Test memory footprint of controllers."""
+    rooms = 1000
+    configs = [
+        (
+            f"room_{i}",
+            f"Room {i}",
+            {CONF_CO2: f"sensor.co2_{i}", CONF_PM: [f"sensor.pm_{i}"]},
+        )
+        for i in range(rooms)
+    ]
+    # States belong to Home Assistant, so they are set before measuring
+    for i in range(rooms):
+        hass.states.async_set(
+            f"sensor.co2_{i}", 400 + i, {ATTR_UNIT_OF_MEASUREMENT: "ppm"}
+        )
+        hass.states.async_set(
+            f"sensor.pm_{i}", i % 100, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"}
+        )
+
+    # Rooms are measured as they live: updated and with built attributes
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    controllers = []
+    for config in configs:
+        controller = IaqukController(hass, *config)
+        controller.update()
+        assert controller.state_attributes
+        controllers.append(controller)
+    per_room = (tracemalloc.get_traced_memory()[0] - before) / rooms
+    tracemalloc.stop()
+
+    record_property("bytes_per_room", per_room)
+    assert all(len(controller.indexes) == 2 for controller in controllers)
+    # About 1 KiB per updated room
+    assert per_room < 1536
+
+
+async def test_level_changed_event(hass: HomeAssistant):
+    """Test firing of IAQ level transition events."""
+    await async_mock_sensors(hass)
+    events = async_capture_events(hass, EVENT_LEVEL_CHANGED)
+
+    entity_id = "sensor.test_monitored"
+    controller = IaqukController(
+        hass, "test", "Test", {CONF_HUMIDITY: entity_id, CONF_CO2: entity_id + "2"}
+    )
+
+    hass.states.async_set(entity_id, 50, {ATTR_UNIT_OF_MEASUREMENT: PERCENTAGE})
+    hass.states.async_set(entity_id + "2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    controller.update()
+    await hass.async_block_till_done()
+    assert controller.iaq_level == LEVEL_EXCELLENT
+    assert events == []
+
+    hass.states.async_set(entity_id + "2", 550, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    controller.update()
+    await hass.async_block_till_done()
+    assert events == []
+
+    hass.states.async_set(entity_id + "2", 1600, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    controller.update()
+    await hass.async_block_till_done()
+    assert controller.iaq_level == LEVEL_FAIR
+    assert len(events) == 1
+    assert events[0].data == {
+        "room": "test",
+        "old_level": LEVEL_EXCELLENT,
+        "new_level": LEVEL_FAIR,
+        "index": 45,
+        "source": CONF_CO2,
+    }
+
+
 async def test__has_state():
     """Test state detection."""
     assert IaqukController._has_state(None) is False
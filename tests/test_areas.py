@@ -0,0 +1,174 @@
+"""The test for the IAQ UK discovery of sources in areas."""
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, CONF_SENSORS
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.iaquk.areas import AreaIndex
+from custom_components.iaquk.const import (
+    ATTR_SOURCES_SET,
+    CONF_AREA,
+    CONF_AREAS,
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_PM,
+    CONF_RADON,
+    CONF_SETTINGS,
+    CONF_SOURCES,
+    CONF_TEMPERATURE,
+    DATA_AREA_INDEX,
+    DOMAIN,
+    SENSOR_INDEX,
+)
+
+
+async def test_area_index(hass: HomeAssistant):
+    """Test index of sources is updated on registries changes."""
+    areas = ar.async_get(hass)
+    for name in ("Kitchen", "Bedroom", "Hall"):
+        areas.async_create(name)
+    entry = MockConfigEntry(domain="test")
+    entry.add_to_hass(hass)
+    device = dr.async_get(hass).async_get_or_create(
+        config_entry_id=entry.entry_id, identifiers={("test", "monitor")}
+    )
+    dr.async_get(hass).async_update_device(device.id, area_id="kitchen")
+
+    entities = er.async_get(hass)
+    for unique_id, device_class, unit in (
+        ("co2", SensorDeviceClass.CO2, "ppm"),
+        ("pm25", SensorDeviceClass.PM25, "µg/m³"),
+        ("pm10", SensorDeviceClass.PM10, "µg/m³"),
+        ("radon", None, "Bq/m3"),
+        ("power", SensorDeviceClass.POWER, "W"),
+    ):
+        entities.async_get_or_create(
+            "sensor",
+            "test",
+            unique_id,
+            device_id=device.id,
+            original_device_class=device_class,
+            unit_of_measurement=unit,
+            suggested_object_id=unique_id,
+        )
+    entities.async_get_or_create(
+        "sensor",
+        "test",
+        "temperature",
+        device_id=device.id,
+        original_device_class=SensorDeviceClass.TEMPERATURE,
+        suggested_object_id="temperature",
+    )
+    entities.async_update_entity("sensor.temperature", area_id="bedroom")
+
+    index = AreaIndex(hass)
+    index.async_start()
+    assert index.sources("kitchen") == {
+        CONF_CO2: "sensor.co2",
+        CONF_PM: ["sensor.pm10", "sensor.pm25"],
+        CONF_RADON: "sensor.radon",
+    }
+    assert index.sources("bedroom") == {CONF_TEMPERATURE: "sensor.temperature"}
+
+    changed = []
+    for area_id in ("kitchen", "bedroom", "hall"):
+        index.async_add_listener(
+            area_id, lambda area_id=area_id: changed.append(area_id)
+        )
+
+    # Entities follow their device unless they have own area
+    dr.async_get(hass).async_update_device(device.id, area_id="hall")
+    await hass.async_block_till_done()
+    assert sorted(changed) == ["hall", "kitchen"]
+    assert index.sources("kitchen") == {}
+    assert CONF_CO2 in index.sources("hall")
+    assert index.sources("bedroom") == {CONF_TEMPERATURE: "sensor.temperature"}
+
+    changed.clear()
+    entities.async_update_entity(
+        "sensor.power", device_class=SensorDeviceClass.HUMIDITY
+    )
+    entities.async_remove("sensor.radon")
+    entities.async_update_entity("sensor.temperature", area_id=None)
+    await hass.async_block_till_done()
+    assert sorted(changed) == ["bedroom", "hall", "hall", "hall"]
+    assert index.sources("hall") == {
+        CONF_CO2: "sensor.co2",
+        CONF_HUMIDITY: "sensor.power",
+        CONF_PM: ["sensor.pm10", "sensor.pm25"],
+        CONF_TEMPERATURE: "sensor.temperature",
+    }
+
+    index.async_shutdown()
+    entities.async_remove("sensor.co2")
+    await hass.async_block_till_done()
+    assert CONF_CO2 in index.sources("hall")
+
+
+async def test_rooms_by_area(hass: HomeAssistant):
+    """Test rooms defined by areas follow entities of their areas."""
+    ar.async_get(hass).async_create("Kitchen")
+    ar.async_get(hass).async_create("Living Room")
+    entities = er.async_get(hass)
+    entities.async_get_or_create(
+        "sensor",
+        "test",
+        "kitchen_co2",
+        original_device_class=SensorDeviceClass.CO2,
+        suggested_object_id="kitchen_co2",
+    )
+    entities.async_update_entity("sensor.kitchen_co2", area_id="kitchen")
+    hass.states.async_set("sensor.kitchen_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.living_humidity", 50, {ATTR_UNIT_OF_MEASUREMENT: "%"})
+
+    config = {
+        CONF_SETTINGS: {CONF_AREAS: ["kitchen", "living_room"]},
+        # Explicit sources take precedence over found ones
+        "living_room": {
+            CONF_AREA: "living_room",
+            CONF_SOURCES: {CONF_HUMIDITY: "sensor.living_humidity"},
+            CONF_SENSORS: [SENSOR_INDEX],
+        },
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    assert DATA_AREA_INDEX in hass.data
+    assert list(hass.data[DOMAIN]) == ["living_room", "kitchen"]
+    state = hass.states.get("sensor.kitchen_iaq_index")
+    assert state.state == "65"
+    assert state.attributes["friendly_name"] == "Kitchen Indoor Air Quality Index"
+    state = hass.states.get("sensor.living_room_iaq_index")
+    assert state.state == "65"
+    assert state.attributes[ATTR_SOURCES_SET] == 1
+
+    # New entity of area becomes a source of room at once
+    entities.async_get_or_create(
+        "sensor",
+        "test",
+        "living_temperature",
+        original_device_class=SensorDeviceClass.TEMPERATURE,
+        suggested_object_id="living_temperature",
+    )
+    hass.states.async_set(
+        "sensor.living_temperature", 40, {ATTR_UNIT_OF_MEASUREMENT: "°C"}
+    )
+    entities.async_update_entity("sensor.living_temperature", area_id="living_room")
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.living_room_iaq_index")
+    assert state.state == "39"
+    assert state.attributes[ATTR_SOURCES_SET] == 2
+
+    hass.states.async_set(
+        "sensor.living_temperature", 20, {ATTR_UNIT_OF_MEASUREMENT: "°C"}
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.living_room_iaq_index").state == "65"
@@ -0,0 +1,132 @@
+"""The test for the IAQ UK config entries."""
+
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, CONF_NAME, CONF_SENSORS
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.iaquk.const import (
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_SOURCES,
+    CONF_TVOC,
+    CONF_VOC_INDEX,
+    DOMAIN,
+    SENSOR_INDEX,
+    SENSOR_LEVEL,
+)
+
+
+async def test_user_flow(hass: HomeAssistant):
+    """Test room creation."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            CONF_NAME: "Living Room",
+            CONF_TVOC: "sensor.test_tvoc",
+            CONF_VOC_INDEX: "sensor.test_voc_index",
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_sources"}
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            CONF_NAME: "Living Room",
+            CONF_CO2: "sensor.test_co2",
+            CONF_SENSORS: [SENSOR_INDEX],
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert result["title"] == "Living Room"
+    assert result["result"].unique_id == "living_room"
+    assert result["options"] == {
+        CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+        CONF_SENSORS: [SENSOR_INDEX],
+    }
+
+
+async def test_room_reload(hass: HomeAssistant):
+    """Test room from config entry is set up and reloaded alone."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_humidity", 50, {ATTR_UNIT_OF_MEASUREMENT: "%"})
+    config = {"hall": {CONF_SOURCES: {CONF_CO2: "sensor.test_co2"}}}
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+    hall = hass.data[DOMAIN]["hall"]
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Kitchen",
+        unique_id="kitchen",
+        options={
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_INDEX],
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.kitchen_iaq_index").state == "65"
+
+    # Room added after start tracks its sources at once
+    hass.states.async_set("sensor.test_co2", 1000, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.kitchen_iaq_index").state == "39"
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            CONF_CO2: "sensor.test_co2",
+            CONF_HUMIDITY: "sensor.test_humidity",
+            CONF_SENSORS: [SENSOR_INDEX, SENSOR_LEVEL],
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    kitchen = hass.data[DOMAIN]["kitchen"]
+    assert kitchen.indexes == {CONF_CO2: 3, CONF_HUMIDITY: 5}
+    assert hass.states.get("sensor.kitchen_iaq_level").state == "Good"
+    assert hass.data[DOMAIN]["hall"] is hall
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert list(hass.data[DOMAIN]) == ["hall"]
+
+    # Unloaded room does not track its sources anymore
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+    assert kitchen.indexes == {CONF_CO2: 3, CONF_HUMIDITY: 5}
+    assert hall.indexes == {CONF_CO2: 5}
+
+
+async def test_room_duplicate(hass: HomeAssistant):
+    """Test room from config entry does not replace room from YAML."""
+    config = {"kitchen": {CONF_SOURCES: {CONF_CO2: "sensor.test_co2"}}}
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    kitchen = hass.data[DOMAIN]["kitchen"]
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Kitchen",
+        unique_id="kitchen",
+        options={CONF_SOURCES: {CONF_HUMIDITY: "sensor.test_humidity"}},
+    )
+    entry.add_to_hass(hass)
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is config_entries.ConfigEntryState.SETUP_ERROR
+    assert hass.data[DOMAIN]["kitchen"] is kitchen
@@ -0,0 +1,128 @@
+"""The test for the IAQ UK core."""
+
+import math
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from custom_components.iaquk.core import (
+    BANDS,
+    BOUNDARIES,
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_PM,
+    CONF_TEMPERATURE,
+    CONF_TVOC,
+    LEVEL_EXCELLENT,
+    LEVEL_GOOD,
+    PROFILE_EPA,
+    PROFILE_RESET,
+    PROFILES,
+    band_table,
+    base_unit,
+    convert_source,
+    iaq_index,
+    next_boundary,
+    score,
+    temperature_celsius,
+)
+
+CORE_DIR = Path(__file__).parents[1] / "custom_components" / "iaquk"
+
+
+def test_convert_source():
+    """Test conversion of raw source values to base units."""
+    assert base_unit(CONF_TEMPERATURE) == "°C"
+    assert base_unit(CONF_CO2) == "ppm"
+
+    assert convert_source(CONF_TEMPERATURE, 68, "°F") == pytest.approx(20)
+    assert convert_source(CONF_CO2, "0.6", "ppb") == pytest.approx(0.0006)
+    assert convert_source(CONF_TVOC, 1000, "µg/m³") is not None
+    assert convert_source(CONF_HUMIDITY, 50, "ppm") is None
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        temperature_celsius(20, "K")
+
+
+def test_score():
+    """Test IAQ index and level calculation."""
+    assert iaq_index([]) is None
+    assert score({}) == (None, None, {})
+    assert score({CONF_CO2: None}).index is None
+
+    result = score({CONF_HUMIDITY: 50, CONF_CO2: 400, CONF_TEMPERATURE: 20})
+    assert result.indexes == {CONF_HUMIDITY: 5, CONF_CO2: 5, CONF_TEMPERATURE: 5}
+    assert result.index == 65
+    assert result.level == LEVEL_EXCELLENT
+
+    result = score({CONF_CO2: 800})
+    assert result.index == 52
+    assert result.level == LEVEL_GOOD
+
+
+def test_band_table():
+    """Test bands with open and closed edges."""
+    table = band_table(
+        ("<", 0, "below"), ("<=", 0, "zero"), ("<", 7, "low"), above="high"
+    )
+    assert table.edges == (0, 0, 7)
+    assert [table(value) for value in (-1, 0, 6.9, 7, 8)] == [
+        "below",
+        "zero",
+        "low",
+        "high",
+        "high",
+    ]
+    assert table(math.nan) == "high"
+    assert table(-math.inf) == "below"
+
+
+def test_profiles():
+    """Test scoring of additional profiles by the worst source."""
+    values = {CONF_CO2: 500, CONF_PM: 20, CONF_HUMIDITY: 50}
+    assert score(values, PROFILES[PROFILE_RESET]) == (
+        2,
+        "Acceptable",
+        {CONF_CO2: 3, CONF_PM: 2},
+    )
+    assert score(values, PROFILES[PROFILE_EPA]) == (5, "Moderate", {CONF_PM: 5})
+    assert score({CONF_CO2: 500}, PROFILES[PROFILE_EPA]) == (None, None, {})
+
+
+def test_next_boundary():
+    """Test boundaries of bands in direction of trend."""
+    for src, boundaries in BOUNDARIES.items():
+        band = BANDS[src]
+        for boundary in boundaries:
+            delta = boundary / 1000
+            assert band(boundary - delta) != band(boundary + delta), (src, boundary)
+
+    assert next_boundary(CONF_CO2, 700, 1) == 800
+    assert next_boundary(CONF_CO2, 700, -1) == 600
+    assert next_boundary(CONF_CO2, 500, -1) is None
+    # Band changes right after closed edge and at open edge
+    assert next_boundary(CONF_CO2, 800, 1) == 800
+    assert next_boundary(CONF_CO2, 800, -1) == 600
+    assert next_boundary(CONF_CO2, 600, 1) == 800
+    assert next_boundary(CONF_CO2, 600, -1) == 600
+    assert next_boundary(CONF_CO2, 2000, 1) is None
+    assert next_boundary(CONF_CO2, 700, 0) is None
+
+
+def test_standalone_import():
+    """Test core loads without Home Assistant in milliseconds."""
+    code = (
+        "import sys, time\n"
+        f"sys.path.insert(0, {str(CORE_DIR)!r})\n"
+        "start = time.perf_counter()\n"
+        "import core\n"
+        "print(time.perf_counter() - start)\n"
+        "assert 'homeassistant' not in sys.modules\n"
+        "assert 'voluptuous' not in sys.modules\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert float(result.stdout) < 0.5
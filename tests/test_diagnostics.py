@@ -0,0 +1,53 @@
+"""The test for the IAQ UK diagnostics."""
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, PERCENTAGE
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.iaquk.const import (
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_SOURCES,
+    DOMAIN,
+)
+from custom_components.iaquk.diagnostics import async_get_config_entry_diagnostics
+
+
+async def test_diagnostics(hass: HomeAssistant):
+    """Test diagnostics show health of sources of each room."""
+    hass.states.async_set("sensor.test_co2", "bad", {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set(
+        "sensor.test_humidity", 50, {ATTR_UNIT_OF_MEASUREMENT: PERCENTAGE}
+    )
+    config = {
+        "hall": {
+            CONF_SOURCES: {
+                CONF_CO2: "sensor.test_co2",
+                CONF_HUMIDITY: "sensor.test_humidity",
+            }
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Kitchen",
+        unique_id="kitchen",
+        options={CONF_SOURCES: {CONF_HUMIDITY: "sensor.test_humidity"}},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    result = await async_get_config_entry_diagnostics(hass, entry)
+    assert result["entry"] == {
+        "title": "Kitchen",
+        "options": {CONF_SOURCES: {CONF_HUMIDITY: "sensor.test_humidity"}},
+    }
+    hall = result["rooms"]["hall"]
+    assert hall["indexes"] == {CONF_HUMIDITY: 5}
+    assert hall["source_health"][CONF_CO2]["failures"] == 1
+    assert hall["source_health"][CONF_CO2]["error"]
+    assert result["rooms"]["kitchen"]["source_health"] == {}
@@ -0,0 +1,162 @@
+"""
+The test of IAQ UK scoring engines against the reference model.
+
+Number of random inputs is set by IAQUK_EQUIVALENCE_SAMPLES environment
+variable, e.g. run with 1000000 before merging changes of thresholds or units
+conversion. IAQUK_EQUIVALENCE_SEED reproduces a failed run.
+"""
+
+# pylint: disable=redefined-outer-name,protected-access
+import math
+import os
+import random
+from collections.abc import Callable, Iterator, Mapping, Sequence
+
+import pytest
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import HomeAssistant
+
+from custom_components.iaquk import IaqukController
+from custom_components.iaquk.core import (
+    SOURCES,
+    SOURCES_LISTS,
+    Score,
+    convert_source,
+    score,
+)
+
+from . import reference
+
+SAMPLES = int(os.environ.get("IAQUK_EQUIVALENCE_SAMPLES", "1000"))
+SEED = int(os.environ.get("IAQUK_EQUIVALENCE_SEED", "0"))
+
+Readings = Mapping[str, Sequence[tuple[str, str | None]]]
+Engine = Callable[[Readings], tuple]
+
+# Units which sensors report; most of them are wrong for any given source
+UNITS = [
+    None,
+    "ppm",
+    "ppb",
+    "µg/m³",
+    "µg/m3",
+    "ug/m^3",
+    "mg/m³",
+    "mg/m3",
+    "%",
+    "Bq/m3",
+    "°C",
+    "°F",
+    "K",
+]
+
+SPECIAL_STATES = ["0", "-0.0", "1e-300", "-1", "nan", "inf", "-inf"]
+
+
+def core_engine(readings: Readings) -> Score:
+    """Calculate IAQ index by functions of the core module."""
+    values = {}
+    for src, src_readings in readings.items():
+        converted = [
+            value
+            for state, unit in src_readings
+            if (value := convert_source(src, state, unit)) is not None
+        ]
+        values[src] = sum(converted) if converted else None
+    return score(values)
+
+
+@pytest.fixture(params=["core", "controller"])
+def engine(request: pytest.FixtureRequest, hass: HomeAssistant) -> Engine:
+    """Return engine to check."""
+    if request.param == "core":
+        return core_engine
+
+    def controller_engine(readings: Readings) -> tuple:
+        """Calculate IAQ index by a new controller from states of entities."""
+        sources = {}
+        for src, src_readings in readings.items():
+            ids = [f"sensor.{src}_{i}" for i in range(len(src_readings))]
+            for entity_id, (state, unit) in zip(ids, src_readings, strict=True):
+                attributes = {ATTR_UNIT_OF_MEASUREMENT: unit} if unit else {}
+                hass.states.async_set(entity_id, state, attributes)
+            sources[src] = ids if src in SOURCES_LISTS else ids[0]
+
+        controller = IaqukController(hass, "equivalence", "Equivalence", sources)
+        controller.update()
+        return controller.iaq_index, controller.iaq_level, controller.indexes
+
+    return controller_engine
+
+
+def to_unit(src: str, value: float, unit: str | None) -> float:
+    """Return value in base units of source expressed in the unit."""
+    if src == "temperature":
+        return value * 1.8 + 32 if unit == "°F" else value
+    rate = reference.number(
+        "1", unit, reference.UNITS[src], reference.MWEIGHTS.get(src)
+    )
+    return value / rate if rate else value
+
+
+def source_units(src: str) -> list[str | None]:
+    """Return units in which source values are accepted."""
+    return [unit for unit in UNITS if reference.points(src, [("1", unit)]) is not None]
+
+
+def boundary_grid() -> Iterator[tuple[str, str, str | None]]:
+    """Yield states at and next to each edge of bands in each accepted unit."""
+    for src, edges in reference.EDGES.items():
+        for edge in edges:
+            for unit in source_units(src):
+                value = to_unit(src, edge, unit)
+                values = {value, value * (1 - 1e-9), value * (1 + 1e-9)}
+                below = above = value
+                for _ in range(2):
+                    below = math.nextafter(below, -math.inf)
+                    above = math.nextafter(above, math.inf)
+                    values.update((below, above))
+                for val in values:
+                    yield src, repr(val), unit
+                if value == int(value):
+                    yield src, str(int(value)), unit
+
+
+def random_readings(rnd: random.Random) -> dict[str, list[tuple[str, str | None]]]:
+    """Return random states of random sources."""
+    readings = {}
+    for src in rnd.sample(SOURCES, rnd.randint(1, len(SOURCES))):
+        src_readings = []
+        for _ in range(rnd.randint(1, 3) if src in SOURCES_LISTS else 1):
+            unit = rnd.choice(UNITS)
+            edges = reference.EDGES[src]
+            choice = rnd.random()
+            if choice < 0.1:
+                state = rnd.choice(SPECIAL_STATES)
+            elif choice < 0.6:
+                edge = to_unit(src, rnd.choice(edges), unit)
+                state = repr(edge + rnd.gauss(0, abs(edge) * 1e-6 or 1e-9))
+            else:
+                value = rnd.uniform(-0.1 * max(edges), 2 * max(edges))
+                state = repr(to_unit(src, value, unit))
+            src_readings.append((state, unit))
+        readings[src] = src_readings
+    return readings
+
+
+async def test_boundary_grid(engine: Engine):
+    """Test engine at the edges of bands of all sources and units."""
+    cases = 0
+    for src, state, unit in boundary_grid():
+        readings = {src: [(state, unit)]}
+        assert tuple(engine(readings)) == reference.score(readings), readings
+        cases += 1
+    assert cases > 1000
+
+
+async def test_random_inputs(engine: Engine):
+    """Test engine with random states, units and sets of sources."""
+    rnd = random.Random(SEED)
+    for _ in range(SAMPLES):
+        readings = random_readings(rnd)
+        assert tuple(engine(readings)) == reference.score(readings), readings
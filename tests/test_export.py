@@ -0,0 +1,75 @@
+"""The test for the IAQ UK snapshots export."""
+
+import json
+from datetime import timedelta
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, CONF_PATH
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.iaquk.const import (
+    CONF_CO2,
+    CONF_DESPIKE,
+    CONF_EXPORT,
+    CONF_SETTINGS,
+    CONF_SOURCES,
+    CONF_TEMPERATURE,
+    DATA_EXPORTER,
+    DOMAIN,
+    FORMAT_JSONL,
+)
+from custom_components.iaquk.export import SnapshotWriter
+
+
+def test_writer_rotation(tmp_path):
+    """Test files are rotated and only the newest ones are kept."""
+    writer = SnapshotWriter(tmp_path, FORMAT_JSONL, max_bytes=1, keep=2)
+    for room in ("a", "b", "c"):
+        writer.write([{"room": room}])
+    writer.close()
+
+    files = sorted(tmp_path.iterdir())
+    assert [path.read_text() for path in files] == [
+        '{"room":"b"}\n',
+        '{"room":"c"}\n',
+    ]
+
+
+async def test_export(hass: HomeAssistant, tmp_path):
+    """Test periodic snapshots of rooms."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        CONF_SETTINGS: {CONF_EXPORT: {CONF_PATH: str(tmp_path)}},
+        "kitchen": {
+            CONF_SOURCES: {
+                CONF_CO2: "sensor.test_co2",
+                CONF_TEMPERATURE: "sensor.test_temperature",
+            },
+            CONF_DESPIKE: {CONF_CO2: 3},
+        },
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=1, seconds=1))
+    await hass.async_block_till_done()
+    await hass.data[DATA_EXPORTER].async_shutdown()
+
+    (path,) = tmp_path.iterdir()
+    (row,) = [json.loads(line) for line in path.read_text().splitlines()]
+    assert row["room"] == "kitchen"
+    assert row["index"] == 65
+    assert row["level"] == "Excellent"
+    assert row["co2_index"] == 5
+    assert row["co2"] == 500
+    assert row["temperature_index"] is None
+    assert row["temperature"] is None
+    # Raw values of entities and options of room are exported for sweeps
+    assert row["co2_raw"] == [500]
+    assert row["temperature_raw"] == [None]
+    assert row["despike"] == {"co2": 3}
+    assert row["hysteresis"] is None
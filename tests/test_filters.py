@@ -0,0 +1,76 @@
+"""Test sliding window filters."""
+
+import random
+import statistics
+
+import pytest
+
+from custom_components.iaquk.filters import LinearTrend, SlidingMedian
+
+
+async def test_sliding_median():
+    """Test sliding window median."""
+    flt = SlidingMedian(3)
+
+    assert flt.median is None
+    assert len(flt) == 0
+
+    assert flt.push(400) == 400
+    assert flt.push(420) == 410
+    assert flt.push(5000) == 420
+    assert flt.push(430) == 430
+    assert flt.push(410) == 430
+    assert len(flt) == 3
+
+
+async def test_sliding_median_random():
+    """Test sliding window median against reference implementation."""
+    rnd = random.Random(42)
+    for window in (3, 4, 7, 50):
+        flt = SlidingMedian(window)
+        samples = []
+        for _ in range(2000):
+            value = float(rnd.randint(0, 20))
+            samples.append(value)
+            assert flt.push(value) == statistics.median(samples[-window:])
+
+
+async def test_sliding_median_memory():
+    """Test expired samples do not pile up in heaps."""
+    rnd = random.Random(7)
+    for series in (
+        [float(i) for i in range(100_000)],
+        [float(i % 100) for i in range(100_000)],
+        [rnd.random() for _ in range(100_000)],
+    ):
+        flt = SlidingMedian(5)
+        for pos, value in enumerate(series):
+            assert flt.push(value) == statistics.median(
+                series[max(0, pos - 4) : pos + 1]
+            )
+            assert len(flt._low) + len(flt._high) <= 10
+            assert len(flt._expired) <= 10
+
+
+async def test_linear_trend():
+    """Test exponentially weighted linear regression."""
+    trend = LinearTrend(900)
+    start = 1_700_000_000.0
+    trend.push(400, start)
+    assert trend.slope is None
+    assert trend.value is None
+
+    # Exact line is fitted whatever the weights are
+    for minute in range(1, 11):
+        trend.push(400 + 30 * minute, start + 60 * minute)
+    assert trend.slope == pytest.approx(0.5)
+    assert trend.value == pytest.approx(700)
+    assert trend.at == start + 600
+
+    trend.push(0, start)  # Out of order
+    assert trend.at == start + 600
+
+    # Old samples are forgotten in a few time constants
+    for minute in range(1, 121):
+        trend.push(700 - 10 * minute, start + 600 + 60 * minute)
+    assert trend.slope == pytest.approx(-1 / 6, rel=1e-2)
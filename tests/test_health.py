@@ -0,0 +1,48 @@
+"""The test for the IAQ UK sources health tracking."""
+
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.iaquk.health import (
+    BACKOFF_MAX,
+    BACKOFF_MIN,
+    QUARANTINE_THRESHOLD,
+    SourceHealth,
+)
+
+
+def test_backoff():
+    """Test exponential back-off of failing sources."""
+    health = SourceHealth()
+    now = dt_util.utcnow()
+    assert not health
+
+    for _ in range(QUARANTINE_THRESHOLD - 1):
+        health.failure("co2", ValueError("bad"), now)
+    assert health
+    assert health.skip_until("co2", now) is None
+
+    assert health.failure("co2", ValueError("bad"), now) == QUARANTINE_THRESHOLD
+    assert health.skip_until("co2", now) == now + BACKOFF_MIN
+    assert health.skip_until("co2", now + BACKOFF_MIN) is None
+
+    health.failure("co2", ValueError("bad"), now)
+    assert health.skip_until("co2", now) == now + BACKOFF_MIN * 2
+
+    for _ in range(20):
+        health.failure("co2", ValueError(), now)
+    assert health.skip_until("co2", now) == now + BACKOFF_MAX
+    assert health.as_dict() == {
+        "co2": {
+            "failures": QUARANTINE_THRESHOLD + 21,
+            "error": "ValueError",
+            "skip_until": (now + BACKOFF_MAX).isoformat(),
+        }
+    }
+
+    assert health.success("co2") is True
+    assert health.success("co2") is False
+    assert health.failures("co2") == 0
+    assert health.skip_until("co2", now - timedelta(days=1)) is None
+    assert not health
@@ -0,0 +1,100 @@
+"""The test for the IAQ UK history cache."""
+
+import json
+import math
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# pylint: disable=wrong-import-position
+from custom_components.iaquk.history import (  # noqa: E402
+    FILE_VALUE,
+    HistoryCache,
+    main,
+)
+
+SCHEMA = """
+CREATE TABLE states_meta (metadata_id INTEGER PRIMARY KEY, entity_id TEXT);
+CREATE TABLE state_attributes (attributes_id INTEGER PRIMARY KEY, shared_attrs TEXT);
+CREATE TABLE states (
+    state_id INTEGER PRIMARY KEY,
+    metadata_id INTEGER,
+    state TEXT,
+    attributes_id INTEGER,
+    last_updated_ts REAL
+);
+"""
+
+
+def record(database: Path, entity_id: str, states: list[tuple]) -> None:
+    """Add states (time, state, unit) of entity to recorder database."""
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.executescript(
+            SCHEMA.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS")
+        )
+        row = connection.execute(
+            "SELECT metadata_id FROM states_meta WHERE entity_id = ?", (entity_id,)
+        ).fetchone()
+        if row is None:
+            cursor = connection.execute(
+                "INSERT INTO states_meta (entity_id) VALUES (?)", (entity_id,)
+            )
+            row = (cursor.lastrowid,)
+        for time, state, unit in states:
+            attrs = {"unit_of_measurement": unit} if unit else {}
+            cursor = connection.execute(
+                "INSERT INTO state_attributes (shared_attrs) VALUES (?)",
+                (json.dumps(attrs),),
+            )
+            connection.execute(
+                "INSERT INTO states"
+                " (metadata_id, state, attributes_id, last_updated_ts)"
+                " VALUES (?, ?, ?, ?)",
+                (row[0], state, cursor.lastrowid, time),
+            )
+
+
+def test_update(tmp_path: Path):
+    """Test states are cached incrementally from recorder database."""
+    database = tmp_path / "home-assistant_v2.db"
+    record(
+        database,
+        "sensor.co2",
+        [(1, "unavailable", None), (2, "500", "ppm"), (3, "0.7", "mg/m³")],
+    )
+    record(database, "sensor.other", [(1, "1", "ppm"), (4, "2", "ppm")])
+    record(database, "sensor.co2", [(4, "600", "ppm")])
+
+    cache = HistoryCache(tmp_path / "cache")
+    assert cache.series("sensor.co2").times.size == 0
+    assert cache.update(database, ["sensor.co2"]) == 4
+
+    series = cache.series("sensor.co2")
+    assert isinstance(series.values, np.memmap)
+    assert series.times.tolist() == [1, 2, 3, 4]
+    assert np.isnan(series.values[[0, 2]]).all()
+    assert series.values[[1, 3]].tolist() == [500, 600]
+    assert series.unit == "ppm"
+
+    # Only new states are appended
+    record(database, "sensor.co2", [(5, "700", "ppm")])
+    assert cache.update(database, ["sensor.co2"]) == 1
+    assert cache.update(database, ["sensor.co2"]) == 0
+    assert cache.series("sensor.co2").values.tolist()[-2:] == [600, 700]
+
+    # Values of interrupted update are dropped
+    with (tmp_path / "cache" / "sensor.co2" / FILE_VALUE).open("ab") as file:
+        file.write(np.array([math.pi]).tobytes())
+    assert len(cache.series("sensor.co2").values) == 5
+    record(database, "sensor.co2", [(6, "800", "ppm")])
+    assert main([str(database), str(tmp_path / "cache"), "sensor.co2"]) == 0
+    series = cache.series("sensor.co2")
+    assert series.times.tolist()[-2:] == [5, 6]
+    assert series.values.tolist()[-2:] == [700, 800]
+
+    with pytest.raises(ValueError, match="Invalid entity ID"):
+        cache.series("../sensor.co2")
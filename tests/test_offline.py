@@ -0,0 +1,74 @@
+"""The test for the IAQ UK offline scoring tool."""
+
+import csv
+import subprocess
+import sys
+from pathlib import Path
+
+from custom_components.iaquk.core import CONF_CO2, CONF_HUMIDITY, CONF_PM, score
+from custom_components.iaquk.offline import align, main
+
+OFFLINE = Path(__file__).parents[1] / "custom_components" / "iaquk" / "offline.py"
+
+
+def test_align():
+    """Test alignment of source columns by timestamp."""
+    rows = [
+        {"timestamp": "1", "a": "1", "b": ""},
+        {"timestamp": "2", "a": "", "b": "5"},
+        {"timestamp": "2", "a": "2", "b": None},
+        {"timestamp": "3", "a": "unavailable", "b": ""},
+    ]
+    assert list(align(rows, "timestamp")) == [
+        ("1", {"a": "1"}),
+        ("2", {"a": "2", "b": "5"}),
+        ("3", {"a": None, "b": "5"}),
+    ]
+
+
+def test_main(tmp_path: Path):
+    """Test scoring of CSV export."""
+    source = tmp_path / "export.csv"
+    with source.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["timestamp", "hum", "co2", "pm25", "pm10"])
+        writer.writerow(["t1", "50", "", "10", "5"])
+        writer.writerow(["t2", "", "900000", "", "40"])
+        writer.writerow(["t3", "unknown", "", "", ""])
+
+    target = tmp_path / "scores.csv"
+    args = [str(source), "-o", str(target), "--chunk-size", "1", "--workers", "2"]
+    args += ["--map", "humidity=hum", "--map", "co2=co2", "--unit", "co2=ppb"]
+    args += ["--map", "pm=pm25", "--map", "pm=pm10"]
+    assert main(args) == 0
+
+    with target.open(newline="", encoding="utf-8") as file:
+        result = list(csv.DictReader(file))
+
+    expected = [
+        score({CONF_HUMIDITY: 50, CONF_PM: 15}),
+        score({CONF_HUMIDITY: 50, CONF_CO2: 900, CONF_PM: 50}),
+        score({CONF_CO2: 900, CONF_PM: 50}),
+    ]
+    assert [row["timestamp"] for row in result] == ["t1", "t2", "t3"]
+    assert [int(row["iaq_index"]) for row in result] == [e.index for e in expected]
+    assert [row["iaq_level"] for row in result] == [e.level for e in expected]
+    assert result[2]["humidity_index"] == ""
+    assert int(result[2]["co2_index"]) == expected[2].indexes[CONF_CO2]
+
+
+def test_script(tmp_path: Path):
+    """Test tool runs as script without Home Assistant."""
+    source = tmp_path / "export.csv"
+    source.write_text("timestamp,co2\nt1,400\n", encoding="utf-8")
+
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, str(OFFLINE), str(source), "--workers", "1"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines() == [
+        "timestamp,iaq_index,iaq_level,co2_index",
+        "t1,65,Excellent,5",
+    ]
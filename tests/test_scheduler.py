@@ -0,0 +1,139 @@
+"""The test for the IAQ UK update scheduler."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.iaquk import IaqukController
+from custom_components.iaquk.const import (
+    CONF_CO2,
+    CONF_DESPIKE,
+    CONF_SETTINGS,
+    CONF_SOURCES,
+    CONF_TICK,
+    DATA_SCHEDULER,
+    DOMAIN,
+)
+from custom_components.iaquk.scheduler import TimerWheel, UpdateScheduler
+
+
+async def test_batch(hass: HomeAssistant):
+    """Test dirty controllers are updated once per batch."""
+    scheduler = UpdateScheduler(hass)
+    controllers = [MagicMock(spec=IaqukController) for _ in range(2)]
+
+    for _ in range(5):
+        for controller in controllers:
+            scheduler.async_schedule(controller)
+    for controller in controllers:
+        controller.update.assert_not_called()
+
+    await hass.async_block_till_done()
+    for controller in controllers:
+        controller.update.assert_called_once()
+
+    scheduler.async_schedule(controllers[0])
+    await hass.async_block_till_done()
+    assert controllers[0].update.call_count == 2
+    assert controllers[1].update.call_count == 1
+
+
+async def test_tick(hass: HomeAssistant):
+    """Test dirty controllers are updated once per tick."""
+    scheduler = UpdateScheduler(hass, timedelta(seconds=10))
+    controller = MagicMock(spec=IaqukController)
+
+    scheduler.async_schedule(controller)
+    scheduler.async_schedule(controller)
+    await hass.async_block_till_done()
+    controller.update.assert_not_called()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+    await hass.async_block_till_done()
+    controller.update.assert_called_once()
+
+    scheduler.async_schedule(controller)
+    scheduler.async_shutdown()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=22))
+    await hass.async_block_till_done()
+    controller.update.assert_called_once()
+
+
+async def test_settings(hass: HomeAssistant):
+    """Test integration-wide settings."""
+    config = {
+        CONF_SETTINGS: {CONF_TICK: 5},
+        "test": {CONF_SOURCES: {CONF_CO2: "sensor.test_co2"}},
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+
+    assert hass.data[DATA_SCHEDULER].tick == timedelta(seconds=5)
+    assert list(hass.data[DOMAIN]) == ["test"]
+
+
+async def test_despike_batched(hass: HomeAssistant, freezer):
+    """Test every state change is a sample of despike filter."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        CONF_SETTINGS: {CONF_TICK: 5},
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_DESPIKE: {CONF_CO2: 3},
+        },
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    # Both changes are made before the batched update
+    for value in (2000, 2100):
+        freezer.tick(timedelta(seconds=1))
+        hass.states.async_set(
+            "sensor.test_co2", value, {ATTR_UNIT_OF_MEASUREMENT: "ppm"}
+        )
+        await hass.async_block_till_done()
+    freezer.tick(timedelta(seconds=5))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+
+    controller = hass.data[DOMAIN]["test"]
+    assert len(controller._filters["sensor.test_co2"]) == 3
+    assert controller.source_index(CONF_CO2) == 1
+
+
+async def test_timer_wheel(hass: HomeAssistant, freezer):
+    """Test deadlines served by timer wheel."""
+    now = dt_util.parse_datetime("2024-01-01 00:00:00+00:00")
+    freezer.move_to(now)
+    fired = []
+    wheel = TimerWheel(hass, fired.append, timedelta(seconds=10), slots=4)
+
+    wheel.async_schedule("a", now + timedelta(seconds=25))
+    wheel.async_schedule("b", now + timedelta(seconds=95))  # Next rounds
+    wheel.async_schedule("c", now + timedelta(seconds=15))
+    wheel.async_schedule("c", now + timedelta(seconds=55))  # Rescheduled
+    wheel.async_schedule("d", now + timedelta(seconds=15))
+    wheel.async_cancel("d")
+    wheel.async_schedule("e", now - timedelta(seconds=5))  # Already expired
+    assert len(wheel) == 4
+
+    for seconds, expected in [
+        (10, ["e"]),
+        (20, ["e"]),
+        (30, ["e", "a"]),
+        (60, ["e", "a", "c"]),
+        (100, ["e", "a", "c", "b"]),
+    ]:
+        freezer.move_to(now + timedelta(seconds=seconds))
+        async_fire_time_changed(hass, now + timedelta(seconds=seconds))
+        await hass.async_block_till_done()
+        assert fired == expected
+
+    assert len(wheel) == 0
@@ -1,14 +1,34 @@
 """Test sensor setup."""
 
+from datetime import timedelta
 from unittest.mock import patch
 
+import pytest
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.const import (
+    ATTR_DEVICE_CLASS,
+    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_SENSORS,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.setup import async_setup_component
-from pytest_homeassistant_custom_component.common import assert_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    assert_setup_component,
+    async_fire_time_changed,
+)
 
 from custom_components.iaquk import IaqukController
 from custom_components.iaquk.const import (
+    ATTR_MINUTES_TO_BOUNDARY,
+    ATTR_NEXT_BOUNDARY,
+    CONF_CO2,
+    CONF_MIN_WRITE_INTERVAL,
+    CONF_PM,
+    CONF_SIGNIFICANT_CHANGE,
+    CONF_SOURCES,
     DOMAIN,
     ICON_DEFAULT,
     ICON_EXCELLENT,
@@ -22,7 +42,12 @@ from custom_components.iaquk.const import (
     LEVEL_INADEQUATE,
     LEVEL_POOR,
 )
-from custom_components.iaquk.sensor import SENSOR_INDEX, SENSOR_LEVEL, IaqukSensor
+from custom_components.iaquk.sensor import (
+    SENSOR_INDEX,
+    SENSOR_LEVEL,
+    IaqukSensor,
+    IaqukSourceIndexSensor,
+)
 
 
 async def test_entity_initialization(hass: HomeAssistant):
@@ -35,7 +60,7 @@ async def test_entity_initialization(hass: HomeAssistant):
 
     assert entity.unique_id == "test_iaq_index"
     assert entity.name == "Test Indoor Air Quality Index"
-    assert entity.should_poll is True
+    assert entity.should_poll is False
     assert entity.available is True
     assert entity.device_class == SensorDeviceClass.AQI
     assert entity.state is None
@@ -49,7 +74,7 @@ async def test_entity_initialization(hass: HomeAssistant):
 
     assert entity.unique_id == "test_iaq_level"
     assert entity.name == "Test Indoor Air Quality Level"
-    assert entity.should_poll is True
+    assert entity.should_poll is False
     assert entity.available is True
     assert entity.device_class == "iaquk__level"
     assert entity.state is None
@@ -79,8 +104,277 @@ async def test_entity_initialization(hass: HomeAssistant):
             assert entity.icon == icon
 
 
+async def test_source_index_sensor(hass: HomeAssistant):
+    """Test sensor of a single source IAQ points."""
+    controller = IaqukController(hass, "test", "Test", {CONF_CO2: "sensor.test_co2"})
+
+    entity = IaqukSourceIndexSensor(controller, "co2_index", CONF_CO2)
+    entity.hass = hass
+
+    assert entity.unique_id == "test_co2_index"
+    assert entity.name == "Test CO2 Index"
+    assert entity.should_poll is False
+    assert entity.device_class is None
+    assert entity.state_class == SensorStateClass.MEASUREMENT
+    assert entity.icon == ICON_DEFAULT
+    assert entity.extra_state_attributes is None
+
+    assert entity._update_state() is False
+    assert entity.state is None
+
+    hass.states.async_set("sensor.test_co2", 700, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    controller.update()
+    assert entity._update_state() is True
+    assert entity.state == 4
+    assert entity._update_state() is False
+
+
+async def test_push_updates(hass: HomeAssistant):
+    """Test sensors are updated on source changes."""
+    hass.states.async_set("sensor.test_co2", 700, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_INDEX, SENSOR_LEVEL, "co2_index"],
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.test_iaq_index").state == "52"
+    assert hass.states.get("sensor.test_iaq_level").state == LEVEL_GOOD
+    assert hass.states.get("sensor.test_co2_index").state == "4"
+
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.test_iaq_index").state == "65"
+    assert hass.states.get("sensor.test_iaq_level").state == LEVEL_EXCELLENT
+    assert hass.states.get("sensor.test_co2_index").state == "5"
+
+    # Same IAQ points: attributes are not changed and sensors are not written
+    controller = hass.data[DOMAIN]["test"]
+    version = controller.version
+    attributes = controller.state_attributes
+    entity = hass.data["sensor"].get_entity("sensor.test_iaq_level")
+    with patch.object(entity, "async_write_ha_state") as write:
+        hass.states.async_set("sensor.test_co2", 510, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+        await hass.async_block_till_done()
+
+    assert controller.version == version
+    assert controller.state_attributes is attributes
+    write.assert_not_called()
+
+
+async def test_min_write_interval(hass: HomeAssistant, freezer):
+    """Test throttling of IAQ index writes."""
+    hass.states.async_set("sensor.test_co2", 400, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_pm", 5, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"})
+    config = {
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2", CONF_PM: "sensor.test_pm"},
+            CONF_SENSORS: [SENSOR_INDEX],
+            CONF_MIN_WRITE_INTERVAL: {"minutes": 5},
+            CONF_SIGNIFICANT_CHANGE: 10,
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    entity = hass.data["sensor"].get_entity("sensor.test_iaq_index")
+    assert "co2_index" in entity._unrecorded_attributes
+    assert "sources_used" not in entity._unrecorded_attributes
+    assert hass.states.get("sensor.test_iaq_index").state == "65"
+
+    async def set_states(co2, pm) -> None:
+        hass.states.async_set("sensor.test_co2", co2, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+        hass.states.async_set("sensor.test_pm", pm, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"})
+        await hass.async_block_till_done()
+
+    async def tick(minutes) -> None:
+        freezer.tick(timedelta(minutes=minutes))
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done()
+
+    # Small change is throttled and written at the end of the interval
+    await set_states(400, 30)
+    assert hass.states.get("sensor.test_iaq_index").state == "65"
+    await tick(4)
+    assert hass.states.get("sensor.test_iaq_index").state == "65"
+    await tick(1)
+    state = hass.states.get("sensor.test_iaq_index")
+    assert state.state == "58"
+    assert state.attributes["pm_index"] == 4
+
+    # Significant change is written at once
+    await set_states(1100, 30)
+    assert hass.states.get("sensor.test_iaq_index").state == "45"
+
+    # Missing index is written at once and cancels the trailing write
+    await set_states(1100, 5)
+    assert hass.states.get("sensor.test_iaq_index").state == "45"
+    await set_states(STATE_UNAVAILABLE, STATE_UNAVAILABLE)
+    assert hass.states.get("sensor.test_iaq_index").state == STATE_UNKNOWN
+    with patch.object(entity, "async_write_ha_state") as write:
+        await tick(5)
+    write.assert_not_called()
+
+
+async def test_throttled_attributes(hass: HomeAssistant, freezer):
+    """Test attributes of throttled IAQ index are written with its value."""
+    hass.states.async_set("sensor.test_co2", 400, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_pm", 5, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"})
+    config = {
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2", CONF_PM: "sensor.test_pm"},
+            CONF_SENSORS: [SENSOR_INDEX],
+            CONF_MIN_WRITE_INTERVAL: {"minutes": 5},
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_iaq_index")
+    assert state.state == "65"
+    assert state.attributes["co2_index"] == 5
+
+    # Changed sub-index does not write the throttled index
+    hass.states.async_set("sensor.test_co2", 1100, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+
+    assert hass.data[DOMAIN]["test"].iaq_index == 52
+    assert hass.states.get("sensor.test_iaq_index") == state
+
+    freezer.tick(timedelta(minutes=5))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_iaq_index")
+    assert state.state == "52"
+    assert state.attributes["co2_index"] == 3
+
+
 async def test_async_setup_platform(hass: HomeAssistant):
     """Test platform setup."""
     with assert_setup_component(1, "sensor"):
         await async_setup_component(hass, "sensor", {"sensor": {"platform": DOMAIN}})
         await hass.async_block_till_done()
+
+
+async def test_trend_sensor(hass: HomeAssistant, freezer):
+    """Test trend of source and time to the next band boundary."""
+    hass.states.async_set("sensor.test_co2", 600, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_INDEX, "co2_trend"],
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_co2_trend")
+    assert state.state == "unknown"
+    assert state.attributes[ATTR_UNIT_OF_MEASUREMENT] == "ppm/min"
+
+    for value in (620, 640, 660):
+        freezer.tick(timedelta(minutes=1))
+        hass.states.async_set(
+            "sensor.test_co2", value, {ATTR_UNIT_OF_MEASUREMENT: "ppm"}
+        )
+        await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_co2_trend")
+    assert float(state.state) == pytest.approx(20)
+    assert state.attributes[ATTR_NEXT_BOUNDARY] == 800
+    assert state.attributes[ATTR_MINUTES_TO_BOUNDARY] == 7
+
+    # Time to boundary is refreshed between samples
+    freezer.tick(timedelta(minutes=1))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.test_co2_trend")
+    assert state.attributes[ATTR_MINUTES_TO_BOUNDARY] == 6
+
+    # Index has not changed yet
+    assert hass.states.get("sensor.test_iaq_index").state == "52"
+
+
+async def test_profile_sensors(hass: HomeAssistant):
+    """Test sensors of additional profiles scored from the same values."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_pm", 20, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"})
+    config = {
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2", CONF_PM: ["sensor.test_pm"]},
+            CONF_SENSORS: [SENSOR_INDEX, "reset_index", "reset_level", "epa_level"],
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.test_iaq_index").state == "65"
+    state = hass.states.get("sensor.test_reset_index")
+    assert state.state == "2"
+    assert state.attributes["co2_index"] == 3
+    assert state.attributes["pm_index"] == 2
+    assert hass.states.get("sensor.test_reset_level").state == "Acceptable"
+    state = hass.states.get("sensor.test_epa_level")
+    assert state.state == "Moderate"
+    assert "co2_index" not in state.attributes
+    assert hass.states.get("sensor.test_epa_index") is None
+
+    hass.states.async_set("sensor.test_pm", 40, {ATTR_UNIT_OF_MEASUREMENT: "µg/m³"})
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_iaq_index").state == "58"
+    assert hass.states.get("sensor.test_reset_level").state == "Not acceptable"
+    state = hass.states.get("sensor.test_epa_level")
+    assert state.state == "Unhealthy for sensitive groups"
+
+    hass.states.async_set("sensor.test_pm", STATE_UNAVAILABLE)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_reset_level").state == "High performance"
+    assert hass.states.get("sensor.test_epa_level").state == STATE_UNKNOWN
+
+
+async def test_profile_sensors_pm25(hass: HomeAssistant):
+    """Test additional profiles rate PM2.5 only of all PM sources."""
+    pm25 = {ATTR_UNIT_OF_MEASUREMENT: "µg/m³", ATTR_DEVICE_CLASS: "pm25"}
+    pm10 = {ATTR_UNIT_OF_MEASUREMENT: "µg/m³", ATTR_DEVICE_CLASS: "pm10"}
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_pm25", 30, pm25)
+    hass.states.async_set("sensor.test_pm10", 40, pm10)
+    config = {
+        "test": {
+            CONF_SOURCES: {
+                CONF_CO2: "sensor.test_co2",
+                CONF_PM: ["sensor.test_pm25", "sensor.test_pm10"],
+            },
+            CONF_SENSORS: ["reset_level", "epa_level"],
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    # IAQ UK index rates the sum of 70 µg/m³, additional profiles 30 µg/m³
+    assert hass.data[DOMAIN]["test"].source_values[CONF_PM] == 70
+    assert hass.states.get("sensor.test_reset_level").state == "Acceptable"
+    assert hass.states.get("sensor.test_epa_level").state == "Moderate"
+
+    # PM is not rated if PM2.5 is not known
+    hass.states.async_set("sensor.test_pm25", STATE_UNAVAILABLE, pm25)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_reset_level").state == "High performance"
+    assert hass.states.get("sensor.test_epa_level").state == STATE_UNKNOWN
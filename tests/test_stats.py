@@ -0,0 +1,247 @@
+"""The test for the IAQ UK time-in-level and quantiles statistics."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, CONF_SENSORS
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.entity_component import async_update_entity
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.iaquk.const import (
+    ATTR_DAYS,
+    ATTR_MERGED,
+    ATTR_QUANTILES,
+    ATTR_ROOMS,
+    CONF_CO2,
+    CONF_QUANTILE_DAYS,
+    CONF_SOURCES,
+    DOMAIN,
+    LEVEL_EXCELLENT,
+    LEVEL_GOOD,
+    PERIOD_DAILY,
+    PERIOD_WEEKLY,
+    SENSOR_LEVEL,
+    SERVICE_QUANTILES,
+    STORAGE_HISTOGRAM,
+    STORAGE_LEVEL_TIME,
+)
+from custom_components.iaquk.stats import (
+    SAVE_DELAY,
+    IndexHistogram,
+    LevelTimer,
+    period_end,
+    period_start,
+    quantiles,
+)
+
+
+async def test_level_timer(hass: HomeAssistant):
+    """Test accounting of time in levels."""
+    # Sunday, one hour before the end of the day and the week
+    monday = dt_util.start_of_local_day(dt_util.parse_datetime("2024-01-08 12:00Z"))
+    start = monday - timedelta(hours=1)
+    assert period_start(PERIOD_DAILY, start) == monday - timedelta(days=1)
+    assert period_start(PERIOD_WEEKLY, start) == monday - timedelta(days=7)
+    assert period_end(PERIOD_WEEKLY, monday - timedelta(days=7)) == monday
+
+    timer = LevelTimer()
+    assert timer.transition(LEVEL_GOOD, start) is True
+    assert timer.transition(LEVEL_GOOD, start + timedelta(minutes=30)) is False
+    assert timer.hours(LEVEL_GOOD, PERIOD_DAILY, start + timedelta(minutes=30)) == 0.5
+
+    timer.transition(LEVEL_EXCELLENT, start + timedelta(minutes=45))
+    now = start + timedelta(minutes=45)
+    assert timer.hours(LEVEL_GOOD, PERIOD_DAILY, now) == 0.75
+    assert timer.hours(LEVEL_GOOD, PERIOD_WEEKLY, now) == 0.75
+
+    # Time is split at the boundary of periods
+    now = monday + timedelta(hours=2)
+    assert timer.hours(LEVEL_EXCELLENT, PERIOD_DAILY, now) == 2
+    assert timer.hours(LEVEL_EXCELLENT, PERIOD_WEEKLY, now) == 2
+    assert timer.hours(LEVEL_GOOD, PERIOD_WEEKLY, now) == 0
+
+    timer.transition(None, now)
+    now += timedelta(hours=1)
+    assert timer.hours(LEVEL_EXCELLENT, PERIOD_DAILY, now) == 2
+
+    restored = LevelTimer.from_dict(timer.as_dict(now))
+    assert restored.level is None
+    assert restored.hours(LEVEL_EXCELLENT, PERIOD_DAILY, now) == 2
+    assert restored.hours(LEVEL_EXCELLENT, PERIOD_DAILY, now + timedelta(days=1)) == 0
+
+
+async def test_level_time_sensors(hass: HomeAssistant, hass_storage, freezer):
+    """Test time-in-level sensors and their persistence."""
+    now = dt_util.start_of_local_day() + timedelta(hours=12)
+    freezer.move_to(now)
+    hass_storage[STORAGE_LEVEL_TIME] = {
+        "version": 1,
+        "key": STORAGE_LEVEL_TIME,
+        "data": {
+            "test": {
+                PERIOD_DAILY: {
+                    "start": dt_util.start_of_local_day().isoformat(),
+                    "seconds": {LEVEL_EXCELLENT: 3600},
+                },
+            },
+            "other": {PERIOD_DAILY: {"start": "2024-01-01T00:00:00+00:00"}},
+        },
+    }
+
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        "test": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_LEVEL, "excellent_time_daily", "good_time_weekly"],
+        }
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_excellent_time_daily")
+    assert state.state == "1.0"
+    assert state.attributes["state_class"] == "total_increasing"
+    assert state.attributes[ATTR_UNIT_OF_MEASUREMENT] == "h"
+
+    freezer.tick(timedelta(minutes=30))
+    hass.states.async_set("sensor.test_co2", 800, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY))
+    await hass.async_block_till_done()
+
+    stored = hass_storage[STORAGE_LEVEL_TIME]["data"]["test"]
+    assert stored[PERIOD_DAILY]["seconds"] == {LEVEL_EXCELLENT: 5400}
+    assert stored[PERIOD_WEEKLY]["seconds"] == {LEVEL_EXCELLENT: 1800}
+    # Statistics of rooms which are not set up are kept
+    assert "other" in hass_storage[STORAGE_LEVEL_TIME]["data"]
+
+    freezer.tick(timedelta(minutes=15))
+    await async_update_entity(hass, "sensor.test_good_time_weekly")
+
+    assert hass.states.get("sensor.test_excellent_time_daily").state == "1.5"
+    assert hass.states.get("sensor.test_good_time_weekly").state == "0.25"
+
+    # States are written once a minute and only when their value changes
+    entities = hass.data["sensor"]
+    excellent = entities.get_entity("sensor.test_excellent_time_daily")
+    good = entities.get_entity("sensor.test_good_time_weekly")
+    with (
+        patch.object(excellent, "async_write_ha_state") as excellent_write,
+        patch.object(good, "async_write_ha_state") as good_write,
+    ):
+        for _ in range(6):
+            freezer.tick(timedelta(seconds=30))
+            async_fire_time_changed(hass, dt_util.utcnow())
+            await hass.async_block_till_done()
+
+    excellent_write.assert_not_called()
+    assert 0 < good_write.call_count <= 3
+    assert good.native_value == 0.3
+
+
+async def test_index_histogram(hass: HomeAssistant):
+    """Test time-weighted histogram of IAQ index."""
+    day = dt_util.start_of_local_day(dt_util.parse_datetime("2024-01-08 12:00Z"))
+    hist = IndexHistogram(2)
+    assert hist.observe(50, day) is True
+    assert hist.observe(50, day + timedelta(hours=1)) is False
+    hist.observe(30, day + timedelta(hours=9))
+    hist.observe(None, day + timedelta(hours=10))
+
+    now = day + timedelta(hours=12)
+    histogram = hist.histogram(now)
+    assert histogram[50] == 9 * 3600
+    assert histogram[30] == 3600
+    assert quantiles(histogram, [0.05, 0.1, 0.5, 0.95, 1]) == [30, 30, 50, 50, 50]
+    assert quantiles(IndexHistogram(2).histogram(now), [0.5]) == [None]
+
+    # Edges are the lowest and the highest values seen
+    edges = [0] * 66
+    edges[40] = edges[50] = 1
+    assert quantiles(edges, [0, 0.5, 1]) == [40, 40, 50]
+    assert quantiles(edges, [0.5000001]) == [50]
+
+    # Only the last days are kept, time is split at the boundary of days
+    hist.observe(20, now)
+    now = day + timedelta(days=2, hours=12)
+    assert hist.histogram(now)[20] == 36 * 3600
+    assert hist.histogram(now, 1)[20] == 12 * 3600
+    assert hist.histogram(now)[50] == 0
+
+    restored = IndexHistogram.from_dict(2, hist.as_dict(now))
+    assert restored.histogram(now) == hist.histogram(now)
+
+    # Days of downtime are counted as empty days
+    restored = IndexHistogram.from_dict(3, hist.as_dict(now))
+    later = now + timedelta(days=3)
+    restored.observe(40, later)
+    assert restored.histogram(later + timedelta(hours=1))[20] == 0
+    assert restored.histogram(later + timedelta(hours=1))[40] == 3600
+    assert len(restored.as_dict(later)) == 3
+
+    restored = IndexHistogram.from_dict(3, hist.as_dict(now))
+    restored.observe(40, now + timedelta(days=1))
+    assert restored.histogram(now + timedelta(days=1))[20] == 36 * 3600
+
+
+async def test_quantiles_service(hass: HomeAssistant, hass_storage, freezer):
+    """Test quantiles of rooms and of all rooms together."""
+    now = dt_util.start_of_local_day() + timedelta(hours=12)
+    freezer.move_to(now)
+    hass_storage[STORAGE_HISTOGRAM] = {
+        "version": 1,
+        "key": STORAGE_HISTOGRAM,
+        "data": {"bedroom": {dt_util.start_of_local_day().isoformat(): {"13": 3600}}},
+    }
+
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        room: {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_LEVEL],
+            CONF_QUANTILE_DAYS: 7,
+        }
+        for room in ("kitchen", "bedroom")
+    }
+    config["hall"] = {CONF_SOURCES: {CONF_CO2: "sensor.test_co2"}}
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    freezer.tick(timedelta(hours=3))
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_QUANTILES,
+        {ATTR_QUANTILES: [0.2, 0.5], ATTR_DAYS: 1},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        ATTR_ROOMS: {
+            "kitchen": {"p20": 65, "p50": 65},
+            "bedroom": {"p20": 13, "p50": 65},
+        },
+        # One hour of seven at 13 points
+        ATTR_MERGED: {"p20": 65, "p50": 65},
+    }
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY))
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_HISTOGRAM]["data"]["kitchen"]
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_QUANTILES,
+            {ATTR_ROOMS: ["hall"]},
+            blocking=True,
+            return_response=True,
+        )
@@ -0,0 +1,287 @@
+"""The test for the IAQ UK threshold sweep tool."""
+
+import csv
+import json
+import math
+import random
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from custom_components.iaquk.core import (
+    BANDS,
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_PM,
+    CONF_TEMPERATURE,
+    LEVEL_BANDS,
+    LEVEL_EXCELLENT,
+    LEVEL_FAIR,
+    LEVEL_GOOD,
+    LEVEL_INADEQUATE,
+    apply_hysteresis,
+    score,
+)
+from custom_components.iaquk.filters import SlidingMedian
+
+np = pytest.importorskip("numpy")
+
+# pylint: disable=wrong-import-position
+from custom_components.iaquk.history import HistoryCache  # noqa: E402
+from custom_components.iaquk.sweep import (  # noqa: E402
+    CANDIDATE_CURRENT,
+    NO_LEVEL,
+    RoomHistory,
+    band_results,
+    cached_history,
+    despiked,
+    hysteresis_results,
+    load_rooms,
+    load_snapshots,
+    main,
+    make_candidate,
+    score_levels,
+    source_values,
+)
+
+
+def test_band_results():
+    """Test vectorised band tables give the same results as the tables."""
+    for table in (*BANDS.values(), LEVEL_BANDS):
+        values = [-1.0, 1e6]
+        for edge in table.edges:
+            values += [edge, math.nextafter(edge, -math.inf), edge + 1e-9, edge + 1]
+        result = band_results(table, np.array(values))
+        assert result.tolist() == [table(value) for value in values]
+
+
+def test_despiked():
+    """Test medians of samples are the same as of despike filter."""
+    rnd = random.Random(0)
+    values = [rnd.choice([math.nan, 1.0, 2.0, 5.0, 40.0]) for _ in range(200)]
+    result = despiked(np.array(values), 5)
+
+    flt = SlidingMedian(5)
+    previous = math.nan
+    for value, res in zip(values, result.tolist(), strict=True):
+        if math.isnan(value):
+            assert math.isnan(res)
+        else:
+            if value != previous:
+                flt.push(value)
+            assert res == flt.median
+        previous = value
+
+
+def test_hysteresis_results():
+    """Test hysteresis is replayed as by the controller."""
+    rnd = random.Random(2)
+    table = BANDS[CONF_CO2]
+    values = [rnd.choice([math.nan, rnd.uniform(500, 900)]) for _ in range(300)]
+    result = hysteresis_results(table, np.array(values), 50)
+
+    previous = None
+    for value, res in zip(values, result.tolist(), strict=True):
+        if math.isnan(value):
+            previous = None
+            continue
+        previous = apply_hysteresis(value, table, previous, 50)
+        assert res == previous
+
+
+def test_score_levels():
+    """Test candidates score levels as the core module."""
+    rnd = random.Random(1)
+    size = 500
+    values = {
+        CONF_HUMIDITY: [
+            rnd.choice([math.nan, rnd.uniform(0, 100)]) for _ in range(size)
+        ],
+        CONF_CO2: [rnd.uniform(300, 2500) for _ in range(size)],
+        CONF_PM: [rnd.choice([math.nan, rnd.uniform(0, 80)]) for _ in range(size)],
+    }
+    history = RoomHistory(
+        np.arange(size, dtype=float),
+        {src: np.array(vals) for src, vals in values.items()},
+    )
+    current = make_candidate(CANDIDATE_CURRENT, {})
+    shifted = make_candidate("shifted", {"edges": {CONF_CO2: [700, 900, 1500, 1800]}})
+
+    for candidate in (current, shifted):
+        levels = score_levels(history, candidate, {})
+        names = candidate.profile.levels.results
+        for pos in range(size):
+            row = {src: vals[pos] for src, vals in values.items()}
+            res = score(
+                {src: val for src, val in row.items() if not math.isnan(val)},
+                candidate.profile,
+            )
+            assert levels[pos] != NO_LEVEL
+            assert names[levels[pos]] == res.level
+
+    with pytest.raises(ValueError, match="edges expected"):
+        make_candidate("bad", {"edges": {CONF_CO2: [700]}})
+    with pytest.raises(ValueError, match="not sorted"):
+        make_candidate("bad", {"levels": [40, 30, 50, 60]})
+
+
+def test_main(tmp_path: Path):
+    """Test sweep of exported snapshots of rooms."""
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    co2 = [500, 450, 2000, 500, None, 500]
+    with (tmp_path / "iaquk-1.jsonl").open("w", encoding="utf-8") as file:
+        for pos, value in enumerate(co2):
+            for room, humidity in (("kitchen", 50), ("bedroom", None)):
+                row = {
+                    "time": (start + timedelta(hours=pos)).isoformat(),
+                    "room": room,
+                    "co2": value,
+                    "humidity": humidity,
+                    "pm": None,
+                }
+                file.write(json.dumps(row) + "\n")
+
+    assert list(load_snapshots([tmp_path / "iaquk-1.jsonl"])) == ["bedroom", "kitchen"]
+
+    candidates = tmp_path / "candidates.json"
+    candidates.write_text(
+        json.dumps(
+            {
+                "co2_460": {"edges": {CONF_CO2: [460, 800, 1500, 1800]}},
+                "despike": {"despike": {CONF_CO2: 3}},
+            }
+        ),
+        encoding="utf-8",
+    )
+    target = tmp_path / "sweep.csv"
+    args = [str(tmp_path / "iaquk-1.jsonl"), "--candidates", str(candidates)]
+    args += ["-o", str(target), "--max-gap", "1800"]
+    assert main(args) == 0
+
+    with target.open(newline="", encoding="utf-8") as file:
+        result = {(row["candidate"], row["room"]): row for row in csv.DictReader(file)}
+    assert len(result) == 6
+
+    # Bedroom has CO2 only: 5, 4 and 1 points are Excellent, Good and Inadequate
+    row = result[(CANDIDATE_CURRENT, "bedroom")]
+    assert int(row["changes"]) == 2
+    assert float(row[LEVEL_EXCELLENT]) == 1.5
+    assert float(row[LEVEL_INADEQUATE]) == 0.5
+
+    row = result[("co2_460", "bedroom")]
+    assert int(row["changes"]) == 3
+    assert float(row[LEVEL_EXCELLENT]) == 0.5
+    assert float(row[LEVEL_GOOD]) == 1
+
+    row = result[(CANDIDATE_CURRENT, "kitchen")]
+    assert int(row["changes"]) == 2
+    assert float(row[LEVEL_FAIR]) == 0.5
+
+    # Spike is removed: medians of samples are 500, 475, 500, 500 and 500
+    row = result[("despike", "kitchen")]
+    assert int(row["changes"]) == 0
+    assert float(row[LEVEL_EXCELLENT]) == 2.5
+
+
+def test_cached_rooms(tmp_path: Path):
+    """Test histories of rooms are aligned from cached series of entities."""
+    cache = HistoryCache(tmp_path / "cache")
+    cache.append("sensor.co2", [(3600, "400000", "ppb"), (10800, "unavailable", None)])
+    cache.append("sensor.pm25", [(7200, "10", "µg/m³"), (14400, "30", "µg/m³")])
+    cache.append("sensor.pm10", [(10800, "5", "µg/m³")])
+    cache.append("sensor.temperature", [(3600, "68", "°F")])
+    cache.append("sensor.humidity", [(3600, "50", "W")])
+
+    sources = {
+        CONF_CO2: "sensor.co2",
+        CONF_PM: ["sensor.pm25", "sensor.pm10"],
+        CONF_TEMPERATURE: "sensor.temperature",
+        CONF_HUMIDITY: "sensor.humidity",
+    }
+    history = cached_history(cache, sources)
+    assert history.times.tolist() == [3600, 7200, 10800, 14400]
+    assert set(history.values) == {CONF_CO2, CONF_PM, CONF_TEMPERATURE}
+    np.testing.assert_allclose(history.values[CONF_CO2], [400, 400, np.nan, np.nan])
+    np.testing.assert_allclose(history.values[CONF_PM], [np.nan, 10, 15, 35])
+    np.testing.assert_allclose(history.values[CONF_TEMPERATURE], [20] * 4)
+
+    rooms = tmp_path / "rooms.json"
+    rooms.write_text(json.dumps({"kitchen": sources}), encoding="utf-8")
+    target = tmp_path / "sweep.csv"
+    args = ["--cache", str(tmp_path / "cache"), "--rooms", str(rooms)]
+    assert main([*args, "-o", str(target)]) == 0
+    with target.open(newline="", encoding="utf-8") as file:
+        result = list(csv.DictReader(file))
+    assert [row["room"] for row in result] == ["kitchen"]
+    # Each state lasts until the next change of any source
+    assert float(result[0][LEVEL_EXCELLENT]) == 3
+
+    # Rooms may have options along with sources
+    spec = {"sources": sources, "despike": {CONF_PM: 3}}
+    rooms.write_text(json.dumps({"kitchen": spec}), encoding="utf-8")
+    history = load_rooms(rooms, cache, None)["kitchen"]
+    assert history.options.despike == {CONF_PM: 3}
+    assert history.entities[CONF_PM].shape == (2, 4)
+
+
+def test_room_options(tmp_path: Path):
+    """Test raw values of entities are replayed with options of rooms."""
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    raw = {
+        # Spike of CO2 sensor is despiked by the room; PM sensors spike in turns
+        "kitchen": {
+            CONF_CO2: [[500], [510], [2000], [500], [500]],
+            CONF_PM: [[10, 10], [14, 10], [10, 10], [10, 14], [10, 10]],
+        },
+        "bedroom": {CONF_CO2: [[590], [610], [590], [610], [590]]},
+    }
+    options = {
+        "kitchen": {"despike": {CONF_CO2: 3, CONF_PM: 3}},
+        "bedroom": {"hysteresis": {CONF_CO2: 100}},
+    }
+    with (tmp_path / "iaquk-1.jsonl").open("w", encoding="utf-8") as file:
+        for pos in range(5):
+            for room, sources in raw.items():
+                row = {
+                    "time": (start + timedelta(hours=pos)).isoformat(),
+                    "room": room,
+                    **options[room],
+                }
+                for src, values in sources.items():
+                    # Exported values are already filtered by the room
+                    row[src] = 0
+                    row[f"{src}_raw"] = values[pos]
+                file.write(json.dumps(row) + "\n")
+
+    rooms = load_snapshots([tmp_path / "iaquk-1.jsonl"])
+    kitchen = rooms["kitchen"]
+    assert kitchen.options.despike == {CONF_CO2: 3, CONF_PM: 3}
+    assert rooms["bedroom"].options.hysteresis == {CONF_CO2: 100}
+    # Each entity is despiked before values are summed, despiked sums reach 24
+    np.testing.assert_allclose(source_values(kitchen, CONF_PM, 3), [20, 22, 20, 22, 20])
+    np.testing.assert_allclose(
+        source_values(kitchen, CONF_CO2, 3), [500, 505, 510, 510, 510]
+    )
+
+    candidates = tmp_path / "candidates.json"
+    candidates.write_text(
+        json.dumps(
+            {
+                "no_despike": {"despike": {CONF_CO2: 1, CONF_PM: 1}},
+                "no_hysteresis": {"hysteresis": {CONF_CO2: 0}},
+            }
+        ),
+        encoding="utf-8",
+    )
+    target = tmp_path / "sweep.csv"
+    args = [str(tmp_path / "iaquk-1.jsonl"), "--candidates", str(candidates)]
+    assert main([*args, "-o", str(target)]) == 0
+    with target.open(newline="", encoding="utf-8") as file:
+        result = {(row["candidate"], row["room"]): row for row in csv.DictReader(file)}
+
+    # Current candidate uses options of each room
+    assert int(result[(CANDIDATE_CURRENT, "kitchen")]["changes"]) == 0
+    assert int(result[("no_despike", "kitchen")]["changes"]) == 4
+    assert int(result[(CANDIDATE_CURRENT, "bedroom")]["changes"]) == 0
+    assert int(result[("no_hysteresis", "bedroom")]["changes"]) == 4
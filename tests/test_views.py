@@ -0,0 +1,79 @@
+"""The test for the IAQ UK HTTP API."""
+
+from http import HTTPStatus
+from unittest.mock import patch
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, CONF_SENSORS
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+from homeassistant.setup import async_setup_component
+
+from custom_components.iaquk.const import (
+    CONF_CO2,
+    CONF_SOURCES,
+    DOMAIN,
+    SENSOR_LEVEL,
+)
+
+
+async def test_rooms(hass: HomeAssistant, hass_client):
+    """Test document with all rooms and its ETag."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    config = {
+        "kitchen": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_LEVEL],
+        },
+    }
+    assert await async_setup_component(hass, "http", {})
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    client = await hass_client()
+    resp = await client.get(f"/api/{DOMAIN}/rooms")
+    assert resp.status == HTTPStatus.OK
+    assert await resp.json() == {
+        "rooms": {
+            "kitchen": {
+                "index": 65,
+                "level": "Excellent",
+                "indexes": {CONF_CO2: 5},
+                "sources_used": 1,
+            }
+        }
+    }
+    etag = resp.headers["ETag"]
+
+    resp = await client.get(f"/api/{DOMAIN}/rooms", headers={"If-None-Match": etag})
+    assert resp.status == HTTPStatus.NOT_MODIFIED
+
+    hass.states.async_set("sensor.test_co2", 1000, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+
+    resp = await client.get(f"/api/{DOMAIN}/rooms", headers={"If-None-Match": etag})
+    assert resp.status == HTTPStatus.OK
+    assert resp.headers["ETag"] != etag
+    assert (await resp.json())["rooms"]["kitchen"]["index"] == 39
+
+    # Updates which do not change state of rooms keep the document
+    etag = resp.headers["ETag"]
+    with patch(
+        "custom_components.iaquk.views.json_bytes", side_effect=json_bytes
+    ) as serialize:
+        hass.states.async_set(
+            "sensor.test_co2", 1100, {ATTR_UNIT_OF_MEASUREMENT: "ppm"}
+        )
+        await hass.async_block_till_done()
+        resp = await client.get(f"/api/{DOMAIN}/rooms")
+        assert resp.headers["ETag"] == etag
+        assert serialize.call_count == 0
+
+        hass.states.async_set(
+            "sensor.test_co2", 1600, {ATTR_UNIT_OF_MEASUREMENT: "ppm"}
+        )
+        await hass.async_block_till_done()
+        resp = await client.get(f"/api/{DOMAIN}/rooms")
+        assert resp.headers["ETag"] != etag
+        assert serialize.call_count == 1
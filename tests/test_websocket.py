@@ -0,0 +1,84 @@
+"""The test for the IAQ UK websocket API."""
+
+from datetime import timedelta
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, CONF_SENSORS
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.iaquk.const import (
+    ATTR_INTERVAL,
+    CONF_CO2,
+    CONF_HUMIDITY,
+    CONF_SOURCES,
+    DOMAIN,
+    SENSOR_LEVEL,
+)
+
+
+async def test_subscribe(hass: HomeAssistant, hass_ws_client):
+    """Test snapshot and coalesced changes of rooms."""
+    hass.states.async_set("sensor.test_co2", 500, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    hass.states.async_set("sensor.test_humidity", 50, {ATTR_UNIT_OF_MEASUREMENT: "%"})
+    config = {
+        "kitchen": {
+            CONF_SOURCES: {
+                CONF_CO2: "sensor.test_co2",
+                CONF_HUMIDITY: "sensor.test_humidity",
+            },
+            CONF_SENSORS: [SENSOR_LEVEL],
+        },
+        "bedroom": {
+            CONF_SOURCES: {CONF_CO2: "sensor.test_co2"},
+            CONF_SENSORS: [SENSOR_LEVEL],
+        },
+    }
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: config})
+    await hass.async_block_till_done()
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe", ATTR_INTERVAL: 5})
+    msg = await client.receive_json()
+    assert msg["success"]
+
+    msg = await client.receive_json()
+    assert msg["event"] == {
+        "rooms": {
+            "kitchen": {
+                "index": 65,
+                "level": "Excellent",
+                "indexes": {CONF_CO2: 5, CONF_HUMIDITY: 5},
+            },
+            "bedroom": {"index": 65, "level": "Excellent", "indexes": {CONF_CO2: 5}},
+        }
+    }
+
+    hass.states.async_set("sensor.test_co2", 1600, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+    hass.states.async_set("sensor.test_humidity", None)
+    await hass.async_block_till_done()
+    hass.states.async_set("sensor.test_co2", 1000, {ATTR_UNIT_OF_MEASUREMENT: "ppm"})
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    msg = await client.receive_json()
+    # One event with the last state of each room
+    assert msg["event"] == {
+        "rooms": {
+            "kitchen": {
+                "index": 39,
+                "level": "Fair",
+                "indexes": {CONF_CO2: 3, CONF_HUMIDITY: None},
+            },
+            "bedroom": {"index": 39, "level": "Fair", "indexes": {CONF_CO2: 3}},
+        }
+    }
+
+    await client.send_json({"id": 2, "type": "unsubscribe_events", "subscription": 1})
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert len(hass.data[DOMAIN]["kitchen"]._listeners) == 1  # Only the sensor